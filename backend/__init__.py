@@ -3,6 +3,28 @@ Backend package for Salon Pulse application.
 Contains Flask app, routes, models, and analytics modules.
 """
 
-from .models import Appointment, Customer, Service, Technician, app, db
+from . import customer_stats  # Registers the session hook that keeps customer_stats in step
+from . import rollups  # Registers the session hook that keeps daily_revenue in step
+from .app_factory import create_app
+from .models import (
+    Appointment,
+    Customer,
+    CustomerStats,
+    DailyRevenue,
+    Service,
+    Technician,
+    app,
+    db,
+)
 
-__all__ = ["app", "db", "Technician", "Service", "Customer", "Appointment"]
+__all__ = [
+    "app",
+    "create_app",
+    "db",
+    "Technician",
+    "Service",
+    "Customer",
+    "Appointment",
+    "DailyRevenue",
+    "CustomerStats",
+]
@@ -0,0 +1,148 @@
+"""JSON analytics API with ETag-based conditional GET."""
+
+import hashlib
+import io
+from datetime import datetime, timedelta
+
+from flask import Blueprint, Response, abort, jsonify, request
+
+from backend.appointment_queries import get_chart_data
+from backend.customer_analytics import (
+    SEGMENTS,
+    calculate_customer_ltv,
+    get_at_risk_customers,
+    get_ltv_snapshot,
+)
+from backend.importer import READERS, import_appointments
+from backend.models import app, get_ledger_version
+from backend.staff_analytics import (
+    get_customer_retention_by_technician,
+    get_staff_summary_stats,
+    get_technician_performance,
+)
+
+api_bp = Blueprint("api", __name__)
+
+
+def _etag():
+    """
+    ETag for the current request.
+
+    Derived from the endpoint, its query parameters, the ledger version and
+    the current hour, so time-relative results (days since a visit, rolling
+    windows) are refreshed at least hourly even when the ledger is idle.
+    """
+    parts = [
+        request.path,
+        "&".join(f"{key}={value}" for key, value in sorted(request.args.items(multi=True))),
+        get_ledger_version(),
+        datetime.now().strftime("%Y-%m-%dT%H"),
+    ]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()[:32]
+
+
+def _conditional_json(build_payload):
+    """
+    Answer 304 when the client's ETag is current, otherwise build the JSON.
+
+    The payload is only computed when the ETag does not match.
+    """
+    etag = _etag()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build_payload())
+    response.set_etag(etag)
+    response.cache_control.no_cache = True  # Clients must revalidate
+    return response
+
+
+def _date_range(default_days):
+    """Date range ending now from the ?days= parameter."""
+    days = request.args.get("days", default_days, type=int)
+    end_date = datetime.now()
+    return end_date - timedelta(days=days), end_date
+
+
+# --- PERFORMANCE ---
+@api_bp.route("/api/performance")
+def api_performance():
+    start_date, end_date = _date_range(30)
+    return _conditional_json(lambda: get_technician_performance(start_date, end_date))
+
+
+# --- REVENUE TRENDS ---
+@api_bp.route("/api/trends")
+def api_trends():
+    period = request.args.get("period", "day")
+    selected_tech = request.args.get("tech_id", "all")
+    tech_id = None if selected_tech == "all" else int(selected_tech)
+    return _conditional_json(lambda: get_chart_data(period=period, technician_id=tech_id))
+
+
+# --- CUSTOMER SEGMENTS ---
+@api_bp.route("/api/segments")
+def api_segments():
+    def build():
+        snapshot = get_ltv_snapshot()
+        del snapshot["customers"]  # Summary only; the full list is on /customers
+        return snapshot
+
+    return _conditional_json(build)
+
+
+@api_bp.route("/api/segments/<segment>")
+def api_segment_customers(segment):
+    if segment not in SEGMENTS:
+        abort(404)
+    return _conditional_json(
+        lambda: {"segment": segment, "customers": calculate_customer_ltv(segment=segment)}
+    )
+
+
+# --- RETENTION ---
+@api_bp.route("/api/retention")
+def api_retention():
+    start_date, end_date = _date_range(90)
+    return _conditional_json(
+        lambda: {
+            "by_technician": get_customer_retention_by_technician(start_date, end_date),
+            "at_risk": get_at_risk_customers(),
+        }
+    )
+
+
+# --- STAFF SUMMARY ---
+@api_bp.route("/api/staff-stats")
+def api_staff_stats():
+    start_date, end_date = _date_range(30)
+    return _conditional_json(lambda: get_staff_summary_stats(start_date, end_date))
+
+
+# --- BULK IMPORT ---
+@api_bp.route("/api/import", methods=["POST"])
+def api_import():
+    """
+    Stream a CSV or NDJSON export into the ledger.
+
+    Accepts a multipart upload in the "file" field or the raw request body.
+    The format comes from ?format=, else the file extension (default csv).
+    """
+    upload = request.files.get("file")
+    filename = upload.filename if upload else ""
+    default_format = "ndjson" if filename.endswith((".ndjson", ".jsonl")) else "csv"
+    file_format = request.args.get("format", default_format)
+    if file_format not in READERS:
+        abort(400, f"Unsupported format {file_format!r}")
+
+    stream = io.TextIOWrapper(upload.stream if upload else request.stream, encoding="utf-8")
+    try:
+        stats = import_appointments(READERS[file_format](stream))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    return jsonify(stats)
+
+
+# Register on the default application; create_app() registers on the apps it builds
+app.register_blueprint(api_bp)
@@ -0,0 +1,36 @@
+"""Application factory for WSGI servers and tests."""
+
+from typing import Dict
+
+from flask import Flask
+
+from backend.models import configure_app
+
+
+def create_app(config: Dict = None) -> Flask:
+    """
+    Build a new application with its own database engine and all views.
+
+    Args:
+        config: Config values replacing the defaults (see models.DEFAULT_CONFIG)
+
+    Returns:
+        Configured Flask application
+    """
+    # Deferred so importing the package does not load every view module
+    from backend.api import api_bp
+    from backend.exports import export_bp
+    from backend.metrics import init_metrics
+    from backend.page_cache import init_page_cache
+    from backend.query_tracking import init_query_tracking
+    from backend.routes import main_bp
+
+    app = Flask("backend", template_folder="../templates", static_folder="../static")
+    configure_app(app, config)
+    app.register_blueprint(main_bp)
+    app.register_blueprint(api_bp)
+    app.register_blueprint(export_bp)
+    init_metrics(app)
+    init_query_tracking(app)
+    init_page_cache(app)
+    return app
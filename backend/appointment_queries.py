@@ -0,0 +1,191 @@
+"""Read paths for the appointment history page: table pages and chart series."""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import joinedload
+
+from backend.models import Appointment, DailyRevenue, Service, Technician, db
+
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(appointment: Appointment) -> str:
+    """
+    Build the keyset cursor pointing at an appointment.
+
+    Args:
+        appointment: Row the cursor should point at
+
+    Returns:
+        Cursor string of the form "<iso date_time>_<id>"
+    """
+    return f"{appointment.date_time.isoformat()}_{appointment.id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Parse a cursor produced by encode_cursor.
+
+    Args:
+        cursor: Cursor string
+
+    Returns:
+        Tuple of (date_time, id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    timestamp, _, appointment_id = cursor.rpartition("_")
+    return datetime.fromisoformat(timestamp), int(appointment_id)
+
+
+def appointment_listing_query():
+    """
+    Base query for rendering appointment rows.
+
+    The customer, service and technician of each row are loaded in the same
+    SELECT (joined eager loading), so rendering a listing costs one query no
+    matter how many rows it shows.
+
+    Returns:
+        Appointment query with its associations eagerly loaded
+    """
+    return Appointment.query.options(
+        joinedload(Appointment.customer),
+        joinedload(Appointment.service),
+        joinedload(Appointment.technician),
+    )
+
+
+def get_appointment_page(
+    technician_id: Optional[int] = None,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    page_size: int = 50,
+) -> Dict:
+    """
+    Get one page of appointments, newest first, using keyset pagination.
+
+    Pages are addressed by (date_time, id) cursors rather than offsets, so the
+    cost of a page depends on the page size and not on how deep it is.
+
+    Args:
+        technician_id: Only include this technician's appointments
+        after: Cursor of the last row of the previous page (older rows follow)
+        before: Cursor of the first row of the next page (newer rows precede)
+        page_size: Rows per page (capped at MAX_PAGE_SIZE)
+
+    Returns:
+        Dict with the page "rows" plus "next_cursor" (older) and
+        "prev_cursor" (newer), either of which is None at the ends
+
+    Raises:
+        ValueError: If a cursor is malformed
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+
+    query = appointment_listing_query()
+    if technician_id is not None:
+        query = query.filter(Appointment.technician_id == technician_id)
+
+    if before:
+        # Walk towards newer rows, then flip back to newest-first
+        cursor_time, cursor_id = decode_cursor(before)
+        query = query.filter(
+            or_(
+                Appointment.date_time > cursor_time,
+                and_(Appointment.date_time == cursor_time, Appointment.id > cursor_id),
+            )
+        ).order_by(Appointment.date_time.asc(), Appointment.id.asc())
+    else:
+        if after:
+            cursor_time, cursor_id = decode_cursor(after)
+            query = query.filter(
+                or_(
+                    Appointment.date_time < cursor_time,
+                    and_(Appointment.date_time == cursor_time, Appointment.id < cursor_id),
+                )
+            )
+        query = query.order_by(Appointment.date_time.desc(), Appointment.id.desc())
+
+    # Fetch one extra row to learn whether another page exists
+    rows = query.limit(page_size + 1).all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if before:
+        rows.reverse()
+        has_newer, has_older = has_more, True
+    else:
+        has_newer, has_older = after is not None, has_more
+
+    return {
+        "rows": rows,
+        "next_cursor": encode_cursor(rows[-1]) if rows and has_older else None,
+        "prev_cursor": encode_cursor(rows[0]) if rows and has_newer else None,
+    }
+
+
+def get_chart_data(period: str = "day", technician_id: Optional[int] = None) -> Dict[str, List]:
+    """
+    Get the revenue series for the appointment history charts.
+
+    Each series is aggregated in the database from the daily revenue rollup
+    (GROUP BY day/month bucket, technician and service), so only the small
+    label/value arrays come back.
+
+    Args:
+        period: "day" or "month" buckets for the trend chart
+        technician_id: Only include this technician's appointments
+
+    Returns:
+        Dict with label/value arrays for the trend, technician and service charts
+    """
+    total_money = func.sum(DailyRevenue.revenue + DailyRevenue.tips)
+    bucket = func.strftime("%Y-%m" if period == "month" else "%Y-%m-%d", DailyRevenue.day)
+
+    def _filtered(query):
+        if technician_id is not None:
+            query = query.filter(DailyRevenue.technician_id == technician_id)
+        return query
+
+    # Trend: revenue per day/month, chronological
+    trend = (
+        _filtered(db.session.query(bucket.label("bucket"), total_money.label("total")))
+        .group_by(bucket)
+        .order_by(bucket)
+        .all()
+    )
+
+    # Technician and service breakdowns by name, largest first; like-named
+    # technicians or services share a bar, as they did before the SQL rewrite
+    by_tech = (
+        _filtered(
+            db.session.query(Technician.name, total_money.label("total")).join(
+                DailyRevenue, DailyRevenue.technician_id == Technician.id
+            )
+        )
+        .group_by(Technician.name)
+        .order_by(total_money.desc(), Technician.name)
+        .all()
+    )
+    by_service = (
+        _filtered(
+            db.session.query(Service.name, total_money.label("total")).join(
+                DailyRevenue, DailyRevenue.service_id == Service.id
+            )
+        )
+        .group_by(Service.name)
+        .order_by(total_money.desc(), Service.name)
+        .all()
+    )
+    return {
+        "trend_labels": [row.bucket for row in trend],
+        "trend_values": [float(row.total) for row in trend],
+        "tech_labels": [row.name for row in by_tech],
+        "tech_values": [float(row.total) for row in by_tech],
+        "service_labels": [row.name for row in by_service],
+        "service_values": [float(row.total) for row in by_service],
+    }
@@ -0,0 +1,92 @@
+"""
+Write paths for the appointment ledger.
+
+A new appointment and, when its phone number is new, its customer are written
+in one transaction: the customer is upserted with INSERT ... ON CONFLICT(phone)
+... RETURNING id, so concurrent front-desk terminals entering the same phone
+resolve to one row instead of racing a lookup against an insert.
+"""
+
+from datetime import datetime
+from typing import Dict, Mapping
+
+from sqlalchemy.dialects.sqlite import insert
+
+from backend.models import Appointment, Customer, db
+
+
+def upsert_customers(customers: Mapping[str, str], session=None) -> Dict[str, int]:
+    """
+    Create missing customers and return the ids of all of them.
+
+    Existing customers keep their stored name. Nothing is committed.
+
+    Args:
+        customers: Mapping of phone number to first name
+        session: Session to write on (default: db.session)
+
+    Returns:
+        Dict mapping every given phone number to its customer id
+    """
+    if not customers:
+        return {}
+
+    session = session or db.session
+    stmt = insert(Customer)
+    # A no-op update (instead of DO NOTHING) makes RETURNING report existing rows too
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Customer.phone], set_={"phone": stmt.excluded.phone}
+    ).returning(Customer.phone, Customer.id)
+
+    rows = session.execute(
+        stmt, [{"first_name": name, "phone": phone} for phone, name in customers.items()]
+    )
+    return {phone: customer_id for phone, customer_id in rows}
+
+
+def record_appointment(
+    customer_name: str,
+    customer_phone: str,
+    technician_id: int,
+    service_id: int,
+    price: float,
+    tip: float = 0.0,
+    payment_method: str = None,
+    date_time: datetime = None,
+    session=None,
+) -> Appointment:
+    """
+    Upsert the customer and insert an appointment in a single transaction.
+
+    Args:
+        customer_name: First name, used only if the phone number is new
+        customer_phone: Phone number identifying the customer
+        technician_id: Technician who did the work
+        service_id: Service performed
+        price: Price charged
+        tip: Tip amount
+        payment_method: Payment method, if recorded
+        date_time: When the appointment took place (default: now)
+        session: Session to write on (default: db.session)
+
+    Returns:
+        The committed Appointment
+    """
+    session = session or db.session
+    try:
+        customer_id = upsert_customers({customer_phone: customer_name}, session)[customer_phone]
+        appointment = Appointment(
+            date_time=date_time or datetime.now(),
+            customer_id=customer_id,
+            technician_id=technician_id,
+            service_id=service_id,
+            price_charged=price,
+            tip_amount=tip,
+            payment_method=payment_method,
+        )
+        session.add(appointment)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return appointment
@@ -5,125 +5,226 @@ This module analyzes customer behavior and calculates lifetime value metrics
 to help identify VIP customers, at-risk customers, and growth opportunities.
 """
 
-from collections import defaultdict
-from datetime import datetime
+import math
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, NamedTuple
 
-from backend.models import Appointment, Customer, app
+import numpy as np
+from sqlalchemy import String, and_, case, func, or_, select, type_coerce
 
+from backend.ltv_kernel import TRENDS, derived_metrics
+from backend.models import Customer, CustomerStats, app_context, db
 
-def calculate_customer_ltv():
+# Days without a visit before a customer shows up in the retention alerts
+RETENTION_ALERT_DAYS = 30
+
+
+class SegmentThresholds(NamedTuple):
+    """Segmentation thresholds (adjust based on your business)."""
+
+    high_spend: float = 300  # Total lifetime spend
+    frequent_visits: int = 5  # Number of visits
+    regular_frequency: float = 28  # Days between visits
+    at_risk_days: float = 45  # Days since last visit
+    lost_days: float = 60
+    new_customer_visits: int = 3  # Visits up to which a customer counts as new
+
+
+SEGMENT_THRESHOLDS = SegmentThresholds()
+
+# Segments from best to worst
+SEGMENTS = ("VIP", "Champion", "Loyal", "Promising", "At-Risk", "Needs Attention", "Lost")
+
+
+def calculate_customer_ltv(segment=None):
     """
     Calculate comprehensive lifetime value metrics for all customers.
 
+    Reads the running totals in customer_stats (kept in step with the ledger by
+    backend.customer_stats) in one scan joined to the customers; only the
+    fields relative to the current time are derived here, with the numpy
+    kernel in ltv_kernel, and segments are assigned with classify_customers().
+
+    Args:
+        segment: Only include customers of this segment, filtered in SQL
+
     Returns:
         list of dicts: Each customer with their LTV metrics and segment
     """
-    with app.app_context():
-        customers = Customer.query.all()
-        customer_metrics = []
-
-        for customer in customers:
-            appointments = (
-                Appointment.query.filter_by(customer_id=customer.id)
-                .order_by(Appointment.date_time.asc())
-                .all()
-            )
+    now = datetime.now()
+    with app_context():
+        query = ltv_query()
+        if segment is not None:
+            query = query.where(segment_case(now) == segment)
+        # Core execution: plain tuples, without the ORM's per-row loading overhead
+        rows = db.session.connection().execute(query).all()
 
-            if not appointments:
-                continue  # Skip customers with no appointments
-
-            # Basic Metrics
-            total_visits = len(appointments)
-            total_revenue = sum(a.price_charged for a in appointments)
-            total_tips = sum(a.tip_amount for a in appointments)
-            total_spend = total_revenue + total_tips
-
-            # Date Metrics
-            first_visit = appointments[0].date_time
-            last_visit = appointments[-1].date_time
-            days_as_customer = (datetime.now() - first_visit).days
-            days_since_last_visit = (datetime.now() - last_visit).days
-
-            # Calculate average days between visits
-            if total_visits > 1:
-                visit_dates = [a.date_time for a in appointments]
-                gaps = [
-                    (visit_dates[i + 1] - visit_dates[i]).days for i in range(len(visit_dates) - 1)
-                ]
-                avg_days_between_visits = sum(gaps) / len(gaps)
-            else:
-                avg_days_between_visits = days_as_customer
-
-            # Revenue Metrics
-            avg_transaction_value = total_spend / total_visits
-            avg_tip_percentage = (total_tips / total_revenue * 100) if total_revenue > 0 else 0
-
-            # Predict Future Value
-            # Simple prediction: If they continue at current frequency for next 12 months
-            if avg_days_between_visits > 0:
-                predicted_visits_next_year = 365 / avg_days_between_visits
-                predicted_ltv_12mo = predicted_visits_next_year * avg_transaction_value
-            else:
-                predicted_ltv_12mo = 0
-
-            # Calculate visit frequency trend (are they coming more or less often?)
-            visit_trend = "Stable"
-            if total_visits >= 3:
-                # Compare first half vs second half of visit gaps
-                mid_point = len(gaps) // 2
-                if mid_point > 0:
-                    first_half_avg = sum(gaps[:mid_point]) / mid_point
-                    second_half_avg = sum(gaps[mid_point:]) / len(gaps[mid_point:])
-
-                    if second_half_avg < first_half_avg * 0.8:  # Coming more frequently
-                        visit_trend = "Increasing"
-                    elif second_half_avg > first_half_avg * 1.2:  # Coming less frequently
-                        visit_trend = "Decreasing"
-
-            # Customer Segmentation
-            segment = classify_customer(
-                total_visits=total_visits,
-                days_since_last_visit=days_since_last_visit,
-                total_spend=total_spend,
-                avg_days_between_visits=avg_days_between_visits,
-            )
+    customers = customer_metrics(rows, now)
 
-            # Compile all metrics
-            customer_metrics.append(
-                {
-                    "customer_id": customer.id,
-                    "name": customer.first_name,
-                    "phone": customer.phone,
-                    "segment": segment,
-                    # Visit Metrics
-                    "total_visits": total_visits,
-                    "first_visit": first_visit,
-                    "last_visit": last_visit,
-                    "days_as_customer": days_as_customer,
-                    "days_since_last_visit": days_since_last_visit,
-                    "avg_days_between_visits": round(avg_days_between_visits, 1),
-                    "visit_trend": visit_trend,
-                    # Financial Metrics
-                    "total_spend": round(total_spend, 2),
-                    "total_revenue": round(total_revenue, 2),
-                    "total_tips": round(total_tips, 2),
-                    "avg_transaction_value": round(avg_transaction_value, 2),
-                    "avg_tip_percentage": round(avg_tip_percentage, 1),
-                    # Predictions
-                    "predicted_ltv_12mo": round(predicted_ltv_12mo, 2),
-                    # Service Preferences
-                    "favorite_services": get_favorite_services(appointments),
-                    "favorite_technician": get_favorite_technician(appointments),
-                }
-            )
+    # Sort by total spend (highest LTV first)
+    customers.sort(key=lambda x: x["total_spend"], reverse=True)
+
+    return customers
+
+
+def ltv_query():
+    """
+    The customer_stats scan behind the LTV metrics, in customer id order.
+
+    Returns:
+        Select whose rows customer_metrics() turns into LTV dicts
+    """
+    return (
+        select(
+            CustomerStats.customer_id,
+            Customer.first_name,
+            Customer.phone,
+            CustomerStats.visit_count,
+            CustomerStats.total_revenue,
+            CustomerStats.total_tips,
+            # The raw stored text parses straight into datetime64
+            type_coerce(CustomerStats.first_visit, String),
+            type_coerce(CustomerStats.last_visit, String),
+            CustomerStats.gap_sum,
+            CustomerStats.first_half_gap_sum,
+            CustomerStats.favorite_service,
+            CustomerStats.second_favorite_service,
+            CustomerStats.favorite_technician,
+        )
+        .join(Customer, Customer.id == CustomerStats.customer_id)
+        .order_by(CustomerStats.customer_id)
+    )
 
-        # Sort by total spend (highest LTV first)
-        customer_metrics.sort(key=lambda x: x["total_spend"], reverse=True)
 
-        return customer_metrics
+def customer_metrics(rows, now):
+    """
+    Build the per-customer LTV dicts from customer_stats rows.
 
+    Args:
+        rows: Rows selected by ltv_query(), all of them or any batch
+        now: Reference time for the time-relative fields
 
-def classify_customer(total_visits, days_since_last_visit, total_spend, avg_days_between_visits):
+    Returns:
+        list of dicts: LTV metrics and segment per customer, in row order
+    """
+    if not rows:
+        return []
+
+    (
+        customer_ids,
+        first_names,
+        phones,
+        visit_count,
+        total_revenue,
+        total_tips,
+        first_visit,
+        last_visit,
+        gap_sum,
+        first_half_gap_sum,
+        favorite_service,
+        second_favorite_service,
+        favorite_technician,
+    ) = zip(*rows)
+    totals = {
+        "total_visits": np.array(visit_count, dtype=np.int64),
+        "total_revenue": np.array(total_revenue, dtype=float),
+        "total_tips": np.array(total_tips, dtype=float),
+        "first_visit": np.array(first_visit, dtype="datetime64[us]"),
+        "last_visit": np.array(last_visit, dtype="datetime64[us]"),
+        "gap_sum": np.array(gap_sum, dtype=np.int64),
+        "first_half_gap_sum": np.array(first_half_gap_sum, dtype=np.int64),
+    }
+    metrics = derived_metrics(totals, now)
+    segments = classify_customers(
+        totals["total_visits"],
+        metrics["days_since_last_visit"],
+        metrics["total_spend"],
+        metrics["avg_days_between_visits"],
+    ).tolist()
+
+    # Plain Python lists: indexing numpy scalars customer by customer is slow
+    lists = {name: values.tolist() for name, values in metrics.items()}
+    lists["first_visit"] = totals["first_visit"].astype(object).tolist()
+    lists["last_visit"] = totals["last_visit"].astype(object).tolist()
+    lists["visit_trend"] = TRENDS[metrics["visit_trend"]].tolist()
+
+    customers = []
+    for i, customer_id in enumerate(customer_ids):
+        total_visits = visit_count[i]
+        avg_days = lists["avg_days_between_visits"][i]
+        customers.append(
+            {
+                "customer_id": customer_id,
+                "name": first_names[i],
+                "phone": phones[i],
+                "segment": segments[i],
+                # Visit Metrics
+                "total_visits": total_visits,
+                "first_visit": lists["first_visit"][i],
+                "last_visit": lists["last_visit"][i],
+                "days_as_customer": lists["days_as_customer"][i],
+                "days_since_last_visit": lists["days_since_last_visit"][i],
+                # Without gaps this is days_as_customer, an int like before
+                "avg_days_between_visits": (
+                    round(avg_days, 1) if total_visits > 1 else int(avg_days)
+                ),
+                "visit_trend": lists["visit_trend"][i],
+                # Financial Metrics
+                "total_spend": round(lists["total_spend"][i], 2),
+                "total_revenue": round(total_revenue[i], 2),
+                "total_tips": round(total_tips[i], 2),
+                "avg_transaction_value": round(lists["avg_transaction_value"][i], 2),
+                "avg_tip_percentage": round(lists["avg_tip_percentage"][i], 1),
+                # Predictions
+                "predicted_ltv_12mo": round(lists["predicted_ltv_12mo"][i], 2),
+                # Service Preferences
+                "favorite_services": [
+                    name
+                    for name in (favorite_service[i], second_favorite_service[i])
+                    if name is not None
+                ],
+                "favorite_technician": favorite_technician[i],
+            }
+        )
+
+    return customers
+
+
+def get_visit_trend(gaps):
+    """
+    Tell whether a customer is coming more or less often.
+
+    Compares the average of the first half of the visit gaps with the second half.
+
+    Args:
+        gaps: Days between consecutive visits, oldest first
+
+    Returns:
+        str: "Increasing", "Decreasing" or "Stable"
+    """
+    if len(gaps) < 2:  # Needs at least 3 visits
+        return "Stable"
+
+    mid_point = len(gaps) // 2
+
+    first_half_avg = sum(gaps[:mid_point]) / mid_point
+    second_half_avg = sum(gaps[mid_point:]) / len(gaps[mid_point:])
+
+    if second_half_avg < first_half_avg * 0.8:  # Coming more frequently
+        return "Increasing"
+    if second_half_avg > first_half_avg * 1.2:  # Coming less frequently
+        return "Decreasing"
+    return "Stable"
+
+
+def classify_customer(
+    total_visits,
+    days_since_last_visit,
+    total_spend,
+    avg_days_between_visits,
+    thresholds=SEGMENT_THRESHOLDS,
+):
     """
     Segment customers based on their behavior patterns.
 
@@ -136,82 +237,217 @@ def classify_customer(total_visits, days_since_last_visit, total_spend, avg_days
     - Needs Attention: Infrequent or low spend
     - Lost: Hasn't visited in 60+ days
     """
-
-    # Thresholds (adjust based on your business)
-    HIGH_SPEND = 300  # Total lifetime spend
-    FREQUENT_VISITS = 5  # Number of visits
-    REGULAR_FREQUENCY = 28  # Days between visits
-    AT_RISK_DAYS = 45  # Days since last visit
-    LOST_DAYS = 60
+    t = thresholds
 
     # Lost customers (hasn't visited in 60+ days)
-    if days_since_last_visit > LOST_DAYS:
+    if days_since_last_visit > t.lost_days:
         return "Lost"
 
     # VIP: High spend + recent activity
-    if total_spend >= HIGH_SPEND and days_since_last_visit <= REGULAR_FREQUENCY:
+    if total_spend >= t.high_spend and days_since_last_visit <= t.regular_frequency:
         return "VIP"
 
     # Champion: Very frequent visits + loyal + recent
     if (
-        total_visits >= FREQUENT_VISITS
-        and avg_days_between_visits <= REGULAR_FREQUENCY
-        and days_since_last_visit <= REGULAR_FREQUENCY
+        total_visits >= t.frequent_visits
+        and avg_days_between_visits <= t.regular_frequency
+        and days_since_last_visit <= t.regular_frequency
     ):
         return "Champion"
 
     # At-Risk: Was good but overdue for visit
     if (
-        total_visits >= FREQUENT_VISITS or total_spend >= HIGH_SPEND
-    ) and days_since_last_visit > AT_RISK_DAYS:
+        total_visits >= t.frequent_visits or total_spend >= t.high_spend
+    ) and days_since_last_visit > t.at_risk_days:
         return "At-Risk"
 
     # Loyal: Consistent visits
-    if total_visits >= FREQUENT_VISITS and avg_days_between_visits <= REGULAR_FREQUENCY * 1.5:
+    if total_visits >= t.frequent_visits and avg_days_between_visits <= t.regular_frequency * 1.5:
         return "Loyal"
 
     # Promising: New customer (1-3 visits) but recent
-    if total_visits <= 3 and days_since_last_visit <= REGULAR_FREQUENCY:
+    if total_visits <= t.new_customer_visits and days_since_last_visit <= t.regular_frequency:
         return "Promising"
 
     # Default: Needs Attention
     return "Needs Attention"
 
 
-def get_favorite_services(appointments):
-    """Get the top 2 most frequent services for a customer."""
-    service_counts = defaultdict(int)
-    for appt in appointments:
-        service_counts[appt.service.name] += 1
+def classify_customers(
+    total_visits,
+    days_since_last_visit,
+    total_spend,
+    avg_days_between_visits,
+    thresholds=SEGMENT_THRESHOLDS,
+):
+    """
+    Vectorized classify_customer(): segment every customer in one pass.
+
+    Takes arrays of the classify_customer() arguments and applies the same
+    rules in the same order, the first matching rule winning.
+
+    Returns:
+        numpy array of segment names
+    """
+    t = thresholds
+    recent = days_since_last_visit <= t.regular_frequency
+    frequent = total_visits >= t.frequent_visits
+    high_spend = total_spend >= t.high_spend
+    return np.select(
+        [
+            days_since_last_visit > t.lost_days,
+            high_spend & recent,
+            frequent & (avg_days_between_visits <= t.regular_frequency) & recent,
+            (frequent | high_spend) & (days_since_last_visit > t.at_risk_days),
+            frequent & (avg_days_between_visits <= t.regular_frequency * 1.5),
+            (total_visits <= t.new_customer_visits) & recent,
+        ],
+        ["Lost", "VIP", "Champion", "At-Risk", "Loyal", "Promising"],
+        default="Needs Attention",
+    ).astype(object)
+
+
+def segment_case(now, thresholds=SEGMENT_THRESHOLDS):
+    """
+    classify_customer() as a SQL CASE expression over customer_stats.
 
-    # Sort by frequency
-    sorted_services = sorted(service_counts.items(), key=lambda x: x[1], reverse=True)
+    Day counts are whole days like timedelta.days, so "at most N days since"
+    becomes a comparison of the stored visit time with now minus N + 1 days,
+    exact to the microsecond. The average gap is compared as gap_sum against
+    the threshold times the number of gaps, or as days since the first visit
+    for a single visit, as in the Python rules.
 
-    # Return top 2 services
-    return [s[0] for s in sorted_services[:2]]
+    Args:
+        now: Reference time for the time-relative rules
+        thresholds: Segmentation thresholds
+
+    Returns:
+        SQL expression evaluating to the segment name
+    """
+    t = thresholds
+    stats = CustomerStats
+    recent = _within_days(stats.last_visit, t.regular_frequency, now)
+    frequent = stats.visit_count >= t.frequent_visits
+    high_spend = stats.total_revenue + stats.total_tips >= t.high_spend
+    return case(
+        (~_within_days(stats.last_visit, t.lost_days, now), "Lost"),
+        (and_(high_spend, recent), "VIP"),
+        (and_(frequent, _average_gap_within(t.regular_frequency, now), recent), "Champion"),
+        (
+            and_(or_(frequent, high_spend), ~_within_days(stats.last_visit, t.at_risk_days, now)),
+            "At-Risk",
+        ),
+        (and_(frequent, _average_gap_within(t.regular_frequency * 1.5, now)), "Loyal"),
+        (and_(stats.visit_count <= t.new_customer_visits, recent), "Promising"),
+        else_="Needs Attention",
+    )
+
+
+def _within_days(column, days, now):
+    """SQL for (now - column).days <= days."""
+    return column > now - timedelta(days=math.floor(days) + 1)
+
+
+def _average_gap_within(days, now):
+    """SQL for avg_days_between_visits <= days."""
+    return case(
+        (
+            CustomerStats.visit_count > 1,
+            CustomerStats.gap_sum <= days * (CustomerStats.visit_count - 1),
+        ),
+        else_=_within_days(CustomerStats.first_visit, days, now),
+    )
+
+
+def count_customers_by_segment(thresholds=SEGMENT_THRESHOLDS) -> Dict[str, int]:
+    """
+    Count the customers of every segment in one grouped query.
+
+    Returns:
+        dict: Segment name to number of customers, for segments with any
+    """
+    with app_context():
+        segment = segment_case(datetime.now(), thresholds)
+        rows = db.session.execute(select(segment, func.count()).group_by(segment)).all()
+        return dict(rows)
+
+
+def get_favorite_services(appointments):
+    """
+    Get the top 2 most frequent services for a customer.
+
+    Loads each appointment's service; use get_customer_favorites() for many customers.
+    """
+    return _most_frequent([appt.service.name for appt in appointments], limit=2)
 
 
 def get_favorite_technician(appointments):
     """Get the technician the customer visits most often."""
-    tech_counts = defaultdict(int)
-    for appt in appointments:
-        tech_counts[appt.technician.name] += 1
+    return _favorite([appt.technician.name for appt in appointments])
+
 
-    if not tech_counts:
-        return "None"
+def get_customer_favorites(customer_ids=None) -> Dict[int, Dict]:
+    """
+    Favorite services and technician of many customers in one query.
 
-    # Return most frequent technician
-    return max(tech_counts.items(), key=lambda x: x[1])[0]
+    The favourites are ranked when visits are written and kept in
+    customer_stats, so this reads them rather than recounting the ledger.
+    Names rank by most visits; a tie goes to the name the customer visited
+    first (visits at the same time in the order they were recorded), like
+    get_favorite_services() and Counter.most_common() over the visit history.
+    Same-named services or technicians count together.
 
+    Args:
+        customer_ids: Only these customers (default: everyone with visits)
 
-def get_segment_summary():
+    Returns:
+        dict: customer_id -> {"favorite_services": up to 2 names,
+        "favorite_technician": name}; customers without visits are absent
+    """
+    with app_context():
+        query = select(
+            CustomerStats.customer_id,
+            CustomerStats.favorite_service,
+            CustomerStats.second_favorite_service,
+            CustomerStats.favorite_technician,
+        )
+        if customer_ids is not None:
+            query = query.where(CustomerStats.customer_id.in_(list(customer_ids)))
+        rows = db.session.execute(query).all()
+
+    return {
+        customer_id: {
+            "favorite_services": [name for name in (first, second) if name is not None],
+            "favorite_technician": technician,
+        }
+        for customer_id, first, second, technician in rows
+    }
+
+
+def _most_frequent(names, limit):
+    """Most frequent names first; ties go to the name seen first."""
+    return [name for name, _ in Counter(names).most_common(limit)]
+
+
+def _favorite(names):
+    """The single most frequent name, or "None" when there are no names."""
+    top = _most_frequent(names, limit=1)
+    return top[0] if top else "None"
+
+
+def get_segment_summary(customers=None):
     """
     Get summary statistics for each customer segment.
 
+    Args:
+        customers: Output of calculate_customer_ltv() to summarize
+            (calculated when omitted)
+
     Returns:
         dict: Segment names with counts and total revenue
     """
-    customers = calculate_customer_ltv()
+    if customers is None:
+        customers = calculate_customer_ltv()
 
     segment_stats = defaultdict(lambda: {"count": 0, "total_revenue": 0, "avg_spend": 0})
 
@@ -229,21 +465,91 @@ def get_segment_summary():
     return dict(segment_stats)
 
 
+def get_ltv_snapshot(customers=None):
+    """
+    Calculate customer LTV once and derive every summary from that one result.
+
+    Args:
+        customers: Output of calculate_customer_ltv() to summarize
+            (calculated when omitted)
+
+    Returns:
+        dict: The customer list plus segment summary, chart arrays and headline counts
+    """
+    if customers is None:
+        customers = calculate_customer_ltv()
+
+    segment_summary = get_segment_summary(customers)
+
+    # Data for the segment charts
+    segment_labels = list(segment_summary.keys())
+
+    total_customers = len(customers)
+    total_ltv = sum(c["total_spend"] for c in customers)
+
+    return {
+        "customers": customers,
+        "segment_summary": segment_summary,
+        "segment_labels": segment_labels,
+        "segment_counts": [segment_summary[s]["count"] for s in segment_labels],
+        "segment_revenue": [segment_summary[s]["total_revenue"] for s in segment_labels],
+        "total_customers": total_customers,
+        "total_ltv": total_ltv,
+        "avg_ltv": total_ltv / total_customers if total_customers > 0 else 0,
+        "at_risk_count": segment_summary.get("At-Risk", {}).get("count", 0),
+        "vip_count": segment_summary.get("VIP", {}).get("count", 0),
+    }
+
+
+def get_at_risk_customers(days=RETENTION_ALERT_DAYS):
+    """
+    Find customers whose most recent visit is more than `days` days ago.
+
+    Reads last_visit from customer_stats through its index, so the cost
+    follows the number of lapsed customers rather than the size of the ledger.
+
+    Args:
+        days: Days without a visit before a customer is flagged
+
+    Returns:
+        list of dicts: Name, phone and days missed, longest absence first
+    """
+    with app_context():
+        now = datetime.now()
+
+        rows = (
+            db.session.query(Customer.first_name, Customer.phone, CustomerStats.last_visit)
+            .join(Customer, Customer.id == CustomerStats.customer_id)
+            .filter(CustomerStats.last_visit < now - timedelta(days=days))
+            .order_by(CustomerStats.last_visit.asc(), CustomerStats.customer_id)
+            .all()
+        )
+
+        return [
+            {
+                "name": row.first_name,
+                "phone": row.phone,
+                "days_missed": (now - row.last_visit).days,
+            }
+            for row in rows
+        ]
+
+
 # CLI Tool for quick analysis
 if __name__ == "__main__":
     print("\n" + "=" * 60)
     print("💎 CUSTOMER LIFETIME VALUE ANALYSIS")
     print("=" * 60)
 
-    customers = calculate_customer_ltv()
+    snapshot = get_ltv_snapshot()
+    customers = snapshot["customers"]
 
     # Print segment summary
     print("\n📊 CUSTOMER SEGMENTS")
     print("-" * 60)
-    segment_summary = get_segment_summary()
+    segment_summary = snapshot["segment_summary"]
 
-    segment_order = ["VIP", "Champion", "Loyal", "Promising", "At-Risk", "Needs Attention", "Lost"]
-    for segment in segment_order:
+    for segment in SEGMENTS:
         if segment in segment_summary:
             stats = segment_summary[segment]
             revenue = stats["total_revenue"]
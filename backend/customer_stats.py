@@ -0,0 +1,469 @@
+"""
+Per-customer running totals of the ledger, maintained on every write.
+
+The customer_stats table keeps, for every customer with at least one visit,
+the visit count, revenue and tip totals, first and last visit, the sum of the
+whole-day gaps between visits, the part of that sum visit_trend compares
+against (first_half_gap_sum) with the gaps still waiting to move into it,
+and visit counts per service and technician name along with the favourites
+they give. Everything relative to the current time is derived when the stats
+are read, so a new appointment only has to fold one visit into one row.
+
+Appointments later than a customer's last visit are folded in directly;
+anything else (back-dated inserts, updates, deletes) recomputes the affected
+customers from the ledger. ORM writes are picked up by the session hook at
+the bottom of this module, bulk loaders call apply_appointments() after
+inserting, and rebuild_customer_stats() recomputes the whole table from the
+ledger or from column arrays a loader already holds. Service and
+technician names are stored as they were when counted, so rebuild after
+renaming one.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+from sqlalchemy import String, delete, event, literal, select, type_coerce, union_all
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from backend.ltv_kernel import customer_aggregates
+from backend.models import (
+    Appointment,
+    CustomerStats,
+    Service,
+    Technician,
+    app_context,
+    bump_ledger_version,
+    db,
+)
+
+# Rows fetched per round trip, and turned into columns, while streaming the ledger
+LEDGER_BATCH_SIZE = 20_000
+
+# Stats rows written per executemany by rebuild_customer_stats()
+WRITE_BATCH_SIZE = 10_000
+
+# Appointment attributes that feed the stats
+TRACKED_FIELDS = (
+    "customer_id",
+    "date_time",
+    "technician_id",
+    "service_id",
+    "price_charged",
+    "tip_amount",
+)
+
+
+def empty_stats(customer_id: int) -> Dict:
+    """Stats of a customer without visits, ready for add_visit()."""
+    return {
+        "customer_id": customer_id,
+        "visit_count": 0,
+        "total_revenue": 0.0,
+        "total_tips": 0.0,
+        "first_visit": None,
+        "last_visit": None,
+        "gap_sum": 0,
+        "first_half_gap_sum": 0,
+        "second_half_gaps": [],
+        "service_counts": {},
+        "technician_counts": {},
+        "favorite_service": None,
+        "second_favorite_service": None,
+        "favorite_technician": None,
+    }
+
+
+def add_visit(stats: Dict, date_time, price: float, tip: float, service: str, technician: str):
+    """
+    Fold one visit into a customer's stats, in place.
+
+    The visit must not be earlier than stats["last_visit"]; visits at the
+    same time count in the order they are added.
+
+    Args:
+        stats: Stats as returned by empty_stats() or read from customer_stats
+        date_time: When the visit took place
+        price: Price charged
+        tip: Tip amount (None counts as 0)
+        service: Service name
+        technician: Technician name
+    """
+    visit_index = stats["visit_count"]
+    if visit_index:
+        gap = (date_time - stats["last_visit"]).days
+        stats["gap_sum"] += gap
+        stats["second_half_gaps"].append(gap)
+        # visit_trend splits the gaps at n // 2; when that moves, the oldest
+        # gap of the second half joins the first
+        gaps = visit_index
+        if gaps // 2 > (gaps - 1) // 2:
+            stats["first_half_gap_sum"] += stats["second_half_gaps"].pop(0)
+    else:
+        stats["first_visit"] = date_time
+
+    stats["last_visit"] = date_time
+    stats["visit_count"] += 1
+    stats["total_revenue"] += price
+    stats["total_tips"] += tip or 0
+    for key, name in (("service_counts", service), ("technician_counts", technician)):
+        # name -> [visits, index of the first visit], the index breaking ties
+        entry = stats[key].setdefault(name, [0, visit_index])
+        entry[0] += 1
+    _set_favorites(stats)
+
+
+def favorites(counts: Mapping[str, List[int]], limit: int) -> List[str]:
+    """
+    Most visited names of a service_counts or technician_counts mapping.
+
+    Ties go to the name visited first, as with Counter.most_common().
+    """
+    ranked = sorted(counts.items(), key=lambda item: (-item[1][0], item[1][1]))
+    return [name for name, _ in ranked[:limit]]
+
+
+def _set_favorites(stats: Dict) -> None:
+    """Store the favourites of the visit counts, so reads need not rank them."""
+    services = favorites(stats["service_counts"], limit=2) + [None, None]
+    stats["favorite_service"], stats["second_favorite_service"] = services[:2]
+    stats["favorite_technician"] = (favorites(stats["technician_counts"], limit=1) or [None])[0]
+
+
+def apply_appointments(rows: Iterable[Mapping], connection=None) -> None:
+    """
+    Fold newly inserted appointments into the stats of their customers.
+
+    Call after the rows are written: customers with a new appointment earlier
+    than their last recorded visit are recomputed from the ledger.
+
+    Args:
+        rows: Appointment values as mappings with the TRACKED_FIELDS keys
+        connection: Connection to write on (default: the current session's)
+    """
+    connection = connection or db.session.connection()
+    visits = defaultdict(list)
+    for row in rows:
+        visits[row["customer_id"]].append(row)
+    if not visits:
+        return
+
+    services, technicians = _names(
+        connection,
+        {row["service_id"] for rows in visits.values() for row in rows},
+        {row["technician_id"] for rows in visits.values() for row in rows},
+    )
+    current = {
+        row["customer_id"]: dict(row)
+        for row in connection.execute(
+            select(CustomerStats.__table__).where(CustomerStats.customer_id.in_(list(visits)))
+        ).mappings()
+    }
+
+    updated = []
+    stale = []
+    for customer_id, new_rows in visits.items():
+        new_rows.sort(key=lambda row: row["date_time"])  # Stable: equal times keep their order
+        stats = current.get(customer_id)
+        if stats is None:
+            stats = empty_stats(customer_id)
+        elif new_rows[0]["date_time"] < stats["last_visit"]:
+            stale.append(customer_id)
+            continue
+        for row in new_rows:
+            add_visit(
+                stats,
+                row["date_time"],
+                row["price_charged"],
+                row["tip_amount"],
+                services[row["service_id"]],
+                technicians[row["technician_id"]],
+            )
+        updated.append(stats)
+
+    _upsert(updated, connection)
+    refresh_customers(stale, connection)
+
+
+def refresh_customers(customer_ids: Iterable[int], connection=None) -> None:
+    """
+    Recompute the stats of some customers from the ledger.
+
+    Customers without appointments lose their stats row.
+
+    Args:
+        customer_ids: Customers to recompute
+        connection: Connection to write on (default: the current session's)
+    """
+    customer_ids = sorted(set(customer_ids))
+    if not customer_ids:
+        return
+
+    connection = connection or db.session.connection()
+    ledger = connection.execute(
+        select(
+            Appointment.customer_id,
+            Appointment.date_time,
+            Appointment.price_charged,
+            Appointment.tip_amount,
+            Service.name,
+            Technician.name,
+        )
+        .join(Service, Service.id == Appointment.service_id)
+        .join(Technician, Technician.id == Appointment.technician_id)
+        .where(Appointment.customer_id.in_(customer_ids))
+        .order_by(Appointment.customer_id, Appointment.date_time, Appointment.id)
+    )
+    recomputed = {}
+    for customer_id, date_time, price, tip, service, technician in ledger:
+        stats = recomputed.setdefault(customer_id, empty_stats(customer_id))
+        add_visit(stats, date_time, price, tip, service, technician)
+
+    table = CustomerStats.__table__
+    connection.execute(delete(table).where(table.c.customer_id.in_(customer_ids)))
+    if recomputed:
+        connection.execute(insert(table), list(recomputed.values()))
+
+
+def rebuild_customer_stats(ledger: Optional[Mapping[str, np.ndarray]] = None) -> int:
+    """
+    Recompute the whole customer_stats table from the appointment ledger.
+
+    The ledger is read in one ordered scan and reduced by the ltv_kernel, so
+    no Python code runs per appointment.
+
+    Args:
+        ledger: The whole ledger as equally long arrays keyed by TRACKED_FIELDS
+            in id order, date_time as datetime64; a loader that holds them
+            passes them to skip reading the table back (default: scan the
+            appointment table)
+
+    Returns:
+        Number of stats rows written
+    """
+    with app_context():
+        connection = db.session.connection()
+        if ledger is None:
+            columns = _load_ledger_columns(
+                connection.execute(
+                    select(
+                        Appointment.customer_id,
+                        # The raw stored text parses straight into datetime64
+                        type_coerce(Appointment.date_time, String),
+                        Appointment.price_charged,
+                        Appointment.tip_amount,
+                        Appointment.service_id,
+                        Appointment.technician_id,
+                    )
+                    .order_by(Appointment.customer_id, Appointment.date_time, Appointment.id)
+                    .execution_options(yield_per=LEDGER_BATCH_SIZE)
+                )
+            )
+        else:
+            columns = _sorted_ledger_columns(ledger)
+        services, technicians = _names(connection)
+        rows = _stats_rows(columns, services, technicians)
+
+        bump_ledger_version()
+        connection.execute(delete(CustomerStats))
+        for offset in range(0, len(rows), WRITE_BATCH_SIZE):
+            connection.execute(insert(CustomerStats), rows[offset : offset + WRITE_BATCH_SIZE])
+        db.session.commit()
+        return len(rows)
+
+
+def _load_ledger_columns(ledger) -> Dict[str, np.ndarray]:
+    """Turn the ordered ledger rows into numpy columns, one batch at a time."""
+    batches = defaultdict(list)
+    for rows in ledger.partitions():
+        customer_id, date_time, price, tip, service_id, technician_id = zip(*rows)
+        batches["customer_id"].append(np.array(customer_id, dtype=np.int64))
+        batches["timestamp"].append(np.array(date_time, dtype="datetime64[us]"))
+        batches["price"].append(np.array(price, dtype=float))
+        batches["tip"].append(np.array([value or 0 for value in tip], dtype=float))
+        batches["service_id"].append(np.array(service_id, dtype=np.int64))
+        batches["technician_id"].append(np.array(technician_id, dtype=np.int64))
+
+    return {
+        name: np.concatenate(batches[name]) if batches[name] else np.zeros(0, dtype=dtype)
+        for name, dtype in (
+            ("customer_id", np.int64),
+            ("timestamp", "datetime64[us]"),
+            ("price", float),
+            ("tip", float),
+            ("service_id", np.int64),
+            ("technician_id", np.int64),
+        )
+    }
+
+
+def _sorted_ledger_columns(ledger: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """The columns _load_ledger_columns() returns, from appointment arrays in id order."""
+    # lexsort is stable, so visits at the same time keep their id order
+    order = np.lexsort((ledger["date_time"], ledger["customer_id"]))
+    return {
+        "customer_id": ledger["customer_id"][order].astype(np.int64),
+        "timestamp": ledger["date_time"][order].astype("datetime64[us]"),
+        "price": ledger["price_charged"][order].astype(float),
+        "tip": ledger["tip_amount"][order].astype(float),
+        "service_id": ledger["service_id"][order].astype(np.int64),
+        "technician_id": ledger["technician_id"][order].astype(np.int64),
+    }
+
+
+def _stats_rows(columns, services, technicians) -> List[Dict]:
+    """Build the customer_stats rows of ledger columns sorted by customer, then time."""
+    totals = customer_aggregates(
+        columns["customer_id"], columns["timestamp"], columns["price"], columns["tip"]
+    )
+    starts = totals["first_row"]
+    visits = totals["total_visits"]
+
+    # Gaps from position 1 + (visits - 1) // 2 of every run on are the second half
+    run = np.repeat(np.arange(len(starts)), visits)
+    position = np.arange(len(run)) - starts[run]
+    second_half = position >= 1 + (visits[run] - 1) // 2
+    lengths = np.bincount(run[second_half], minlength=len(starts))
+    gaps = np.split(totals["gap"][second_half], np.cumsum(lengths)[:-1])
+
+    service_counts = _name_counts(run, position, columns["service_id"], services, len(starts))
+    technician_counts = _name_counts(
+        run, position, columns["technician_id"], technicians, len(starts)
+    )
+
+    lists = {
+        name: totals[name].tolist()
+        for name in (
+            "customer_id",
+            "total_visits",
+            "total_revenue",
+            "total_tips",
+            "gap_sum",
+            "first_half_gap_sum",
+        )
+    }
+    first_visit = totals["first_visit"].astype(object).tolist()
+    last_visit = totals["last_visit"].astype(object).tolist()
+    rows = [
+        {
+            "customer_id": customer_id,
+            "visit_count": lists["total_visits"][i],
+            "total_revenue": lists["total_revenue"][i],
+            "total_tips": lists["total_tips"][i],
+            "first_visit": first_visit[i],
+            "last_visit": last_visit[i],
+            "gap_sum": lists["gap_sum"][i],
+            "first_half_gap_sum": lists["first_half_gap_sum"][i],
+            "second_half_gaps": gaps[i].tolist(),
+            "service_counts": service_counts[i],
+            "technician_counts": technician_counts[i],
+        }
+        for i, customer_id in enumerate(lists["customer_id"])
+    ]
+    for row in rows:
+        _set_favorites(row)
+    return rows
+
+
+def _name_counts(run, position, ids, names_by_id, runs) -> List[Dict]:
+    """
+    Visits and first visit index per name for every run.
+
+    Rows are counted by name rather than id, so same-named rows count together.
+    """
+    counts = [{} for _ in range(runs)]
+    if len(ids) == 0:
+        return counts
+
+    names = list(dict.fromkeys(names_by_id.values()))
+    code_of_name = {name: code for code, name in enumerate(names)}
+    lookup = np.zeros(max(names_by_id, default=0) + 1, dtype=np.int64)
+    for row_id, name in names_by_id.items():
+        lookup[row_id] = code_of_name[name]
+
+    # Rows are in time order within a run, so the first row of a pair is its first visit
+    keys = run * len(names) + lookup[ids]
+    pairs, first_row, visits = np.unique(keys, return_index=True, return_counts=True)
+    order = np.argsort(first_row, kind="stable")  # Insert names in first-visit order
+    for key, first, count in zip(
+        pairs[order].tolist(), position[first_row[order]].tolist(), visits[order].tolist()
+    ):
+        counts[key // len(names)][names[key % len(names)]] = [count, first]
+    return counts
+
+
+def _names(connection, service_ids=None, technician_ids=None):
+    """
+    Names of services and technicians, by id, in one query.
+
+    Returns:
+        (services, technicians): dicts of id to name, limited to the given ids
+    """
+    services = select(literal("service"), Service.id, Service.name)
+    technicians = select(literal("technician"), Technician.id, Technician.name)
+    if service_ids is not None:
+        services = services.where(Service.id.in_(list(service_ids)))
+    if technician_ids is not None:
+        technicians = technicians.where(Technician.id.in_(list(technician_ids)))
+
+    names = {"service": {}, "technician": {}}
+    for kind, row_id, name in connection.execute(union_all(services, technicians)):
+        names[kind][row_id] = name
+    return names["service"], names["technician"]
+
+
+def _upsert(rows: List[Dict], connection) -> None:
+    """Write whole stats rows, replacing any existing row of the same customer."""
+    if not rows:
+        return
+    table = CustomerStats.__table__
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.customer_id],
+        set_={
+            column.name: stmt.excluded[column.name]
+            for column in table.columns
+            if not column.primary_key
+        },
+    )
+    connection.execute(stmt, rows)
+
+
+def _current_values(appointment) -> Dict:
+    values = {field: getattr(appointment, field) for field in TRACKED_FIELDS}
+    # Ids may still be the strings a form submitted
+    for field in ("customer_id", "technician_id", "service_id"):
+        values[field] = int(values[field])
+    return values
+
+
+def _previous_customer(appointment) -> int:
+    history = get_history(appointment, "customer_id")
+    return int(history.deleted[0] if history.deleted else appointment.customer_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_customer_stats(session, flush_context):
+    """Mirror ORM inserts, updates and deletes of appointments into the stats."""
+    new = [obj for obj in session.new if isinstance(obj, Appointment)]
+    stale = set()
+
+    for obj in session.deleted:
+        if isinstance(obj, Appointment):
+            stale.add(_previous_customer(obj))
+
+    for obj in session.dirty:
+        if isinstance(obj, Appointment) and any(
+            get_history(obj, field).has_changes() for field in TRACKED_FIELDS
+        ):
+            stale.update((_previous_customer(obj), int(obj.customer_id)))
+
+    if not new and not stale:
+        return
+
+    connection = session.connection()
+    values = (_current_values(obj) for obj in new)
+    apply_appointments([row for row in values if row["customer_id"] not in stale], connection)
+    refresh_customers(stale, connection)
@@ -0,0 +1,239 @@
+"""
+Streaming CSV exports of the customer LTV metrics and the appointment ledger.
+
+Rows are read through a server-side cursor in fixed-size batches and written
+to CSV one batch at a time, so memory use depends on the batch size, not on
+the size of the ledger. The web views return the generators as streamed
+responses; scripts/export_csv.py writes them to a file.
+
+Both exports take the same filters: a date range and a technician. The
+appointment export keeps the matching appointments; the customer export keeps
+customers with at least one matching appointment and reports their lifetime
+metrics. Appointment rows use the importer's column names, so an export can
+be imported again.
+"""
+
+import csv
+import io
+from datetime import datetime, time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from flask import Blueprint, Response, abort, request, stream_with_context
+from sqlalchemy import select
+
+from backend.customer_analytics import customer_metrics, ltv_query
+from backend.models import (
+    Appointment,
+    Customer,
+    CustomerStats,
+    Service,
+    Technician,
+    app,
+    app_context,
+    db,
+)
+
+# Rows fetched per round trip and written per CSV chunk
+EXPORT_BATCH_SIZE = 5000
+
+APPOINTMENT_FIELDS = (
+    "id",
+    "date_time",
+    "customer_name",
+    "customer_phone",
+    "technician",
+    "service",
+    "price",
+    "tip",
+    "payment_method",
+)
+
+CUSTOMER_FIELDS = (
+    "customer_id",
+    "name",
+    "phone",
+    "segment",
+    "total_visits",
+    "first_visit",
+    "last_visit",
+    "days_as_customer",
+    "days_since_last_visit",
+    "avg_days_between_visits",
+    "visit_trend",
+    "total_spend",
+    "total_revenue",
+    "total_tips",
+    "avg_transaction_value",
+    "avg_tip_percentage",
+    "predicted_ltv_12mo",
+    "favorite_services",
+    "favorite_technician",
+)
+
+export_bp = Blueprint("exports", __name__)
+
+
+def parse_filters(
+    start: Optional[str] = None, end: Optional[str] = None, technician_id: Optional[str] = None
+) -> Dict:
+    """
+    Turn export filter strings into export_*() keyword arguments.
+
+    Args:
+        start: First day to include, YYYY-MM-DD
+        end: Last day to include, YYYY-MM-DD
+        technician_id: Only include this technician's appointments
+
+    Returns:
+        Dict with start_date, end_date and technician_id (None when not given)
+
+    Raises:
+        ValueError: If a date or the technician id is malformed
+    """
+    start_date = end_date = None
+    if start:
+        start_date = datetime.combine(datetime.strptime(start, "%Y-%m-%d").date(), time.min)
+    if end:
+        end_date = datetime.combine(datetime.strptime(end, "%Y-%m-%d").date(), time.max)
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "technician_id": int(technician_id) if technician_id not in (None, "", "all") else None,
+    }
+
+
+def export_appointments(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    technician_id: Optional[int] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[str]:
+    """
+    Stream the appointment ledger as CSV, oldest first.
+
+    Args:
+        start_date: Start of the range, inclusive (default: unbounded)
+        end_date: End of the range, inclusive (default: unbounded)
+        technician_id: Only include this technician's appointments
+        batch_size: Rows fetched and written per chunk
+
+    Yields:
+        CSV text: the header, then one chunk per batch of rows
+    """
+    with app_context():
+        rows = db.session.connection().execute(
+            select(
+                Appointment.id,
+                Appointment.date_time,
+                Customer.first_name,
+                Customer.phone,
+                Technician.name,
+                Service.name,
+                Appointment.price_charged,
+                Appointment.tip_amount,
+                Appointment.payment_method,
+            )
+            .join(Customer, Customer.id == Appointment.customer_id)
+            .join(Technician, Technician.id == Appointment.technician_id)
+            .join(Service, Service.id == Appointment.service_id)
+            .where(*_appointment_filters(start_date, end_date, technician_id))
+            .order_by(Appointment.date_time, Appointment.id)
+            .execution_options(yield_per=batch_size)
+        )
+        yield from _csv_chunks(APPOINTMENT_FIELDS, rows.partitions())
+
+
+def export_customers(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    technician_id: Optional[int] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[str]:
+    """
+    Stream the LTV metrics of calculate_customer_ltv() as CSV, by customer id.
+
+    Args:
+        start_date: Only customers with a visit at or after this time
+        end_date: Only customers with a visit at or before this time
+        technician_id: Only customers with a visit to this technician
+        batch_size: Customers fetched and written per chunk
+
+    Yields:
+        CSV text: the header, then one chunk per batch of customers
+    """
+    now = datetime.now()
+    with app_context():
+        query = ltv_query()
+        conditions = _appointment_filters(start_date, end_date, technician_id)
+        if conditions:
+            query = query.where(
+                select(Appointment.id)
+                .where(Appointment.customer_id == CustomerStats.customer_id, *conditions)
+                .exists()
+            )
+        rows = db.session.connection().execute(query.execution_options(yield_per=batch_size))
+        batches = (
+            [_customer_row(customer) for customer in customer_metrics(batch, now)]
+            for batch in rows.partitions()
+        )
+        yield from _csv_chunks(CUSTOMER_FIELDS, batches)
+
+
+EXPORTS = {"customers": export_customers, "appointments": export_appointments}
+
+
+def _appointment_filters(start_date, end_date, technician_id) -> List:
+    conditions = []
+    if start_date is not None:
+        conditions.append(Appointment.date_time >= start_date)
+    if end_date is not None:
+        conditions.append(Appointment.date_time <= end_date)
+    if technician_id is not None:
+        conditions.append(Appointment.technician_id == technician_id)
+    return conditions
+
+
+def _customer_row(customer: Dict) -> List:
+    row = [customer[field] for field in CUSTOMER_FIELDS]
+    row[CUSTOMER_FIELDS.index("favorite_services")] = "; ".join(customer["favorite_services"])
+    return row
+
+
+def _csv_chunks(header: Iterable[str], batches: Iterable[Iterable]) -> Iterator[str]:
+    """Write the header and every batch of rows as CSV, one string per batch."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    yield buffer.getvalue()
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+
+@export_bp.route("/export/<name>.csv")
+def export_csv(name):
+    """
+    Stream an export as a CSV download.
+
+    Filters: ?start=YYYY-MM-DD&end=YYYY-MM-DD&tech_id=<id>, all optional.
+    """
+    if name not in EXPORTS:
+        abort(404)
+    try:
+        filters = parse_filters(
+            request.args.get("start"), request.args.get("end"), request.args.get("tech_id")
+        )
+    except ValueError:
+        abort(400, "Dates must be YYYY-MM-DD and tech_id a technician id")
+
+    return Response(
+        stream_with_context(EXPORTS[name](**filters)),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{name}.csv"'},
+    )
+
+
+# Register on the default application; create_app() registers on the apps it builds
+app.register_blueprint(export_bp)
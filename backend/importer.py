@@ -0,0 +1,208 @@
+"""
+Streaming bulk import of appointments from CSV or NDJSON exports.
+
+Records are read lazily and written in fixed-size batches. Each batch
+resolves customers by phone (through a lookup cache, creating missing ones),
+inserts its appointments with one executemany and updates the daily revenue
+rollup and the customer stats, then commits. Memory use depends on the batch
+size, not on the size of the file.
+
+Each record needs: date_time (ISO 8601), customer_phone, technician (id or
+name), service (id or name) and price. customer_name, tip and payment_method
+are optional. technician_id / service_id are accepted as column names too.
+"""
+
+import csv
+import json
+import time
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from sqlalchemy import insert, select
+
+from backend import customer_stats
+from backend.appointment_writes import upsert_customers
+from backend.models import (
+    Appointment,
+    Customer,
+    Service,
+    Technician,
+    app_context,
+    bump_ledger_version,
+    db,
+)
+from backend.rollups import apply_appointments
+
+BATCH_SIZE = 1000
+
+# Phone -> customer id entries kept between batches
+CUSTOMER_CACHE_SIZE = 100_000
+
+
+def read_csv(stream: TextIO) -> Iterator[Dict]:
+    """Yield records from a CSV stream with a header row."""
+    return iter(csv.DictReader(stream))
+
+
+def read_ndjson(stream: TextIO) -> Iterator[Dict]:
+    """Yield records from a newline-delimited JSON stream."""
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+READERS = {"csv": read_csv, "ndjson": read_ndjson}
+
+
+def import_appointments(
+    records: Iterable[Dict],
+    batch_size: int = BATCH_SIZE,
+    progress: Optional[Callable[[Dict], None]] = None,
+) -> Dict:
+    """
+    Import appointment records in batches.
+
+    Args:
+        records: Iterable of record dicts (see module docstring)
+        batch_size: Records written per transaction
+        progress: Called with the running stats after each batch
+
+    Returns:
+        Dict with rows, customers_created, seconds and rows_per_second
+
+    Raises:
+        ValueError: If a record is missing a field or references an unknown
+            technician or service. Batches committed before it are kept.
+    """
+    with app_context():
+        lookups = {
+            "technician": _name_lookup(Technician),
+            "service": _name_lookup(Service),
+        }
+        customer_ids: Dict[str, int] = {}
+        stats = {"rows": 0, "customers_created": 0, "seconds": 0.0, "rows_per_second": 0.0}
+        started = time.perf_counter()
+
+        records = iter(records)
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+
+            try:
+                rows = [
+                    _parse(record, stats["rows"] + i + 1, lookups) for i, record in enumerate(batch)
+                ]
+                stats["customers_created"] += _resolve_customers(rows, customer_ids)
+
+                appointments = [
+                    {
+                        "date_time": row["date_time"],
+                        "customer_id": customer_ids[row["phone"]],
+                        "technician_id": row["technician_id"],
+                        "service_id": row["service_id"],
+                        "price_charged": row["price_charged"],
+                        "tip_amount": row["tip_amount"],
+                        "payment_method": row["payment_method"],
+                    }
+                    for row in rows
+                ]
+                bump_ledger_version()
+                db.session.execute(insert(Appointment), appointments)
+                apply_appointments(appointments)
+                customer_stats.apply_appointments(appointments)
+                db.session.commit()
+            except Exception:
+                # Leave no half-written batch behind, nor ids of customers it created
+                db.session.rollback()
+                customer_ids.clear()
+                raise
+
+            if len(customer_ids) > CUSTOMER_CACHE_SIZE:
+                customer_ids.clear()
+
+            stats["rows"] += len(rows)
+            stats["seconds"] = time.perf_counter() - started
+            stats["rows_per_second"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0
+            if progress:
+                progress(dict(stats))
+
+        return stats
+
+
+def _name_lookup(model) -> Dict[str, int]:
+    """Map both ids and lower-cased names of a small reference table to ids."""
+    lookup = {}
+    for row in db.session.execute(select(model.id, model.name)):
+        lookup[str(row.id)] = row.id
+        lookup[row.name.strip().lower()] = row.id
+    return lookup
+
+
+def _parse(record: Dict, line: int, lookups: Dict[str, Dict[str, int]]) -> Dict:
+    """Validate one record and convert it to column values."""
+    try:
+        phone = str(record["customer_phone"]).strip()
+        parsed = {
+            "date_time": _local_time(datetime.fromisoformat(str(record["date_time"]).strip())),
+            "phone": phone,
+            "name": str(record.get("customer_name") or "").strip() or "Unknown",
+            "price_charged": float(record["price"]),
+            "tip_amount": float(record.get("tip") or 0),
+            "payment_method": record.get("payment_method") or None,
+        }
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ValueError(f"Record {line}: invalid or missing field ({exc})") from exc
+
+    if not phone:
+        raise ValueError(f"Record {line}: missing customer_phone")
+
+    for kind in ("technician", "service"):
+        value = record.get(kind, record.get(f"{kind}_id"))
+        key = str(value).strip().lower() if value is not None else ""
+        if key not in lookups[kind]:
+            raise ValueError(f"Record {line}: unknown {kind} {value!r}")
+        parsed[f"{kind}_id"] = lookups[kind][key]
+
+    return parsed
+
+
+def _local_time(value: datetime) -> datetime:
+    """Convert a timestamp with a UTC offset to naive local time, like the rest of the ledger."""
+    if value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def _resolve_customers(rows: List[Dict], customer_ids: Dict[str, int]) -> int:
+    """
+    Fill customer_ids for every phone in the batch, creating missing customers.
+
+    Returns:
+        Number of customers created
+    """
+    missing = {row["phone"]: row["name"] for row in rows if row["phone"] not in customer_ids}
+    if not missing:
+        return 0
+
+    existing = _customer_ids_for(missing)
+    customer_ids.update(existing)
+
+    new_customers = {phone: name for phone, name in missing.items() if phone not in existing}
+    # The upsert also returns ids of customers a concurrent writer just created
+    customer_ids.update(upsert_customers(new_customers))
+    return len(new_customers)
+
+
+def _customer_ids_for(phones: Iterable[str]) -> Dict[str, int]:
+    phones = list(phones)
+    ids = {}
+    # Stay well below SQLite's bound-parameter limit
+    for start in range(0, len(phones), 500):
+        chunk = phones[start : start + 500]
+        for row in db.session.execute(
+            select(Customer.phone, Customer.id).where(Customer.phone.in_(chunk))
+        ):
+            ids[row.phone] = row.id
+    return ids
@@ -0,0 +1,162 @@
+"""
+Columnar kernel for the customer LTV metrics.
+
+The ledger comes in as parallel numpy arrays sorted by customer, then time.
+Each customer is a contiguous run of rows, so the per-customer totals kept in
+customer_stats are reductions over runs: integer sums through cumulative
+sums and float totals by stepping through visit positions across all
+customers at once (keeping Python's left-to-right addition so results match
+sum() exactly). derived_metrics() turns those totals into the LTV metrics
+relative to a point in time. No Python code runs per appointment.
+"""
+
+from typing import Dict
+
+import numpy as np
+
+US_PER_DAY = 86_400_000_000
+
+# visit_trend codes
+STABLE, INCREASING, DECREASING = 0, 1, 2
+TRENDS = np.array(["Stable", "Increasing", "Decreasing"], dtype=object)
+
+
+def run_starts(customer_id: np.ndarray) -> np.ndarray:
+    """Index of the first row of every customer's run."""
+    if len(customer_id) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.flatnonzero(np.r_[True, customer_id[1:] != customer_id[:-1]])
+
+
+def sequential_sums(values: np.ndarray, starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """
+    Sum every run left to right, bit-for-bit equal to Python's sum().
+
+    np.add.reduceat sums pairwise, which can differ in the last bit. Here runs
+    are ordered longest first and position k of every run still that long is
+    added in one vectorized step, so the work is one pass over the rows plus
+    one small step per position of the longest run.
+    """
+    order = np.argsort(-counts, kind="stable")
+    ordered_starts = starts[order]
+    ordered_counts = counts[order]
+    totals = np.zeros(len(starts))
+    # Runs still active at position k form a prefix of the ordered runs
+    active = len(starts)
+    for k in range(int(ordered_counts[0]) if len(counts) else 0):
+        while active and ordered_counts[active - 1] <= k:
+            active -= 1
+        totals[:active] += values[ordered_starts[:active] + k]
+    result = np.empty_like(totals)
+    result[order] = totals
+    return result
+
+
+def customer_aggregates(
+    customer_id: np.ndarray,
+    timestamp: np.ndarray,
+    price: np.ndarray,
+    tip: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """
+    Reduce the ledger to the running totals kept per customer.
+
+    Args:
+        customer_id: Customer of every appointment, grouped by customer
+        timestamp: datetime64[us] of every appointment, ascending per customer
+        price: price_charged of every appointment
+        tip: tip_amount of every appointment
+
+    Returns:
+        Dict of per-customer arrays, in customer run order: customer_id,
+        first_row, last_row, total_visits, total_revenue, total_tips,
+        first_visit, last_visit, gap_sum and first_half_gap_sum, plus gap:
+        the whole-day gap before every row (0 on a customer's first row)
+    """
+    micros = timestamp.astype("datetime64[us]").astype(np.int64)
+    starts = run_starts(customer_id)
+    total_visits = np.diff(np.r_[starts, len(customer_id)])
+    ends = starts + total_visits - 1
+
+    # timedelta.days floors, as does integer division
+    gap = np.zeros(len(micros), dtype=np.int64)
+    gap[1:] = (micros[1:] - micros[:-1]) // US_PER_DAY
+    gap[starts] = 0
+    gap_total = np.cumsum(gap)
+    mid = (total_visits - 1) // 2
+
+    return {
+        "customer_id": customer_id[starts],
+        "first_row": starts,
+        "last_row": ends,
+        "total_visits": total_visits,
+        "total_revenue": sequential_sums(price, starts, total_visits),
+        "total_tips": sequential_sums(tip, starts, total_visits),
+        "first_visit": timestamp[starts],
+        "last_visit": timestamp[ends],
+        "gap_sum": gap_total[ends] - gap_total[starts],
+        "first_half_gap_sum": gap_total[starts + mid] - gap_total[starts],
+        "gap": gap,
+    }
+
+
+def derived_metrics(aggregates: Dict[str, np.ndarray], now) -> Dict[str, np.ndarray]:
+    """
+    Compute the LTV metrics that follow from per-customer running totals.
+
+    Args:
+        aggregates: Arrays total_visits, total_revenue, total_tips,
+            first_visit, last_visit (datetime64), gap_sum and first_half_gap_sum
+        now: Reference time for the time-relative fields
+
+    Returns:
+        Dict of per-customer arrays: total_spend, days_as_customer,
+        days_since_last_visit, avg_days_between_visits, visit_trend (TRENDS
+        codes), avg_transaction_value, avg_tip_percentage and predicted_ltv_12mo
+    """
+    now_us = np.datetime64(now, "us").astype(np.int64)
+    total_visits = aggregates["total_visits"]
+    total_revenue = aggregates["total_revenue"]
+    total_tips = aggregates["total_tips"]
+    total_spend = total_revenue + total_tips
+    gap_sum = aggregates["gap_sum"]
+
+    first_us = aggregates["first_visit"].astype("datetime64[us]").astype(np.int64)
+    last_us = aggregates["last_visit"].astype("datetime64[us]").astype(np.int64)
+    days_as_customer = (now_us - first_us) // US_PER_DAY
+    days_since_last_visit = (now_us - last_us) // US_PER_DAY
+
+    n_gaps = total_visits - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_days_between_visits = np.where(
+            n_gaps > 0, gap_sum / np.maximum(n_gaps, 1), days_as_customer
+        ).astype(float)
+
+        # Visit trend: average of the first half of the gaps against the second half
+        mid = n_gaps // 2
+        first_half = aggregates["first_half_gap_sum"] / np.maximum(mid, 1)
+        second_half = (gap_sum - aggregates["first_half_gap_sum"]) / np.maximum(n_gaps - mid, 1)
+        visit_trend = np.select(
+            [n_gaps < 2, second_half < first_half * 0.8, second_half > first_half * 1.2],
+            [STABLE, INCREASING, DECREASING],
+            default=STABLE,
+        )
+
+        avg_transaction_value = total_spend / total_visits
+        avg_tip_percentage = np.where(total_revenue > 0, total_tips / total_revenue * 100, 0)
+        predicted_ltv_12mo = np.where(
+            avg_days_between_visits > 0,
+            365 / avg_days_between_visits * avg_transaction_value,
+            0,
+        )
+
+    return {
+        "total_spend": total_spend,
+        "days_as_customer": days_as_customer,
+        "days_since_last_visit": days_since_last_visit,
+        "avg_days_between_visits": avg_days_between_visits,
+        "visit_trend": visit_trend,
+        "avg_transaction_value": avg_transaction_value,
+        "avg_tip_percentage": avg_tip_percentage,
+        "predicted_ltv_12mo": predicted_ltv_12mo,
+    }
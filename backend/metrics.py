@@ -0,0 +1,259 @@
+"""
+Per-request latency, SQL and template instrumentation exported at /metrics.
+
+Every request is timed from before_request to teardown. SQL statements are
+counted and timed through backend.statement_timing and Jinja rendering
+through Flask's template signals, both attributed to the request in flight.
+Results are kept as per-endpoint histograms and served in the Prometheus text
+format. Each process keeps its own registry, so with several gunicorn workers
+each scrape reports the worker that answered it.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+from flask import (
+    Blueprint,
+    Flask,
+    Response,
+    before_render_template,
+    current_app,
+    g,
+    has_request_context,
+    request,
+    template_rendered,
+)
+
+from backend import statement_timing
+from backend.models import app, db
+
+# Upper bounds of the histogram buckets
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str], buckets: Sequence):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self.series = defaultdict(lambda: [0] * (len(self.buckets) + 1) + [0.0])
+
+    def observe(self, label_values: Tuple, value: float) -> None:
+        counts = self.series[label_values]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        counts[-2] += 1
+        counts[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, counts in sorted(self.series.items()):
+            labels = _format_labels(self.labels, label_values)
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound:g}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {counts[-2]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {counts[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {counts[-2]}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter keyed by a tuple of label values."""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str]):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.series = defaultdict(int)
+
+    def inc(self, label_values: Tuple, amount: int = 1) -> None:
+        self.series[label_values] += amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self.series.items()):
+            lines.append(f"{self.name}{{{_format_labels(self.labels, label_values)}}} {value}")
+        return lines
+
+
+class Registry:
+    """The request metrics of one application."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = Counter(
+            "salon_http_requests_total",
+            "Requests answered, by endpoint, method and status.",
+            ("endpoint", "method", "status"),
+        )
+        self.latency = Histogram(
+            "salon_http_request_duration_seconds",
+            "Wall time from receiving a request to finishing its response.",
+            ("endpoint",),
+            SECONDS_BUCKETS,
+        )
+        self.sql_queries = Histogram(
+            "salon_sql_queries_per_request",
+            "SQL statements executed while handling a request.",
+            ("endpoint",),
+            QUERY_BUCKETS,
+        )
+        self.sql_seconds = Histogram(
+            "salon_sql_duration_seconds",
+            "Time spent executing SQL while handling a request.",
+            ("endpoint",),
+            SECONDS_BUCKETS,
+        )
+        self.template_seconds = Histogram(
+            "salon_template_render_seconds",
+            "Time spent rendering Jinja templates while handling a request.",
+            ("endpoint",),
+            SECONDS_BUCKETS,
+        )
+        self.page_cache = Counter(
+            "salon_page_cache_lookups_total",
+            "Rendered-page cache lookups, by endpoint and result (hit or miss).",
+            ("endpoint", "result"),
+        )
+
+    def record(self, stats: Dict) -> None:
+        """Add one finished request."""
+        endpoint = (stats["endpoint"],)
+        with self.lock:
+            self.requests.inc((stats["endpoint"], stats["method"], str(stats["status"])))
+            self.latency.observe(endpoint, stats["seconds"])
+            self.sql_queries.observe(endpoint, stats["sql_queries"])
+            self.sql_seconds.observe(endpoint, stats["sql_seconds"])
+            self.template_seconds.observe(endpoint, stats["template_seconds"])
+
+    def record_cache_lookup(self, endpoint: str, result: str) -> None:
+        """Add one page cache lookup."""
+        with self.lock:
+            self.page_cache.inc((endpoint, result))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self.lock:
+            lines = []
+            for metric in (
+                self.requests,
+                self.latency,
+                self.sql_queries,
+                self.sql_seconds,
+                self.template_seconds,
+                self.page_cache,
+            ):
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    escaped = (
+        str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for value in values
+    )
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+def _request_stats():
+    """Counters of the request in flight, or None outside a request."""
+    if has_request_context():
+        return g.get("request_metrics")
+    return None
+
+
+def _start_request():
+    g.request_metrics = {
+        "started": time.perf_counter(),
+        "sql_queries": 0,
+        "sql_seconds": 0.0,
+        "template_seconds": 0.0,
+        "status": 500,  # Replaced by after_request unless the view raised
+    }
+
+
+def _note_status(response):
+    stats = _request_stats()
+    if stats is not None:
+        stats["status"] = response.status_code
+    return response
+
+
+def _finish_request(exc):
+    stats = g.pop("request_metrics", None)
+    if stats is None:
+        return
+    stats.update(
+        endpoint=request.endpoint or "unmatched",
+        method=request.method,
+        seconds=time.perf_counter() - stats["started"],
+    )
+    current_app.extensions["salon_metrics"].record(stats)
+
+
+def _record_statement(statement, parameters, executemany, seconds):
+    stats = _request_stats()
+    if stats is not None:
+        stats["sql_queries"] += 1
+        stats["sql_seconds"] += seconds
+
+
+def _before_render(sender, template, context, **extra):
+    stats = _request_stats()
+    if stats is not None:
+        stats.setdefault("render_started", []).append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    stats = _request_stats()
+    if stats is not None and stats.get("render_started"):
+        elapsed = time.perf_counter() - stats["render_started"].pop()
+        # Only the outermost render counts; included templates render inside it
+        if not stats["render_started"]:
+            stats["template_seconds"] += elapsed
+
+
+def init_metrics(flask_app: Flask) -> Flask:
+    """
+    Instrument an application and serve its metrics at /metrics.
+
+    Args:
+        flask_app: Configured application (its engine must exist)
+
+    Returns:
+        The same application
+    """
+    flask_app.extensions["salon_metrics"] = Registry()
+    flask_app.before_request(_start_request)
+    flask_app.after_request(_note_status)
+    flask_app.teardown_request(_finish_request)
+
+    with flask_app.app_context():
+        statement_timing.subscribe(db.engine, _record_statement)
+    before_render_template.connect(_before_render, flask_app)
+    template_rendered.connect(_after_render, flask_app)
+
+    flask_app.register_blueprint(metrics_bp)
+    return flask_app
+
+
+@metrics_bp.route("/metrics")
+def metrics():
+    """Request metrics of this process in the Prometheus text format."""
+    return Response(current_app.extensions["salon_metrics"].render(), content_type=CONTENT_TYPE)
+
+
+# Instrument the default application; create_app() instruments the apps it builds
+init_metrics(app)
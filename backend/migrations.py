@@ -0,0 +1,51 @@
+"""In-place schema upgrades for existing databases."""
+
+from typing import List
+
+from sqlalchemy import inspect
+
+from backend.customer_stats import rebuild_customer_stats
+from backend.models import app_context, db
+from backend.rollups import rebuild_daily_revenue
+
+# Derived tables that must be backfilled from the ledger when first created
+BACKFILLS = {
+    "daily_revenue": rebuild_daily_revenue,
+    "customer_stats": rebuild_customer_stats,
+}
+
+
+def upgrade_schema() -> List[str]:
+    """
+    Bring an existing database up to the current models without dropping data.
+
+    Creates any missing tables and any missing indexes on existing tables.
+    Newly created derived tables are backfilled from the ledger. Safe to run
+    repeatedly: objects that already exist are left untouched.
+
+    Returns:
+        Names of the tables and indexes that were created
+    """
+    with app_context():
+        engine = db.engine
+        inspector = inspect(engine)
+        existing_tables = set(inspector.get_table_names())
+
+        created = []
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                table.create(engine)  # Also creates the table's indexes
+                created.append(table.name)
+                continue
+
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda i: i.name):
+                if index.name not in existing_indexes:
+                    index.create(engine)
+                    created.append(index.name)
+
+        for name in created:
+            if name in BACKFILLS:
+                BACKFILLS[name]()
+
+        return created
@@ -1,15 +1,81 @@
+import os
+import uuid
+import weakref
+from contextlib import nullcontext
 from datetime import datetime
+from typing import Dict
 
-from flask import Flask
+from flask import Flask, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from backend.sqlite_profile import DEFAULT_PROFILE, apply_profile
 
 # 1. App Configuration
-app = Flask(__name__, template_folder="../templates", static_folder="../static")
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///../instance/salon_data.db"
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-app.config["SECRET_KEY"] = "my-secret-key-123"
+DEFAULT_CONFIG = {
+    "SQLALCHEMY_DATABASE_URI": "sqlite:///../instance/salon_data.db",
+    "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+    "SECRET_KEY": "my-secret-key-123",
+    "APPOINTMENTS_PAGE_SIZE": 50,  # Rows per page on /appointments
+    "SQLITE_PROFILE": os.environ.get("SALON_SQLITE_PROFILE", DEFAULT_PROFILE),
+    "SQLITE_PRAGMAS": {},  # Per-PRAGMA overrides of the profile
+    "SLOW_QUERY_SECONDS": 0.25,  # Statements at least this slow are logged
+    "QUERY_REPEAT_THRESHOLD": 10,  # More identical statements per request are logged as N+1
+    "PAGE_CACHE_SIZE": 64,  # Rendered analytics pages kept per process (0 disables the cache)
+    "PAGE_CACHE_TTL_SECONDS": 300,  # Refresh time-relative figures at least this often
+    "PAGE_CACHE_MAX_BYTES": 128 * 1024 * 1024,  # Memory the cached pages may hold per process
+}
+
+db = SQLAlchemy()
+
+# Engines of every configured app, disposed in forked children
+_engines = weakref.WeakSet()
+
+
+def configure_app(app: Flask, config: Dict = None) -> Flask:
+    """
+    Apply the default configuration plus overrides and bind the database.
+
+    Args:
+        app: Application to configure
+        config: Config values replacing the defaults
+
+    Returns:
+        The same application
+    """
+    app.config.update(DEFAULT_CONFIG)
+    app.config.update(config or {})
+    db.init_app(app)
+
+    with app.app_context():
+        apply_profile(db.engine, app.config["SQLITE_PROFILE"], app.config["SQLITE_PRAGMAS"])
+        _engines.add(db.engine)
+    return app
+
+
+def dispose_engines() -> None:
+    """
+    Drop pooled connections inherited from a parent process.
+
+    Called in every forked child so workers never share a connection with
+    their parent; the parent's connections are left open for the parent.
+    """
+    for engine in list(_engines):
+        engine.dispose(close=False)
+
 
-db = SQLAlchemy(app)
+def app_context():
+    """Reuse the active application context, or push the default app's."""
+    return nullcontext() if has_app_context() else app.app_context()
+
+
+# Default application, used by scripts, the CLI tools and the development server
+app = configure_app(Flask(__name__, template_folder="../templates", static_folder="../static"))
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=dispose_engines)
 
 # 2. Database Schema (The Tables)
 
@@ -46,6 +112,14 @@ class Customer(db.Model):
 class Appointment(db.Model):
     """The central ledger of all transactions."""
 
+    # Analytics filter and group by customer, technician, service and date
+    __table_args__ = (
+        db.Index("ix_appointment_customer_date", "customer_id", "date_time"),
+        db.Index("ix_appointment_technician_date", "technician_id", "date_time"),
+        db.Index("ix_appointment_service_date", "service_id", "date_time"),
+        db.Index("ix_appointment_date_time", "date_time"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     date_time = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
@@ -60,6 +134,119 @@ class Appointment(db.Model):
     payment_method = db.Column(db.String(20))
 
 
+class DailyRevenue(db.Model):
+    """Daily rollup of the ledger per technician, service and payment method."""
+
+    __tablename__ = "daily_revenue"
+
+    day = db.Column(db.Date, primary_key=True)
+    technician_id = db.Column(db.Integer, db.ForeignKey("technician.id"), primary_key=True)
+    service_id = db.Column(db.Integer, db.ForeignKey("service.id"), primary_key=True)
+    payment_method = db.Column(db.String(20), primary_key=True)  # "" when not recorded
+
+    appointment_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    tips = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class CustomerStats(db.Model):
+    """Running per-customer totals of the ledger, kept in step with every write."""
+
+    __tablename__ = "customer_stats"
+    __table_args__ = (
+        # Retention alerts: customers whose last visit is older than a cutoff
+        db.Index("ix_customer_stats_last_visit", "last_visit"),
+    )
+
+    customer_id = db.Column(db.Integer, db.ForeignKey("customer.id"), primary_key=True)
+    visit_count = db.Column(db.Integer, nullable=False, default=0)
+    total_revenue = db.Column(db.Float, nullable=False, default=0.0)
+    total_tips = db.Column(db.Float, nullable=False, default=0.0)
+    first_visit = db.Column(db.DateTime, nullable=False)
+    last_visit = db.Column(db.DateTime, nullable=False)
+
+    # Whole days between consecutive visits: their sum, the sum of the first
+    # half (visit trend), and the second-half gaps not yet counted in it
+    gap_sum = db.Column(db.Integer, nullable=False, default=0)
+    first_half_gap_sum = db.Column(db.Integer, nullable=False, default=0)
+    second_half_gaps = db.Column(db.JSON, nullable=False, default=list)
+
+    # Name -> [visits, index of the first visit], and the favourites they give
+    service_counts = db.Column(db.JSON, nullable=False, default=dict)
+    technician_counts = db.Column(db.JSON, nullable=False, default=dict)
+    favorite_service = db.Column(db.String(100))
+    second_favorite_service = db.Column(db.String(100))
+    favorite_technician = db.Column(db.String(50))
+
+
+class LedgerVersion(db.Model):
+    """Single row holding the version of the data, replaced by every write transaction."""
+
+    __tablename__ = "ledger_version"
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.String(32), nullable=False)
+
+
+def get_ledger_version():
+    """
+    Fingerprint of the data that changes whenever a transaction writes to it.
+
+    A primary-key lookup of the ledger_version row, so it costs the same
+    however large the ledger grows.
+
+    Returns:
+        str: Version of the last write transaction, "0" before the first
+    """
+    version = db.session.execute(
+        db.select(LedgerVersion.version).where(LedgerVersion.id == 1)
+    ).scalar()
+    return version or "0"
+
+
+def bump_ledger_version(session=None) -> None:
+    """
+    Give the data a new version inside the session's current transaction.
+
+    Runs at most once per transaction, so it is cheap to call from every write
+    path. Versions are random rather than counted, so a recreated database
+    never repeats one that a cache or client may still hold.
+
+    Args:
+        session: Session writing the data (default: db.session)
+    """
+    session = session or db.session
+    if session.info.get("ledger_version_bumped"):
+        return
+    session.info["ledger_version_bumped"] = True
+    stmt = insert(LedgerVersion).values(id=1, version=uuid.uuid4().hex)
+    session.connection().execute(
+        stmt.on_conflict_do_update(index_elements=["id"], set_={"version": stmt.excluded.version})
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_after_flush(session, flush_context):
+    """ORM inserts, updates and deletes, including edits that add no rows."""
+    bump_ledger_version(session)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bump_before_statement(orm_execute_state):
+    """Bulk inserts, upserts and deletes written through session.execute()."""
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        bump_ledger_version(orm_execute_state.session)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _end_version_transaction(session, transaction):
+    """Let the next transaction bump again, however this one ended (commit, rollback, close)."""
+    # A savepoint's bump is undone if it rolls back; after a release, one more
+    # bump in the enclosing transaction is merely redundant
+    if transaction.parent is None or transaction.nested:
+        session.info.pop("ledger_version_bumped", None)
+
+
 # 3. Initialization
 if __name__ == "__main__":
     with app.app_context():
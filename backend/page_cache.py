@@ -0,0 +1,150 @@
+"""
+In-process cache of rendered pages that only change with the ledger.
+
+/customers and /staff-performance aggregate the whole ledger on every request,
+although it only changes when something is written. cached_page() keeps their
+rendered HTML in a per-application LRU keyed by path, the query parameters
+the view reads and models.get_ledger_version(), so a lookup costs one
+primary-key read instead of the page's analytics. Parameters a view does not
+name are left out of the key, so they cannot fill the cache with copies of
+one page. The LRU is bounded by entry count and by the total size of the
+pages held; a page bigger than that budget on its own is not stored.
+
+Every write transaction gives the ledger a new version, so after any insert,
+edit or delete, in this process or another, the next lookup misses and
+entries under older versions age out of the LRU. Entries also expire after
+PAGE_CACHE_TTL_SECONDS: days since a visit and rolling "last N days" windows
+move with the clock while the ledger is idle. Hits and misses are counted at
+/metrics.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Hashable, Optional
+
+from flask import Flask, current_app, request, session
+
+from backend.models import app, get_ledger_version
+
+
+class PageCache:
+    """Thread-safe LRU of rendered pages whose entries expire after a TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, max_bytes: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # key -> (monotonic expiry, body), least recently used first
+        self.entries = OrderedDict()
+        self.size = 0  # Memory held by the stored bodies, in bytes
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """The cached page, or None when it is missing or expired."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry[1] if entry else None
+
+    def put(self, key: Hashable, body: str) -> None:
+        """
+        Store a page, evicting the least recently used beyond max_entries or max_bytes.
+
+        A page larger than max_bytes by itself is not stored.
+        """
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            size = sys.getsizeof(body)
+            if size > self.max_bytes:
+                return
+            self.entries[key] = (time.monotonic() + self.ttl_seconds, body)
+            self.size += size
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def _remove(self, key: Hashable) -> None:
+        _, body = self.entries.pop(key)
+        self.size -= sys.getsizeof(body)
+
+
+def init_page_cache(flask_app: Flask) -> Flask:
+    """
+    Give an application its page cache, bounded by PAGE_CACHE_SIZE pages (0
+    disables it) and PAGE_CACHE_MAX_BYTES.
+
+    Args:
+        flask_app: Configured application
+
+    Returns:
+        The same application
+    """
+    cache = PageCache(
+        flask_app.config["PAGE_CACHE_SIZE"],
+        flask_app.config["PAGE_CACHE_TTL_SECONDS"],
+        flask_app.config["PAGE_CACHE_MAX_BYTES"],
+    )
+    flask_app.extensions["salon_page_cache"] = cache
+    return flask_app
+
+
+def cached_page(*params: str):
+    """
+    Serve a view's rendered HTML from the page cache while the ledger is unchanged.
+
+    Args:
+        params: Query parameters the view reads; only these are part of the key
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.get("salon_page_cache")
+            # Pending flash messages are rendered into the page for this visitor only
+            if cache is None or cache.max_entries <= 0 or session.get("_flashes"):
+                return view(*args, **kwargs)
+
+            # The version is read before the page is computed, so a stored page is
+            # never older than the version it is filed under
+            key = (
+                request.path,
+                tuple(request.args.get(name) for name in params),
+                get_ledger_version(),
+            )
+            body = cache.get(key)
+            _record_lookup("miss" if body is None else "hit")
+            if body is None:
+                body = view(*args, **kwargs)
+                # Only rendered pages; redirects and error responses pass through
+                if isinstance(body, str):
+                    cache.put(key, body)
+            return body
+
+        return wrapper
+
+    return decorator
+
+
+def _record_lookup(result: str) -> None:
+    registry = current_app.extensions.get("salon_metrics")
+    if registry is not None:
+        registry.record_cache_lookup(request.endpoint, result)
+
+
+# Cache the default application's pages; create_app() gives the apps it builds their own
+init_page_cache(app)
@@ -0,0 +1,161 @@
+"""
+N+1 detection, slow-query logging and query-count assertions.
+
+Every SQL statement is reduced to a fingerprint (literals and IN-lists
+collapsed, whitespace normalised). Within a request, a fingerprint executed
+more than QUERY_REPEAT_THRESHOLD times is logged as a suspected N+1 loop, and
+any statement slower than SLOW_QUERY_SECONDS is logged with its parameters.
+Tests use assert_max_queries() to pin the query budget of a code path.
+"""
+
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from typing import List, NamedTuple
+
+from flask import Flask, g, has_request_context, request
+
+from backend import statement_timing
+from backend.models import app, db
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,)*\s*\?\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+class Query(NamedTuple):
+    """One executed statement."""
+
+    statement: str
+    parameters: object
+    seconds: float
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Normalise a statement so executions that differ only in values compare equal.
+
+    Args:
+        statement: SQL as sent to the driver
+
+    Returns:
+        The statement with literals replaced by ? and IN-lists collapsed to IN (?)
+    """
+    statement = _STRING.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _IN_LIST.sub("IN (?)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def repeated_fingerprints(queries: List[Query], threshold: int) -> List[tuple]:
+    """
+    Fingerprints executed more than threshold times.
+
+    Returns:
+        (fingerprint, count) pairs, most frequent first
+    """
+    counts = Counter(fingerprint(query.statement) for query in queries)
+    return [(key, count) for key, count in counts.most_common() if count > threshold]
+
+
+@contextmanager
+def track_queries(engine=None):
+    """
+    Collect the statements an engine executes inside the block.
+
+    Args:
+        engine: Engine to watch (default: the current app's)
+
+    Yields:
+        List of Query, filled as statements run
+    """
+    engine = engine or db.engine
+    queries = []
+
+    def record(statement, parameters, executemany, seconds):
+        queries.append(Query(statement, parameters, seconds))
+
+    statement_timing.subscribe(engine, record)
+    try:
+        yield queries
+    finally:
+        statement_timing.unsubscribe(engine, record)
+
+
+@contextmanager
+def assert_max_queries(limit: int, engine=None):
+    """
+    Fail if the block executes more than limit statements.
+
+    The assertion message lists every statement, with the repeated
+    fingerprints first, so an N+1 regression is obvious from the test output.
+
+    Args:
+        limit: Largest acceptable number of statements
+        engine: Engine to watch (default: the current app's)
+
+    Raises:
+        AssertionError: If more than limit statements ran
+    """
+    with track_queries(engine) as queries:
+        yield queries
+
+    if len(queries) > limit:
+        lines = [f"{len(queries)} queries executed, expected at most {limit}"]
+        for key, count in repeated_fingerprints(queries, 1):
+            lines.append(f"  repeated {count}×: {key}")
+        lines.extend(f"  {i}. {fingerprint(q.statement)}" for i, q in enumerate(queries, 1))
+        raise AssertionError("\n".join(lines))
+
+
+def init_query_tracking(flask_app: Flask) -> Flask:
+    """
+    Log slow statements and suspected N+1 loops of an application.
+
+    Thresholds are read from the SLOW_QUERY_SECONDS and QUERY_REPEAT_THRESHOLD
+    config keys on every statement, so they can be changed at runtime.
+
+    Args:
+        flask_app: Configured application (its engine must exist)
+
+    Returns:
+        The same application
+    """
+
+    def record(statement, parameters, executemany, elapsed):
+        if elapsed >= flask_app.config["SLOW_QUERY_SECONDS"]:
+            shown = f"<{len(parameters)} rows>" if executemany else parameters
+            logger.warning("Slow query (%.3fs): %s; parameters=%r", elapsed, statement, shown)
+        if has_request_context() and "request_queries" in g:
+            g.request_queries.append(Query(statement, parameters, elapsed))
+
+    def start_request():
+        g.request_queries = []
+
+    def finish_request(exc):
+        queries = g.pop("request_queries", None)
+        if not queries:
+            return
+        threshold = flask_app.config["QUERY_REPEAT_THRESHOLD"]
+        for key, count in repeated_fingerprints(queries, threshold):
+            logger.warning(
+                "Possible N+1 on %s %s: %d executions of %s",
+                request.method,
+                request.path,
+                count,
+                key,
+            )
+
+    with flask_app.app_context():
+        statement_timing.subscribe(db.engine, record)
+    flask_app.before_request(start_request)
+    flask_app.teardown_request(finish_request)
+    return flask_app
+
+
+# Instrument the default application; create_app() instruments the apps it builds
+init_query_tracking(app)
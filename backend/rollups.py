@@ -0,0 +1,342 @@
+"""
+Daily revenue rollup maintenance and queries.
+
+The daily_revenue table holds appointment counts, revenue and tips per day,
+technician, service and payment method. It is updated in the same
+transaction as every ledger write made through the ORM (see the session hook
+at the bottom of this module); bulk loaders that bypass the ORM call
+apply_appointments() themselves. rebuild_daily_revenue() recomputes the whole
+table from the ledger, or from column arrays a loader already holds.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from backend.models import Appointment, DailyRevenue, app_context, bump_ledger_version, db
+
+# Appointment attributes that feed the rollup
+TRACKED_FIELDS = (
+    "date_time",
+    "technician_id",
+    "service_id",
+    "payment_method",
+    "price_charged",
+    "tip_amount",
+)
+
+# Rollup rows written per executemany when rebuilding from column arrays
+WRITE_BATCH_SIZE = 10_000
+
+# Grouping keys understood by sum_revenue(): (rollup expression, ledger expression)
+GROUPINGS = {
+    "technician_id": (DailyRevenue.technician_id, Appointment.technician_id),
+    "service_id": (DailyRevenue.service_id, Appointment.service_id),
+    "payment_method": (
+        DailyRevenue.payment_method,
+        func.coalesce(Appointment.payment_method, ""),
+    ),
+    "day": (
+        func.strftime("%Y-%m-%d", DailyRevenue.day),
+        func.strftime("%Y-%m-%d", Appointment.date_time),
+    ),
+    "month": (
+        func.strftime("%Y-%m", DailyRevenue.day),
+        func.strftime("%Y-%m", Appointment.date_time),
+    ),
+}
+
+
+def apply_appointments(rows: Iterable[Mapping], sign: int = 1, connection=None) -> None:
+    """
+    Add (or with sign=-1 remove) appointments to the daily rollup.
+
+    Args:
+        rows: Appointment values as mappings with the TRACKED_FIELDS keys
+        sign: 1 to add the rows, -1 to remove them
+        connection: Connection to write on (default: the current session's)
+    """
+    deltas = defaultdict(lambda: [0, 0.0, 0.0])
+    for row in rows:
+        _accumulate(deltas, row, sign)
+    _write_deltas(deltas, connection or db.session.connection())
+
+
+def rebuild_daily_revenue(ledger: Optional[Mapping[str, np.ndarray]] = None) -> int:
+    """
+    Recompute the daily rollup from the appointment ledger.
+
+    Args:
+        ledger: The whole ledger as equally long arrays keyed by TRACKED_FIELDS,
+            date_time as datetime64 and payment_method as strings; a loader
+            that holds them passes them to skip aggregating the table again
+            (default: aggregate the appointment table)
+
+    Returns:
+        Number of rollup rows written
+    """
+    with app_context():
+        bump_ledger_version()
+        db.session.execute(delete(DailyRevenue))
+        if ledger is None:
+            _insert_ledger_totals()
+        else:
+            rows = _ledger_totals(ledger)
+            for offset in range(0, len(rows), WRITE_BATCH_SIZE):
+                db.session.execute(insert(DailyRevenue), rows[offset : offset + WRITE_BATCH_SIZE])
+        db.session.commit()
+        return db.session.query(DailyRevenue).count()
+
+
+def _insert_ledger_totals() -> None:
+    """Fill the emptied rollup from the appointment table in one INSERT ... SELECT."""
+    day = func.date(Appointment.date_time)
+    payment_method = func.coalesce(Appointment.payment_method, "")
+    ledger = select(
+        day,
+        Appointment.technician_id,
+        Appointment.service_id,
+        payment_method,
+        func.count(Appointment.id),
+        func.sum(Appointment.price_charged),
+        func.sum(func.coalesce(Appointment.tip_amount, 0)),
+    ).group_by(day, Appointment.technician_id, Appointment.service_id, payment_method)
+
+    db.session.execute(
+        insert(DailyRevenue).from_select(
+            [
+                "day",
+                "technician_id",
+                "service_id",
+                "payment_method",
+                "appointment_count",
+                "revenue",
+                "tips",
+            ],
+            ledger,
+        )
+    )
+
+
+def _ledger_totals(ledger: Mapping[str, np.ndarray]) -> List[Dict]:
+    """Rollup rows of ledger column arrays, grouped the way _insert_ledger_totals() groups."""
+    keys = {
+        "day": ledger["date_time"].astype("datetime64[D]"),
+        "technician_id": ledger["technician_id"],
+        "service_id": ledger["service_id"],
+        "payment_method": ledger["payment_method"],
+    }
+    # Number every distinct key tuple: a mixed-radix code of each key's rank
+    code = np.zeros(len(keys["day"]), dtype=np.int64)
+    for values in keys.values():
+        distinct, rank = np.unique(values, return_inverse=True)
+        code = code * len(distinct) + rank
+    _, first_row, group = np.unique(code, return_index=True, return_inverse=True)
+
+    columns = {name: values[first_row].tolist() for name, values in keys.items()}
+    columns["appointment_count"] = np.bincount(group).tolist()
+    columns["revenue"] = np.bincount(group, weights=ledger["price_charged"]).tolist()
+    columns["tips"] = np.bincount(group, weights=ledger["tip_amount"]).tolist()
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def sum_revenue(
+    by: Sequence[str] = (),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    technician_id: Optional[int] = None,
+) -> List[Dict]:
+    """
+    Sum appointment counts, revenue and tips over a date range.
+
+    Whole days inside the range are read from the daily rollup; only the
+    partial days at either edge are read from the raw ledger.
+
+    Args:
+        by: Grouping keys, any of GROUPINGS
+        start_date: Start of the range, inclusive (default: unbounded)
+        end_date: End of the range, inclusive (default: unbounded)
+        technician_id: Only include this technician's appointments
+
+    Returns:
+        One dict per group with the grouping keys plus appointment_count,
+        revenue and tips
+    """
+    totals = defaultdict(lambda: [0, 0.0, 0.0])
+    whole_days, edges = _split_range(start_date, end_date)
+
+    if whole_days is not None:
+        first_day, last_day = whole_days
+        keys = [GROUPINGS[key][0] for key in by]
+        query = db.session.query(
+            *keys,
+            func.sum(DailyRevenue.appointment_count),
+            func.sum(DailyRevenue.revenue),
+            func.sum(DailyRevenue.tips),
+        )
+        if first_day is not None:
+            query = query.filter(DailyRevenue.day >= first_day)
+        if last_day is not None:
+            query = query.filter(DailyRevenue.day < last_day)
+        if technician_id is not None:
+            query = query.filter(DailyRevenue.technician_id == technician_id)
+        _merge(totals, query.group_by(*keys).all(), len(by))
+
+    for lower, upper, upper_inclusive in edges:
+        keys = [GROUPINGS[key][1] for key in by]
+        query = db.session.query(
+            *keys,
+            func.count(Appointment.id),
+            func.sum(Appointment.price_charged),
+            func.sum(func.coalesce(Appointment.tip_amount, 0)),
+        ).filter(
+            Appointment.date_time >= lower,
+            Appointment.date_time <= upper if upper_inclusive else Appointment.date_time < upper,
+        )
+        if technician_id is not None:
+            query = query.filter(Appointment.technician_id == technician_id)
+        _merge(totals, query.group_by(*keys).all(), len(by))
+
+    return [
+        {
+            **dict(zip(by, key)),
+            "appointment_count": count,
+            "revenue": revenue,
+            "tips": tips,
+        }
+        for key, (count, revenue, tips) in totals.items()
+        if count
+    ]
+
+
+def _split_range(start_date, end_date):
+    """
+    Split a datetime range into whole days and partial-day edges.
+
+    Returns:
+        Tuple of (whole_days, edges). whole_days is (first_day, last_day) with
+        last_day exclusive and None meaning unbounded, or None when no whole
+        day fits. edges is a list of (lower, upper, upper_inclusive) ranges to
+        read from the ledger.
+    """
+    first_day = None
+    if start_date is not None:
+        first_day = start_date.date()
+        if start_date.time() != time.min:
+            first_day += timedelta(days=1)
+
+    # Inclusive end: the end date's own day is never whole
+    last_day = end_date.date() if end_date is not None else None
+
+    if first_day is not None and last_day is not None and first_day >= last_day:
+        return None, [(start_date, end_date, True)]
+
+    edges = []
+    if start_date is not None and start_date.time() != time.min:
+        edges.append((start_date, datetime.combine(first_day, time.min), False))
+    if end_date is not None:
+        edges.append((datetime.combine(last_day, time.min), end_date, True))
+    return (first_day, last_day), edges
+
+
+def _merge(totals, rows, key_length):
+    for row in rows:
+        entry = totals[tuple(row[:key_length])]
+        entry[0] += row[key_length] or 0
+        entry[1] += float(row[key_length + 1] or 0)
+        entry[2] += float(row[key_length + 2] or 0)
+
+
+def _accumulate(deltas, row, sign):
+    key = (
+        row["date_time"].date(),
+        row["technician_id"],
+        row["service_id"],
+        row["payment_method"] or "",
+    )
+    entry = deltas[key]
+    entry[0] += sign
+    entry[1] += sign * row["price_charged"]
+    entry[2] += sign * (row["tip_amount"] or 0)
+
+
+def _write_deltas(deltas, connection):
+    """Upsert accumulated deltas into the rollup in one executemany."""
+    if not deltas:
+        return
+
+    table = DailyRevenue.__table__
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            table.c.day,
+            table.c.technician_id,
+            table.c.service_id,
+            table.c.payment_method,
+        ],
+        set_={
+            "appointment_count": table.c.appointment_count + stmt.excluded.appointment_count,
+            "revenue": table.c.revenue + stmt.excluded.revenue,
+            "tips": table.c.tips + stmt.excluded.tips,
+        },
+    )
+    connection.execute(
+        stmt,
+        [
+            {
+                "day": day,
+                "technician_id": technician_id,
+                "service_id": service_id,
+                "payment_method": payment_method,
+                "appointment_count": count,
+                "revenue": revenue,
+                "tips": tips,
+            }
+            for (day, technician_id, service_id, payment_method), (count, revenue, tips) in (
+                deltas.items()
+            )
+        ],
+    )
+
+    if any(count < 0 for count, _, _ in deltas.values()):
+        connection.execute(delete(table).where(table.c.appointment_count <= 0))
+
+
+def _current_values(appointment) -> Dict:
+    return {field: getattr(appointment, field) for field in TRACKED_FIELDS}
+
+
+def _previous_values(appointment) -> Dict:
+    """Values an appointment had before the pending flush changed them."""
+    values = {}
+    for field in TRACKED_FIELDS:
+        history = get_history(appointment, field)
+        values[field] = history.deleted[0] if history.deleted else getattr(appointment, field)
+    return values
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_daily_revenue(session, flush_context):
+    """Mirror ORM inserts, updates and deletes of appointments into the rollup."""
+    deltas = defaultdict(lambda: [0, 0.0, 0.0])
+
+    for obj in session.new:
+        if isinstance(obj, Appointment):
+            _accumulate(deltas, _current_values(obj), 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Appointment):
+            _accumulate(deltas, _previous_values(obj), -1)
+
+    for obj in session.dirty:
+        if isinstance(obj, Appointment) and session.is_modified(obj):
+            _accumulate(deltas, _previous_values(obj), -1)
+            _accumulate(deltas, _current_values(obj), 1)
+
+    _write_deltas(deltas, session.connection())
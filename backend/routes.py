@@ -1,167 +1,100 @@
 """Application routes and view functions."""
 
 from datetime import datetime, timedelta
+from urllib.parse import urlencode
 
-from flask import flash, redirect, render_template, request
-from sqlalchemy import func
+from flask import Blueprint, abort, current_app, flash, redirect, render_template, request
 
-from backend.customer_analytics import calculate_customer_ltv, get_segment_summary
+from backend.appointment_queries import get_appointment_page, get_chart_data
+from backend.appointment_writes import record_appointment
+from backend.customer_analytics import get_at_risk_customers, get_ltv_snapshot
 
 # Import from backend package
-from backend.models import Appointment, Customer, Service, Technician, app, db
+from backend.models import Service, Technician, app
+from backend.page_cache import cached_page
 from backend.staff_analytics import (
     get_customer_retention_by_technician,
     get_staff_summary_stats,
     get_technician_performance,
-    get_top_services_by_technician,
+    get_technician_totals,
+    get_top_services_for_all_technicians,
 )
 
+main_bp = Blueprint("main", __name__)
+
 
 # --- ROUTE 1: THE DASHBOARD ---
-@app.route("/")
+@main_bp.route("/")
 def dashboard():
     # 1. Get Performance Data
-    performance = (
-        db.session.query(
-            Technician.name,
-            func.count(Appointment.id).label("total_jobs"),
-            func.sum(Appointment.price_charged).label("total_revenue"),
-            func.sum(Appointment.tip_amount).label("total_tips"),
-        )
-        .join(Technician)
-        .group_by(Technician.name)
-        .all()
-    )
+    performance = get_technician_totals()
 
     # 2. Get Retention Alerts
-    thirty_days_ago = datetime.now() - timedelta(days=30)
-    at_risk_customers = []
-
-    all_customers = Customer.query.all()
-    for customer in all_customers:
-        last_appt = (
-            Appointment.query.filter_by(customer_id=customer.id)
-            .order_by(Appointment.date_time.desc())
-            .first()
-        )
-        if last_appt and last_appt.date_time < thirty_days_ago:
-            days_missed = (datetime.now() - last_appt.date_time).days
-            at_risk_customers.append(
-                {"name": customer.first_name, "phone": customer.phone, "days_missed": days_missed}
-            )
+    at_risk_customers = get_at_risk_customers()
 
     return render_template("dashboard.html", performance=performance, at_risk=at_risk_customers)
 
 
 # --- ROUTE 2: HISTORY & CHARTS (WITH FILTERS) ---
-@app.route("/appointments")
+@main_bp.route("/appointments")
 def appointment_history():
     # Get filter parameters from URL
     selected_period = request.args.get("period", "day")  # 'day' or 'month'
     selected_tech = request.args.get("tech_id", "all")  # 'all' or specific tech id
+    per_page = request.args.get("per_page", current_app.config["APPOINTMENTS_PAGE_SIZE"], type=int)
 
     # Get all technicians for the filter dropdown
     all_techs = Technician.query.all()
 
-    # 1. Build base query for appointments
-    query = Appointment.query
-
-    # Apply technician filter if not "all"
-    if selected_tech != "all":
-        query = query.filter_by(technician_id=int(selected_tech))
-
-    # Get filtered appointments (newest first)
-    history = query.order_by(Appointment.date_time.desc()).all()
+    tech_id = None if selected_tech == "all" else int(selected_tech)
 
-    # 2. Prepare TREND CHART Data (Revenue over time)
-    trend_data = {}
-    for appt in history:
-        # Format date based on selected period
-        if selected_period == "month":
-            date_str = appt.date_time.strftime("%Y-%m")  # Group by month
-        else:
-            date_str = appt.date_time.strftime("%Y-%m-%d")  # Group by day
-
-        total_money = appt.price_charged + appt.tip_amount
-        trend_data[date_str] = trend_data.get(date_str, 0) + total_money
-
-    # Sort dates chronologically
-    trend_labels = sorted(trend_data.keys())
-    trend_values = [trend_data[d] for d in trend_labels]
-
-    # 3. Prepare TECHNICIAN BREAKDOWN (Bar Chart)
-    tech_data = {}
-    for appt in history:
-        tech_name = appt.technician.name
-        total_money = appt.price_charged + appt.tip_amount
-        tech_data[tech_name] = tech_data.get(tech_name, 0) + total_money
-
-    tech_labels = list(tech_data.keys())
-    tech_values = list(tech_data.values())
+    # 1. One page of the appointment log (newest first, keyset on date_time + id)
+    try:
+        page = get_appointment_page(
+            technician_id=tech_id,
+            after=request.args.get("after"),
+            before=request.args.get("before"),
+            page_size=per_page,
+        )
+    except ValueError:
+        abort(400, "Invalid page cursor")
 
-    # 4. Prepare SERVICE BREAKDOWN (Doughnut Chart)
-    service_data = {}
-    for appt in history:
-        service_name = appt.service.name
-        total_money = appt.price_charged + appt.tip_amount
-        service_data[service_name] = service_data.get(service_name, 0) + total_money
+    # Next/prev links keep the current filters
+    filters = {"period": selected_period, "tech_id": selected_tech, "per_page": per_page}
+    next_url = prev_url = None
+    if page["next_cursor"]:
+        next_url = "/appointments?" + urlencode({**filters, "after": page["next_cursor"]})
+    if page["prev_cursor"]:
+        prev_url = "/appointments?" + urlencode({**filters, "before": page["prev_cursor"]})
 
-    service_labels = list(service_data.keys())
-    service_values = list(service_data.values())
+    # 2. Chart series are computed separately from the table rows
+    charts = get_chart_data(period=selected_period, technician_id=tech_id)
 
     return render_template(
         "appointments.html",
-        history=history,
-        trend_labels=trend_labels,
-        trend_values=trend_values,
-        tech_labels=tech_labels,
-        tech_values=tech_values,
-        service_labels=service_labels,
-        service_values=service_values,
+        history=page["rows"],
+        next_url=next_url,
+        prev_url=prev_url,
+        per_page=per_page,
         selected_period=selected_period,
         selected_tech=selected_tech,
         all_techs=all_techs,
+        **charts,
     )
 
 
 # --- ROUTE 3: CUSTOMER ANALYTICS ---
-@app.route("/customers")
+@main_bp.route("/customers")
+@cached_page()
 def customer_analytics():
-    # Get comprehensive customer LTV data
-    customers = calculate_customer_ltv()
-    segment_summary = get_segment_summary()
-
-    # Prepare data for segment chart (Pie chart showing customer distribution)
-    segment_labels = list(segment_summary.keys())
-    segment_counts = [segment_summary[s]["count"] for s in segment_labels]
-    segment_revenue = [segment_summary[s]["total_revenue"] for s in segment_labels]
-
-    # Calculate summary stats
-    total_customers = len(customers)
-    total_ltv = sum(c["total_spend"] for c in customers)
-    avg_ltv = total_ltv / total_customers if total_customers > 0 else 0
+    # Calculate customer LTV once; the summary, counts and charts all derive from it
+    snapshot = get_ltv_snapshot()
 
-    # Get at-risk and VIP counts
-    at_risk_count = sum(1 for c in customers if c["segment"] == "At-Risk")
-    vip_count = sum(1 for c in customers if c["segment"] == "VIP")
-
-    return render_template(
-        "customers.html",
-        customers=customers,
-        segment_summary=segment_summary,
-        segment_labels=segment_labels,
-        segment_counts=segment_counts,
-        segment_revenue=segment_revenue,
-        total_customers=total_customers,
-        total_ltv=total_ltv,
-        avg_ltv=avg_ltv,
-        at_risk_count=at_risk_count,
-        vip_count=vip_count,
-    )
+    return render_template("customers.html", **snapshot)
 
 
 # --- ROUTE 4: ADD APPOINTMENT ---
-@app.route("/add", methods=["GET", "POST"])
+@main_bp.route("/add", methods=["GET", "POST"])
 def add_appointment():
     if request.method == "POST":
         tech_id = request.form["technician_id"]
@@ -171,23 +104,16 @@ def add_appointment():
         price = float(request.form["price"])
         tip = float(request.form["tip"])
 
-        customer = Customer.query.filter_by(phone=c_phone).first()
-        if not customer:
-            customer = Customer(first_name=c_name, phone=c_phone)
-            db.session.add(customer)
-            db.session.commit()
-
-        new_appt = Appointment(
-            date_time=datetime.now(),
-            customer_id=customer.id,
+        # Customer upsert and appointment insert share one transaction
+        record_appointment(
+            customer_name=c_name,
+            customer_phone=c_phone,
             technician_id=tech_id,
             service_id=service_id,
-            price_charged=price,
-            tip_amount=tip,
+            price=price,
+            tip=tip,
             payment_method="Cash",
         )
-        db.session.add(new_appt)
-        db.session.commit()
 
         flash("✅ Appointment Saved Successfully!")
         return redirect("/appointments")
@@ -198,7 +124,8 @@ def add_appointment():
 
 
 # --- ROUTE 5: STAFF PERFORMANCE DASHBOARD ---
-@app.route("/staff-performance")
+@main_bp.route("/staff-performance")
+@cached_page("days")
 def staff_performance():
     """Display comprehensive staff performance analytics."""
     # Get date range from query params (default to last 30 days)
@@ -222,11 +149,13 @@ def staff_performance():
     for tech in performance_data:
         tech["retention_rate"] = retention_dict.get(tech["id"], 0)
 
-    # Get top services for top performer (if exists)
-    top_services = []
-    if performance_data:
-        top_tech_id = performance_data[0]["id"]
-        top_services = get_top_services_by_technician(top_tech_id, limit=5)
+    # Top services for every technician in one query
+    top_services_by_tech = get_top_services_for_all_technicians(limit=5)
+    for tech in performance_data:
+        tech["top_services"] = top_services_by_tech.get(tech["id"], [])
+
+    # Top services for top performer (if exists)
+    top_services = performance_data[0]["top_services"] if performance_data else []
 
     return render_template(
         "staff_performance.html",
@@ -242,3 +171,7 @@ def staff_performance():
         start_date=start_date.strftime("%Y-%m-%d"),
         end_date=end_date.strftime("%Y-%m-%d"),
     )
+
+
+# Register on the default application; create_app() registers on the apps it builds
+app.register_blueprint(main_bp)
@@ -0,0 +1,344 @@
+"""
+Deterministic, vectorized generation of practice datasets.
+
+Customers follow the same behavioural mix as the original hand-written seed:
+regulars visiting every 2-3 weeks, occasionals every 4-6 weeks, and at-risk
+customers whose last visit was 31-60 days ago. Visits are generated with numpy
+for a whole segment at once and written with executemany in batches, so even
+the xl profile (100k customers, a few million appointments) loads quickly.
+The same profile and seed always produce the same rows relative to `now`.
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Dict
+
+import numpy as np
+from sqlalchemy import insert
+
+from backend.customer_stats import rebuild_customer_stats
+from backend.models import (
+    Appointment,
+    Service,
+    Technician,
+    app_context,
+    bump_ledger_version,
+    db,
+)
+from backend.rollups import rebuild_daily_revenue
+
+DEFAULT_SEED = 42
+INSERT_BATCH_SIZE = 50_000
+
+# Number of customers and days of history per profile
+PROFILES = {
+    "small": {"customers": 34, "days": 90},
+    "medium": {"customers": 2_000, "days": 365},
+    "large": {"customers": 20_000, "days": 730},
+    "xl": {"customers": 100_000, "days": 1095},
+}
+
+TECHNICIANS = [
+    ("Lisa", 0.65),  # Senior tech, higher rate
+    ("Tom", 0.60),
+    ("Maria", 0.60),
+    ("Kevin", 0.55),  # Newer tech
+    ("Jenny", 0.60),
+]
+
+# (name, base price, category); appointments use the first MAIN_SERVICES
+SERVICES = [
+    ("Basic Manicure", 25.00, "Hands"),
+    ("Gel Manicure", 35.00, "Hands"),
+    ("Acrylic Full Set", 55.00, "Hands"),
+    ("Gel X Extensions", 65.00, "Hands"),
+    ("Nail Repair", 15.00, "Hands"),
+    ("Basic Pedicure", 35.00, "Feet"),
+    ("Spa Pedicure", 45.00, "Feet"),
+    ("Deluxe Pedicure", 55.00, "Feet"),
+    ("Gel Pedicure", 50.00, "Feet"),
+    ("Nail Art (per nail)", 5.00, "Add-on"),
+    ("Chrome/Cat Eye", 10.00, "Add-on"),
+    ("Callus Treatment", 15.00, "Add-on"),
+]
+MAIN_SERVICES = 9
+
+# Share of customers, visit interval in days (inclusive), first-visit offset
+# in days, chance a booked visit happens, tip range as a share of the price
+SEGMENTS = {
+    "regular": {
+        "share": 15 / 34,
+        "interval": (14, 21),
+        "offset": 14,
+        "show": 0.85,
+        "tip": (0.15, 0.25),
+    },
+    "occasional": {
+        "share": 10 / 34,
+        "interval": (28, 45),
+        "offset": 30,
+        "show": 0.80,
+        "tip": (0.10, 0.20),
+    },
+    "at_risk": {
+        "share": 9 / 34,
+        "interval": (28, 45),
+        "lapsed": (31, 60),
+        "show": 0.80,
+        "tip": (0.10, 0.20),
+    },
+}
+
+FIRST_NAMES = [
+    "Sarah",
+    "Jennifer",
+    "Maria",
+    "Emily",
+    "Ashley",
+    "Jessica",
+    "Amanda",
+    "Michelle",
+    "Stephanie",
+    "Nicole",
+    "Elizabeth",
+    "Rebecca",
+    "Laura",
+    "Angela",
+    "Melissa",
+    "Kimberly",
+    "Lisa",
+    "Amy",
+    "Anna",
+    "Rachel",
+    "Samantha",
+    "Diana",
+    "Karen",
+    "Nancy",
+    "Betty",
+    "Helen",
+    "Sandra",
+    "Donna",
+    "Carol",
+    "Ruth",
+    "Sharon",
+    "Patricia",
+    "Deborah",
+    "Linda",
+]
+
+NOTES = [
+    "Prefers almond shape",
+    "Likes bright colors",
+    "Sensitive cuticles",
+    "Regular customer",
+    "Prefers natural look",
+    "",  # Some customers have no notes
+]
+
+OPENING_HOURS = np.arange(9, 18)
+MINUTES = np.array([0, 15, 30, 45])
+PAYMENT_METHODS = np.array(["Cash", "Card", "Card", "Card"])  # 75% card, 25% cash
+
+
+def segment_sizes(customers: int) -> Dict[str, int]:
+    """Split a customer count across SEGMENTS, remainder to the last segment."""
+    sizes = {}
+    remaining = customers
+    names = list(SEGMENTS)
+    for name in names[:-1]:
+        sizes[name] = min(remaining, round(customers * SEGMENTS[name]["share"]))
+        remaining -= sizes[name]
+    sizes[names[-1]] = remaining
+    return sizes
+
+
+def generate_visits(
+    rng: np.random.Generator, first_id: int, count: int, segment: Dict, days: int
+) -> Dict[str, np.ndarray]:
+    """
+    Generate the visits of one segment's customers.
+
+    Args:
+        rng: Random generator
+        first_id: Customer id of the segment's first customer
+        count: Number of customers in the segment
+        segment: One of SEGMENTS
+        days: Days of history
+
+    Returns:
+        Dict of equally long arrays: customer_id and day (days since the start)
+    """
+    low, high = segment["interval"]
+    interval = rng.integers(low, high + 1, count)
+
+    if "lapsed" in segment:
+        # Count backwards from the lapse so the last visit lands on it
+        lapsed_low, lapsed_high = segment["lapsed"]
+        last = days - rng.integers(lapsed_low, lapsed_high + 1, count)
+        last = np.maximum(last, 0)
+        first = last % interval
+    else:
+        first = rng.integers(0, segment["offset"] + 1, count)
+        last = np.full(count, days)
+
+    slots = np.where(last >= first, (last - first) // interval + 1, 0)
+    customer = np.repeat(np.arange(first_id, first_id + count), slots)
+    # Position of each slot within its customer's run: 0, 1, 2, ...
+    run_start = np.repeat(np.cumsum(slots) - slots, slots)
+    position = np.arange(slots.sum()) - run_start
+    day = np.repeat(first, slots) + position * np.repeat(interval, slots)
+
+    keep = rng.random(len(day)) < segment["show"]
+    if "lapsed" in segment:
+        keep |= position == np.repeat(slots - 1, slots)  # The last visit always happened
+    return {"customer_id": customer[keep], "day": day[keep]}
+
+
+def generate_appointments(
+    rng: np.random.Generator, customers: int, days: int, start: datetime, service_ids, tech_ids
+) -> Dict[str, np.ndarray]:
+    """
+    Generate every appointment of a profile as column arrays.
+
+    Returns:
+        Dict of equally long arrays keyed by appointment column name, in
+        ledger order, with date_time as datetime64
+    """
+    base_prices = np.array([price for _, price, _ in SERVICES[:MAIN_SERVICES]])
+    columns = {name: [] for name in ("customer_id", "day", "tip_share")}
+
+    first_id = 1
+    for name, size in segment_sizes(customers).items():
+        segment = SEGMENTS[name]
+        visits = generate_visits(rng, first_id, size, segment, days)
+        columns["customer_id"].append(visits["customer_id"])
+        columns["day"].append(visits["day"])
+        columns["tip_share"].append(rng.uniform(*segment["tip"], len(visits["day"])))
+        first_id += size
+
+    customer_id = np.concatenate(columns["customer_id"])
+    day = np.concatenate(columns["day"])
+    tip_share = np.concatenate(columns["tip_share"])
+    total = len(day)
+
+    service = rng.integers(0, MAIN_SERVICES, total)
+    # Price varies slightly from the base price, never below it
+    price = np.round(base_prices[service] + np.maximum(rng.uniform(-2, 5, total), 0), 2)
+    minutes = day * 1440 + rng.choice(OPENING_HOURS, total) * 60 + rng.choice(MINUTES, total)
+    # Ledger order: ids increase with time, as they do in production
+    order = np.argsort(minutes, kind="stable")
+    date_time = np.datetime64(start, "m") + minutes[order].astype("timedelta64[m]")
+
+    return {
+        "date_time": date_time.astype("datetime64[us]"),
+        "customer_id": customer_id[order],
+        "technician_id": np.asarray(tech_ids)[rng.integers(0, len(tech_ids), total)],
+        "service_id": np.asarray(service_ids)[service[order]],
+        "price_charged": price[order],
+        "tip_amount": np.round(price * tip_share, 2)[order],
+        "payment_method": rng.choice(PAYMENT_METHODS, total),
+    }
+
+
+def seed_database(
+    profile: str = "small",
+    seed: int = DEFAULT_SEED,
+    now: datetime = None,
+    batch_size: int = INSERT_BATCH_SIZE,
+) -> Dict:
+    """
+    Drop all data and load a generated practice dataset.
+
+    Args:
+        profile: Name of one of PROFILES
+        seed: Random seed; the same seed always yields the same dataset
+        now: End of the generated history (default: now)
+        batch_size: Appointment rows per executemany
+
+    Returns:
+        Dict with technicians, services, customers, appointments, revenue,
+        start, end and seconds
+
+    Raises:
+        ValueError: If the profile is unknown
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown seed profile {profile!r}; choose from {sorted(PROFILES)}")
+
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    settings = PROFILES[profile]
+    now = now or datetime.now()
+    start = datetime.combine((now - timedelta(days=settings["days"])).date(), datetime.min.time())
+
+    with app_context():
+        db.drop_all()
+        db.create_all()
+
+        db.session.execute(
+            insert(Technician), [{"name": n, "commission_rate": r} for n, r in TECHNICIANS]
+        )
+        db.session.execute(
+            insert(Service),
+            [{"name": n, "base_price": p, "category": c} for n, p, c in SERVICES],
+        )
+        tech_ids = [row.id for row in db.session.query(Technician.id).order_by(Technician.id)]
+        service_ids = [row.id for row in db.session.query(Service.id).order_by(Service.id)]
+
+        connection = db.session.connection()
+        customers = settings["customers"]
+        ids = np.arange(1, customers + 1)
+        connection.exec_driver_sql(
+            "INSERT INTO customer (id, first_name, phone, notes) VALUES (?, ?, ?, ?)",
+            list(
+                zip(
+                    ids.tolist(),
+                    rng.choice(FIRST_NAMES, customers).tolist(),
+                    [f"555-{1000 + i:04d}" for i in ids.tolist()],
+                    rng.choice(NOTES, customers).tolist(),
+                )
+            ),
+        )
+
+        columns = generate_appointments(
+            rng, customers, settings["days"], start, service_ids[:MAIN_SERVICES], tech_ids
+        )
+        names = list(columns)
+        total = len(columns["date_time"])
+        # Text the way SQLAlchemy stores DateTime in SQLite
+        stored = dict(
+            columns,
+            date_time=np.char.replace(
+                np.datetime_as_string(columns["date_time"], unit="us"), "T", " "
+            ),
+        )
+        sql = (
+            f"INSERT INTO appointment ({', '.join(names)}) "
+            f"VALUES ({', '.join('?' for _ in names)})"
+        )
+        # Building the indexes once after the load is far cheaper than row by row
+        indexes = list(Appointment.__table__.indexes)
+        for index in indexes:
+            index.drop(connection)
+        for offset in range(0, total, batch_size):
+            batch = [stored[name][offset : offset + batch_size].tolist() for name in names]
+            connection.exec_driver_sql(sql, list(zip(*batch)))
+        for index in indexes:
+            index.create(connection)
+
+        bump_ledger_version()
+        db.session.commit()
+        # Both summaries are built from the generated columns, not read back
+        rebuild_daily_revenue(columns)
+        rebuild_customer_stats(columns)
+
+    return {
+        "technicians": len(tech_ids),
+        "services": len(service_ids),
+        "customers": customers,
+        "appointments": total,
+        "revenue": float(columns["price_charged"].sum() + columns["tip_amount"].sum()),
+        "start": start,
+        "end": now,
+        "seconds": time.perf_counter() - started,
+    }
@@ -0,0 +1,101 @@
+"""
+SQLite connection profiles.
+
+A profile is a set of PRAGMAs run on every new DB-API connection through the
+engine's "connect" event, so pooled connections all share the same settings.
+The profile is picked with the SQLITE_PROFILE config key (default: the
+SALON_SQLITE_PROFILE environment variable, else "wal"); individual PRAGMAs can
+be overridden with the SQLITE_PRAGMAS config dict.
+"""
+
+from typing import Dict, Mapping
+
+from sqlalchemy import event
+
+DEFAULT_PROFILE = "wal"
+
+PROFILES = {
+    # SQLite's own defaults: rollback journal, readers and writers block each other
+    "stock": {},
+    # Readers never block the writer; commits fsync only at checkpoints
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,  # KiB, i.e. 64 MB per connection
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,  # ms to wait for a lock before "database is locked"
+    },
+    # As "wal", but every commit is fsynced
+    "wal-durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -64000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+}
+
+ALLOWED_PRAGMAS = {
+    "journal_mode",
+    "synchronous",
+    "cache_size",
+    "mmap_size",
+    "temp_store",
+    "busy_timeout",
+}
+
+
+def resolve_pragmas(profile: str, overrides: Mapping = None) -> Dict:
+    """
+    Combine a named profile with per-PRAGMA overrides.
+
+    Args:
+        profile: Name of one of PROFILES
+        overrides: PRAGMA values replacing the profile's
+
+    Returns:
+        Dict of PRAGMA name to value
+
+    Raises:
+        ValueError: If the profile or a PRAGMA name is unknown
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown SQLite profile {profile!r}; choose from {sorted(PROFILES)}")
+
+    pragmas = {**PROFILES[profile], **(overrides or {})}
+    unknown = set(pragmas) - ALLOWED_PRAGMAS
+    if unknown:
+        raise ValueError(f"Unsupported SQLite PRAGMA(s): {sorted(unknown)}")
+    return pragmas
+
+
+def apply_profile(engine, profile: str, overrides: Mapping = None) -> Dict:
+    """
+    Run a profile's PRAGMAs on every connection the engine opens.
+
+    Engines for other databases are left untouched.
+
+    Args:
+        engine: SQLAlchemy engine
+        profile: Name of one of PROFILES
+        overrides: PRAGMA values replacing the profile's
+
+    Returns:
+        The PRAGMAs that will be applied
+    """
+    pragmas = resolve_pragmas(profile, overrides)
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return pragmas
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+    return pragmas
@@ -3,9 +3,10 @@
 from datetime import datetime, timedelta
 from typing import Dict, List
 
-from sqlalchemy import func
+from sqlalchemy import case, func
 
-from backend.models import Appointment, Service, Technician, db
+from backend.models import Appointment, DailyRevenue, Service, Technician, db
+from backend.rollups import sum_revenue
 
 
 def get_technician_performance(
@@ -74,6 +75,38 @@ def get_technician_performance(
     return performance_data
 
 
+def get_technician_totals() -> List[Dict]:
+    """
+    Get all-time job counts, revenue and tips per technician.
+
+    Read from the daily revenue rollup rather than the raw ledger.
+
+    Returns:
+        List of dicts with name, total_jobs, total_revenue and total_tips
+    """
+    results = (
+        db.session.query(
+            Technician.name,
+            func.sum(DailyRevenue.appointment_count).label("total_jobs"),
+            func.sum(DailyRevenue.revenue).label("total_revenue"),
+            func.sum(DailyRevenue.tips).label("total_tips"),
+        )
+        .join(DailyRevenue, DailyRevenue.technician_id == Technician.id)
+        .group_by(Technician.name)
+        .all()
+    )
+
+    return [
+        {
+            "name": row.name,
+            "total_jobs": row.total_jobs,
+            "total_revenue": float(row.total_revenue or 0),
+            "total_tips": float(row.total_tips or 0),
+        }
+        for row in results
+    ]
+
+
 def get_technician_revenue_trend(technician_id: int, days: int = 30) -> Dict[str, List]:
     """
     Get daily revenue trend for a specific technician.
@@ -88,27 +121,19 @@ def get_technician_revenue_trend(technician_id: int, days: int = 30) -> Dict[str
     end_date = datetime.now()
     start_date = end_date - timedelta(days=days)
 
-    # Query daily revenue
-    results = (
-        db.session.query(
-            func.date(Appointment.date_time).label("date"),
-            func.sum(Appointment.price_charged).label("daily_revenue"),
-        )
-        .filter(
-            Appointment.technician_id == technician_id,
-            Appointment.date_time >= start_date,
-            Appointment.date_time <= end_date,
-        )
-        .group_by(func.date(Appointment.date_time))
-        .order_by("date")
-        .all()
+    # Daily revenue from the rollup (raw ledger only for the partial edge days)
+    results = sorted(
+        sum_revenue(
+            by=("day",), start_date=start_date, end_date=end_date, technician_id=technician_id
+        ),
+        key=lambda row: row["day"],
     )
 
     dates = []
     revenues = []
     for row in results:
-        dates.append(str(row.date))
-        revenues.append(float(row.daily_revenue or 0))
+        dates.append(row["day"])
+        revenues.append(row["revenue"])
 
     return {"dates": dates, "revenues": revenues}
 
@@ -133,38 +158,48 @@ def get_customer_retention_by_technician(
     if not start_date:
         start_date = end_date - timedelta(days=90)
 
-    # Get all technicians
-    technicians = Technician.query.all()
+    # Visits per (technician, customer) pair in the period
+    customer_visits = (
+        db.session.query(
+            Appointment.technician_id,
+            Appointment.customer_id,
+            func.count(Appointment.id).label("visit_count"),
+        )
+        .filter(Appointment.date_time >= start_date, Appointment.date_time <= end_date)
+        .group_by(Appointment.technician_id, Appointment.customer_id)
+        .subquery()
+    )
 
-    retention_data = []
-    for tech in technicians:
-        # Count appointments per customer for this technician
-        customer_visits = (
-            db.session.query(
-                Appointment.customer_id, func.count(Appointment.id).label("visit_count")
-            )
-            .filter(
-                Appointment.technician_id == tech.id,
-                Appointment.date_time >= start_date,
-                Appointment.date_time <= end_date,
-            )
-            .group_by(Appointment.customer_id)
-            .all()
+    # Total and returning customers for every technician in one query
+    # (outer join keeps technicians with no customers in the period)
+    results = (
+        db.session.query(
+            Technician.id,
+            Technician.name,
+            func.count(customer_visits.c.customer_id).label("total_customers"),
+            func.coalesce(
+                func.sum(case((customer_visits.c.visit_count >= 2, 1), else_=0)), 0
+            ).label("returning_customers"),
         )
+        .outerjoin(customer_visits, customer_visits.c.technician_id == Technician.id)
+        .group_by(Technician.id)
+        .order_by(Technician.id)
+        .all()
+    )
 
-        total_customers = len(customer_visits)
-        if total_customers == 0:
+    retention_data = []
+    for row in results:
+        if row.total_customers == 0:
             retention_rate = 0.0
         else:
-            returning_customers = sum(1 for cv in customer_visits if cv.visit_count >= 2)
-            retention_rate = (returning_customers / total_customers) * 100
+            retention_rate = (row.returning_customers / row.total_customers) * 100
 
         retention_data.append(
             {
-                "technician_id": tech.id,
-                "technician_name": tech.name,
-                "total_customers": total_customers,
-                "returning_customers": sum(1 for cv in customer_visits if cv.visit_count >= 2),
+                "technician_id": row.id,
+                "technician_name": row.name,
+                "total_customers": row.total_customers,
+                "returning_customers": row.returning_customers,
                 "retention_rate": round(retention_rate, 1),
             }
         )
@@ -183,25 +218,64 @@ def get_top_services_by_technician(technician_id: int, limit: int = 5) -> List[D
     Returns:
         List of service performance data
     """
+    return get_top_services_for_all_technicians(limit, technician_id=technician_id).get(
+        technician_id, []
+    )
+
+
+def get_top_services_for_all_technicians(
+    limit: int = 5, technician_id: int = None
+) -> Dict[int, List[Dict]]:
+    """
+    Get the most popular services of every technician in one query.
+
+    Services are ranked per technician with ROW_NUMBER() over the service
+    counts (ties broken by service id), read from the daily revenue rollup
+    rather than the raw ledger, and outer-joined to Service for the names;
+    services that no longer exist are reported as "Unknown".
+
+    Args:
+        limit: Number of top services to return per technician
+        technician_id: Only rank this technician's services
+
+    Returns:
+        Dict mapping technician id to its list of service performance data
+    """
+    service_count = func.sum(DailyRevenue.appointment_count)
+    ranked = db.session.query(
+        DailyRevenue.technician_id,
+        DailyRevenue.service_id,
+        service_count.label("service_count"),
+        func.sum(DailyRevenue.revenue).label("service_revenue"),
+        func.row_number()
+        .over(
+            partition_by=DailyRevenue.technician_id,
+            order_by=(service_count.desc(), DailyRevenue.service_id),
+        )
+        .label("service_rank"),
+    )
+    if technician_id is not None:
+        ranked = ranked.filter(DailyRevenue.technician_id == technician_id)
+    ranked = ranked.group_by(DailyRevenue.technician_id, DailyRevenue.service_id).subquery()
+
     results = (
         db.session.query(
-            Appointment.service_id,
-            func.count(Appointment.id).label("service_count"),
-            func.sum(Appointment.price_charged).label("service_revenue"),
+            ranked.c.technician_id,
+            func.coalesce(Service.name, "Unknown").label("name"),
+            ranked.c.service_count,
+            ranked.c.service_revenue,
         )
-        .filter(Appointment.technician_id == technician_id)
-        .group_by(Appointment.service_id)
-        .order_by(func.count(Appointment.id).desc())
-        .limit(limit)
+        .outerjoin(Service, Service.id == ranked.c.service_id)
+        .filter(ranked.c.service_rank <= limit)
+        .order_by(ranked.c.technician_id, ranked.c.service_rank)
         .all()
     )
 
-    top_services = []
+    top_services: Dict[int, List[Dict]] = {}
     for row in results:
-        service = db.session.get(Service, row.service_id)
-        top_services.append(
+        top_services.setdefault(row.technician_id, []).append(
             {
-                "service_name": service.name if service else "Unknown",
+                "service_name": row.name,
                 "count": row.service_count,
                 "revenue": round(float(row.service_revenue or 0), 2),
             }
@@ -228,20 +302,13 @@ def get_staff_summary_stats(start_date: datetime = None, end_date: datetime = No
 
     total_techs = Technician.query.count()
 
-    # Total appointments and revenue in period
-    result = (
-        db.session.query(
-            func.count(Appointment.id).label("total_appointments"),
-            func.sum(Appointment.price_charged).label("total_revenue"),
-            func.sum(Appointment.tip_amount).label("total_tips"),
-        )
-        .filter(Appointment.date_time >= start_date, Appointment.date_time <= end_date)
-        .first()
-    )
+    # Total appointments and revenue in period (whole days come from the rollup)
+    totals = sum_revenue(start_date=start_date, end_date=end_date)
+    result = totals[0] if totals else {}
 
-    total_appointments = result.total_appointments or 0
-    total_revenue = float(result.total_revenue or 0)
-    total_tips = float(result.total_tips or 0)
+    total_appointments = result.get("appointment_count", 0)
+    total_revenue = float(result.get("revenue", 0))
+    total_tips = float(result.get("tips", 0))
 
     avg_per_tech = total_revenue / total_techs if total_techs > 0 else 0
 
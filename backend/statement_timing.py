@@ -0,0 +1,70 @@
+"""
+One timer for every SQL statement an engine executes.
+
+subscribe() attaches a callback to an engine; the first subscription hooks
+the engine's cursor events, which time each statement on a per-connection
+stack and pass it to every callback once it completes. Failed statements
+never reach the callbacks. /metrics, the slow-query and N+1 logs and
+track_queries() all subscribe here rather than timing statements themselves.
+"""
+
+import time
+import weakref
+from typing import Callable
+
+from sqlalchemy import event
+
+# Engine -> callbacks, in subscription order
+_subscribers = weakref.WeakKeyDictionary()
+
+
+def subscribe(engine, callback: Callable) -> None:
+    """
+    Call callback(statement, parameters, executemany, seconds) after every statement.
+
+    Args:
+        engine: Engine whose statements to time
+        callback: Called on the executing thread once a statement completes
+    """
+    callbacks = _subscribers.get(engine)
+    if callbacks is None:
+        callbacks = _subscribers[engine] = []
+        event.listen(engine, "before_cursor_execute", _start_timer)
+        event.listen(engine, "after_cursor_execute", _stop_timer(callbacks))
+        event.listen(engine, "handle_error", _drop_timer)
+    callbacks.append(callback)
+
+
+def unsubscribe(engine, callback: Callable) -> None:
+    """Stop calling a callback given to subscribe(); unknown callbacks are ignored."""
+    callbacks = _subscribers.get(engine, [])
+    if callback in callbacks:
+        callbacks.remove(callback)
+
+
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+
+def _stop_timer(callbacks):
+    """
+    An after_cursor_execute listener passing each timed statement to callbacks.
+
+    The listener holds the engine's callback list itself: connections opened
+    through execution_options() report a derived engine, not the one subscribed.
+    """
+
+    def stop(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["statement_started"].pop()
+        # A copy, so callbacks may unsubscribe while being called
+        for callback in tuple(callbacks):
+            callback(statement, parameters, executemany, elapsed)
+
+    return stop
+
+
+def _drop_timer(exception_context):
+    # after_cursor_execute does not fire for a failed statement
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("statement_started"):
+        connection.info["statement_started"].pop()
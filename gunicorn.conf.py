@@ -0,0 +1,31 @@
+"""
+Gunicorn settings for Salon Pulse.
+
+Every value can be overridden from the environment:
+
+    SALON_BIND      Address to listen on (default 127.0.0.1:8000)
+    SALON_WORKERS   Worker processes (default 2 x CPU cores + 1)
+    SALON_THREADS   Threads per worker (default 4)
+    SALON_TIMEOUT   Seconds before a silent worker is restarted (default 60)
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get("SALON_BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("SALON_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("SALON_THREADS", 4))
+timeout = int(os.environ.get("SALON_TIMEOUT", 60))
+worker_class = "gthread"
+
+# Load the app once in the master; workers inherit it through fork
+preload_app = True
+
+accesslog = "-"
+
+
+def post_fork(server, worker):
+    """Make sure no worker reuses a database connection opened by the master."""
+    from backend.models import dispose_engines
+
+    dispose_engines()
@@ -11,6 +11,10 @@ import sys
 # Add the project root to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+import backend.api  # noqa: E402, F401
+import backend.exports  # noqa: E402, F401
+import backend.metrics  # noqa: E402, F401
+import backend.query_tracking  # noqa: E402, F401
 import backend.routes  # noqa: E402, F401
 
 # Import the Flask app and routes to register them
@@ -0,0 +1,155 @@
+"""
+Benchmark SQLite profiles under a mixed read/write load.
+
+For each profile a scratch database is seeded with appointments, then reader
+threads run the /customers style full-ledger aggregate while writer threads
+record appointments through the single-transaction write path. Reports reads/s,
+writes/s and how many operations failed with "database is locked".
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.appointment_writes import record_appointment  # noqa: E402
+from backend.models import Appointment, Customer, Service, Technician, db  # noqa: E402
+from backend.sqlite_profile import PROFILES, apply_profile  # noqa: E402
+
+
+def seed(Session, appointments):
+    with Session() as session:
+        technician = Technician(name="Bench Tech")
+        service = Service(name="Bench Service", base_price=40.0)
+        session.add_all([technician, service])
+        session.flush()
+        customers = [Customer(first_name="Client", phone=f"555-{i:05d}") for i in range(1000)]
+        session.add_all(customers)
+        session.flush()
+
+        start = datetime.now() - timedelta(days=365)
+        session.execute(
+            db.insert(Appointment),
+            [
+                {
+                    "date_time": start + timedelta(minutes=7 * i),
+                    "customer_id": customers[i % len(customers)].id,
+                    "technician_id": technician.id,
+                    "service_id": service.id,
+                    "price_charged": 40.0,
+                    "tip_amount": 5.0,
+                }
+                for i in range(appointments)
+            ],
+        )
+        session.commit()
+        return technician.id, service.id
+
+
+def reader(Session, deadline, tally):
+    """Run the full-ledger aggregate until the deadline."""
+    with Session() as session:
+        while time.perf_counter() < deadline:
+            try:
+                session.query(
+                    Appointment.customer_id,
+                    func.count(Appointment.id),
+                    func.sum(Appointment.price_charged + Appointment.tip_amount),
+                    func.max(Appointment.date_time),
+                ).group_by(Appointment.customer_id).all()
+                session.rollback()  # End the read transaction
+                tally("reads")
+            except OperationalError:
+                session.rollback()
+                tally("locked")
+
+
+def writer(Session, deadline, tally, seed, technician_id, service_id):
+    """Record appointments for random phones until the deadline."""
+    rng = random.Random(seed)
+    with Session() as session:
+        while time.perf_counter() < deadline:
+            phone = f"555-{rng.randrange(2000):05d}"
+            try:
+                record_appointment(
+                    "Client", phone, technician_id, service_id, 40.0, session=session
+                )
+                tally("writes")
+            except OperationalError:
+                tally("locked")
+
+
+def run(profile, readers, writers, seconds, appointments, path):
+    engine = create_engine(f"sqlite:///{path}")
+    apply_profile(engine, profile)
+    db.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    technician_id, service_id = seed(Session, appointments)
+
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def tally(key):
+        with lock:
+            counts[key] += 1
+
+    threads = [
+        threading.Thread(target=reader, args=(Session, deadline, tally)) for _ in range(readers)
+    ]
+    threads += [
+        threading.Thread(
+            target=writer, args=(Session, deadline, tally, i, technician_id, service_id)
+        )
+        for i in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--profiles", nargs="+", choices=sorted(PROFILES), default=["stock", "wal"])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration per profile")
+    parser.add_argument("--appointments", type=int, default=50_000, help="Seeded ledger size")
+    args = parser.parse_args()
+
+    print(
+        f"📊 {args.readers} readers + {args.writers} writers for {args.seconds:g}s "
+        f"on {args.appointments:,} appointments"
+    )
+    for profile in args.profiles:
+        with tempfile.TemporaryDirectory() as scratch:
+            counts = run(
+                profile,
+                args.readers,
+                args.writers,
+                args.seconds,
+                args.appointments,
+                os.path.join(scratch, "bench.db"),
+            )
+        print(
+            f"  • {profile:<12} {counts['reads'] / args.seconds:8,.1f} reads/s  |  "
+            f"{counts['writes'] / args.seconds:8,.1f} writes/s  |  {counts['locked']:,} locked"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Benchmark every page, API endpoint and analytics function on generated datasets.
+
+For each seed profile a scratch SQLite database is filled by the seed generator,
+then every target is run --repeat times to record wall time (median and best),
+the number of SQL statements it executes and its peak Python memory. Results
+are written as JSON; pass an earlier run as --baseline to flag targets whose
+median time grew by more than --threshold or whose query count went up.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.app_factory import create_app  # noqa: E402
+from backend.customer_analytics import (  # noqa: E402
+    calculate_customer_ltv,
+    count_customers_by_segment,
+    get_at_risk_customers,
+    get_customer_favorites,
+    get_segment_summary,
+)
+from backend.models import db  # noqa: E402
+from backend.query_tracking import track_queries  # noqa: E402
+from backend.seeding import DEFAULT_SEED, PROFILES, seed_database  # noqa: E402
+from backend.staff_analytics import (  # noqa: E402
+    get_customer_retention_by_technician,
+    get_staff_summary_stats,
+    get_technician_performance,
+    get_technician_totals,
+    get_top_services_for_all_technicians,
+)
+
+FUNCTIONS = {
+    "calculate_customer_ltv": calculate_customer_ltv,
+    "get_segment_summary": get_segment_summary,
+    "get_at_risk_customers": get_at_risk_customers,
+    "count_customers_by_segment": count_customers_by_segment,
+    "get_customer_favorites": get_customer_favorites,
+    "get_technician_performance": get_technician_performance,
+    "get_technician_totals": get_technician_totals,
+    "get_customer_retention_by_technician": get_customer_retention_by_technician,
+    "get_top_services_for_all_technicians": get_top_services_for_all_technicians,
+    "get_staff_summary_stats": get_staff_summary_stats,
+}
+
+ROUTES = {
+    "dashboard": "/",
+    "appointment_history": "/appointments",
+    "customer_analytics": "/customers",
+    "staff_performance": "/staff-performance",
+    "api_performance": "/api/performance",
+    "api_trends": "/api/trends",
+    "api_segments": "/api/segments",
+    "api_retention": "/api/retention",
+    "api_staff_stats": "/api/staff-stats",
+}
+
+
+def measure(call, repeat, engine):
+    """Time a callable, count its SQL statements and trace its peak memory."""
+    call()  # Warm up caches and compiled statements
+    timings = []
+    with track_queries(engine) as queries:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - started)
+
+    # tracemalloc slows execution down, so memory gets a run of its own
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seconds": statistics.median(timings),
+        "best_seconds": min(timings),
+        "queries": len(queries) // repeat,
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def run_profile(profile, repeat, seed, path):
+    """Seed a scratch database with a profile and measure every target on it."""
+    # Without the page cache, repeated page loads measure the analytics, not cache hits
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", "PAGE_CACHE_SIZE": 0})
+    client = app.test_client()
+    results = {}
+
+    with app.app_context():
+        stats = seed_database(profile, seed=seed)
+        engine = db.engine
+
+        for name, function in FUNCTIONS.items():
+            results[name] = measure(function, repeat, engine)
+            db.session.remove()
+
+        for name, url in ROUTES.items():
+
+            def get(url=url):
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise RuntimeError(f"GET {url} returned {response.status_code}")
+
+            results[name] = measure(get, repeat, engine)
+
+    engine.dispose()
+    return {"appointments": stats["appointments"], "customers": stats["customers"], **results}
+
+
+def compare(results, baseline, threshold):
+    """
+    Find targets that got slower or issue more queries than in a baseline run.
+
+    Returns:
+        List of human-readable regression descriptions
+    """
+    regressions = []
+    for profile, targets in results["profiles"].items():
+        previous = baseline.get("profiles", {}).get(profile, {})
+        for name, current in targets.items():
+            before = previous.get(name)
+            if not isinstance(current, dict) or not isinstance(before, dict):
+                continue
+            if current["seconds"] > before["seconds"] * (1 + threshold):
+                regressions.append(
+                    f"{profile}/{name}: {before['seconds'] * 1000:.1f}ms → "
+                    f"{current['seconds'] * 1000:.1f}ms"
+                )
+            if current["queries"] > before["queries"]:
+                regressions.append(
+                    f"{profile}/{name}: {before['queries']} → {current['queries']} queries"
+                )
+    return regressions
+
+
+def git_commit():
+    """The current commit hash, or None outside a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--profiles", nargs="+", choices=list(PROFILES), default=["small", "medium", "large"]
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per target")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Dataset seed")
+    parser.add_argument("--output", default="bench_results.json", help="JSON file to write")
+    parser.add_argument("--baseline", help="Earlier JSON results to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="Allowed median slowdown (0.25 = 25%%)"
+    )
+    args = parser.parse_args()
+
+    results = {
+        "commit": git_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "profiles": {},
+    }
+    for profile in args.profiles:
+        print(f"📊 {profile}: seeding and measuring...")
+        with tempfile.TemporaryDirectory() as scratch:
+            path = os.path.join(scratch, "bench.db")
+            measured = run_profile(profile, args.repeat, args.seed, path)
+        results["profiles"][profile] = measured
+        print(f"   {measured['appointments']:,} appointments, {measured['customers']:,} customers")
+        for name, stats in measured.items():
+            if isinstance(stats, dict):
+                print(
+                    f"  • {name:<38} {stats['seconds'] * 1000:>9.1f}ms  |  "
+                    f"{stats['queries']:>4} queries  |  {stats['peak_kib']:>10,.0f} KiB peak"
+                )
+
+    with open(args.output, "w", encoding="utf-8") as stream:
+        json.dump(results, stream, indent=2)
+    print(f"✅ Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as stream:
+            regressions = compare(results, json.load(stream), args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regressions against {args.baseline}:")
+            for regression in regressions:
+                print(f"  • {regression}")
+            sys.exit(1)
+        print(f"✅ No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark appointment inserts per second under concurrent front-desk clients.
+
+Runs against a scratch SQLite file, never the salon database. Each client is a
+thread with its own session writing appointments for a random phone number
+from a shared pool, so new and returning customers are mixed. The "legacy"
+mode replays the old two-commit lookup/insert path for comparison.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.appointment_writes import record_appointment  # noqa: E402
+from backend.models import Appointment, Customer, Service, Technician, db  # noqa: E402
+
+
+def legacy_record(session, name, phone, technician_id, service_id, price):
+    """The pre-upsert /add path: look up, commit the customer, commit the appointment."""
+    customer = session.query(Customer).filter_by(phone=phone).first()
+    if not customer:
+        customer = Customer(first_name=name, phone=phone)
+        session.add(customer)
+        session.commit()
+    session.add(
+        Appointment(
+            customer_id=customer.id,
+            technician_id=technician_id,
+            service_id=service_id,
+            price_charged=price,
+            tip_amount=0.0,
+            payment_method="Cash",
+        )
+    )
+    session.commit()
+
+
+def run(mode, clients, per_client, phones, path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": 30})
+    db.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    with Session() as session:
+        technician = Technician(name="Bench Tech")
+        service = Service(name="Bench Service", base_price=40.0)
+        session.add_all([technician, service])
+        session.commit()
+        technician_id, service_id = technician.id, service.id
+
+    errors = []
+
+    def client(seed):
+        rng = random.Random(seed)
+        with Session() as session:
+            for _ in range(per_client):
+                phone = f"555-{rng.randrange(phones):05d}"
+                try:
+                    if mode == "legacy":
+                        legacy_record(session, "Client", phone, technician_id, service_id, 40.0)
+                    else:
+                        record_appointment(
+                            "Client", phone, technician_id, service_id, 40.0, session=session
+                        )
+                except IntegrityError:
+                    # Two legacy clients inserted the same new phone at once
+                    session.rollback()
+                    errors.append(phone)
+
+    threads = [threading.Thread(target=client, args=(seed,)) for seed in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - started
+
+    with Session() as session:
+        written = session.query(Appointment).count()
+    engine.dispose()
+    return written, seconds, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mode", choices=["upsert", "legacy", "both"], default="both")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent writers")
+    parser.add_argument("--per-client", type=int, default=250, help="Appointments per writer")
+    parser.add_argument("--phones", type=int, default=500, help="Distinct customer phones")
+    args = parser.parse_args()
+
+    modes = ["legacy", "upsert"] if args.mode == "both" else [args.mode]
+    print(f"📊 {args.clients} clients × {args.per_client} appointments, {args.phones} phones")
+    for mode in modes:
+        with tempfile.TemporaryDirectory() as scratch:
+            written, seconds, errors = run(
+                mode,
+                args.clients,
+                args.per_client,
+                args.phones,
+                os.path.join(scratch, "bench.db"),
+            )
+        print(
+            f"  • {mode:<7} {written:,} rows in {seconds:.2f}s  |  "
+            f"{written / seconds:,.0f} inserts/s  |  {len(errors)} failed on duplicate phone"
+        )
+
+
+if __name__ == "__main__":
+    main()
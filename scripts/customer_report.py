@@ -6,19 +6,20 @@ import sys
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from backend.customer_analytics import calculate_customer_ltv, get_segment_summary  # noqa: E402
+from backend.customer_analytics import get_ltv_snapshot  # noqa: E402
 
 if __name__ == "__main__":
     print("\n" + "=" * 60)
     print("💎 CUSTOMER LIFETIME VALUE ANALYSIS")
     print("=" * 60)
 
-    customers = calculate_customer_ltv()
+    snapshot = get_ltv_snapshot()
+    customers = snapshot["customers"]
 
     # Print segment summary
     print("\n📊 CUSTOMER SEGMENTS")
     print("-" * 60)
-    segment_summary = get_segment_summary()
+    segment_summary = snapshot["segment_summary"]
 
     segment_order = ["VIP", "Champion", "Loyal", "Promising", "At-Risk", "Needs Attention", "Lost"]
     for segment in segment_order:
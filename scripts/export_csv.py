@@ -0,0 +1,41 @@
+"""Stream the customer LTV metrics or the appointment ledger to a CSV file."""
+
+import argparse
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.exports import EXPORT_BATCH_SIZE, EXPORTS, parse_filters  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("export", choices=sorted(EXPORTS), help="What to export")
+    parser.add_argument("--start", help="First day to include (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Last day to include (YYYY-MM-DD)")
+    parser.add_argument("--technician", help="Only this technician's appointments (id)")
+    parser.add_argument("--output", help="CSV file to write (default: stdout)")
+    parser.add_argument(
+        "--batch-size", type=int, default=EXPORT_BATCH_SIZE, help="Rows fetched per round trip"
+    )
+    args = parser.parse_args()
+
+    try:
+        filters = parse_filters(args.start, args.end, args.technician)
+    except ValueError:
+        parser.error("dates must be YYYY-MM-DD and --technician a technician id")
+
+    chunks = EXPORTS[args.export](batch_size=args.batch_size, **filters)
+    if args.output is None:
+        sys.stdout.writelines(chunks)
+        return
+
+    with open(args.output, "w", encoding="utf-8", newline="") as stream:
+        stream.writelines(chunks)
+    print(f"✅ Exported {args.export} to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
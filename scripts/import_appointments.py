@@ -0,0 +1,49 @@
+"""Stream a CSV or NDJSON export of appointments into the salon database."""
+
+import argparse
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.importer import BATCH_SIZE, READERS, import_appointments  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", help="CSV or NDJSON file to import")
+    parser.add_argument(
+        "--format",
+        choices=sorted(READERS),
+        help="File format (default: from the file extension)",
+    )
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows per transaction")
+    args = parser.parse_args()
+
+    file_format = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+
+    def report(stats):
+        print(
+            f"  • {stats['rows']:,} rows  |  {stats['customers_created']:,} new customers  |  "
+            f"{stats['rows_per_second']:,.0f} rows/s"
+        )
+
+    print(f"📥 Importing {args.path} ({file_format})...")
+    with open(args.path, encoding="utf-8", newline="") as stream:
+        try:
+            stats = import_appointments(
+                READERS[file_format](stream), batch_size=args.batch_size, progress=report
+            )
+        except ValueError as exc:
+            print(f"❌ {exc}")
+            sys.exit(1)
+
+    print(
+        f"✅ Imported {stats['rows']:,} appointments in {stats['seconds']:.1f}s "
+        f"({stats['rows_per_second']:,.0f} rows/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
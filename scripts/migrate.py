@@ -0,0 +1,20 @@
+"""Upgrade the salon database schema in place (no data is dropped)."""
+
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.migrations import upgrade_schema  # noqa: E402
+
+if __name__ == "__main__":
+    print("🔄 Upgrading database schema...")
+    created = upgrade_schema()
+
+    if created:
+        for name in created:
+            print(f"  • Created {name}")
+        print(f"✅ Schema upgraded ({len(created)} objects created)")
+    else:
+        print("✅ Schema already up to date")
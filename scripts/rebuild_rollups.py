@@ -0,0 +1,18 @@
+"""Rebuild the daily revenue rollup and the customer stats from the appointment ledger."""
+
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.customer_stats import rebuild_customer_stats  # noqa: E402
+from backend.rollups import rebuild_daily_revenue  # noqa: E402
+
+if __name__ == "__main__":
+    print("🔄 Rebuilding daily revenue rollup...")
+    rows = rebuild_daily_revenue()
+    print(f"✅ Rollup rebuilt ({rows} day/technician/service/payment rows)")
+    print("🔄 Rebuilding customer stats...")
+    rows = rebuild_customer_stats()
+    print(f"✅ Customer stats rebuilt ({rows} customers)")
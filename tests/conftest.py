@@ -13,7 +13,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 from datetime import datetime, timedelta
 
 # Import routes to register them with the app
-from backend import routes  # noqa: F401
+from backend import api, exports, metrics, query_tracking, routes  # noqa: F401
 from backend.models import Appointment, Customer, Service, Technician, app, db
 
 
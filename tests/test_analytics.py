@@ -2,18 +2,27 @@
 Unit tests for customer analytics module.
 """
 
+import itertools
 from datetime import datetime, timedelta
 
 import pytest
+from sqlalchemy import insert, select
 
 from backend.customer_analytics import (
+    SegmentThresholds,
     calculate_customer_ltv,
     classify_customer,
+    count_customers_by_segment,
+    get_at_risk_customers,
+    get_customer_favorites,
     get_favorite_services,
     get_favorite_technician,
+    get_ltv_snapshot,
     get_segment_summary,
+    segment_case,
 )
-from backend.models import Appointment
+from backend.models import Appointment, Customer, CustomerStats, Service, Technician
+from backend.query_tracking import track_queries
 
 
 class TestCustomerSegmentation:
@@ -69,6 +78,120 @@ class TestCustomerSegmentation:
         assert segment == "Needs Attention"
 
 
+class TestSegmentCase:
+    """Tests that the SQL segmentation matches classify_customer()."""
+
+    NOW = datetime(2024, 6, 1, 12, 0, 0, 500_000)
+
+    @pytest.fixture
+    def stats_grid(self, db_session):
+        """Customer stats around every threshold, down to the microsecond."""
+        since_last = [
+            timedelta(0),
+            timedelta(days=29) - timedelta(microseconds=1),
+            timedelta(days=29),
+            timedelta(days=45, hours=23),
+            timedelta(days=46),
+            timedelta(days=61) - timedelta(microseconds=1),
+            timedelta(days=61),
+        ]
+        grid = itertools.product([1, 3, 4, 5, 8], since_last, [299.99, 300.0], [27, 28, 42, 43])
+        rows = []
+        for i, (visits, since, spend, gap) in enumerate(grid, start=1):
+            last_visit = self.NOW - since
+            gap_sum = gap * (visits - 1) + (visits > 2)  # Averages just above whole days too
+            rows.append(
+                {
+                    "customer_id": i,
+                    "visit_count": visits,
+                    "total_revenue": spend - 20.0,
+                    "total_tips": 20.0,
+                    "first_visit": last_visit - timedelta(days=gap_sum if visits > 1 else gap),
+                    "last_visit": last_visit,
+                    "gap_sum": gap_sum,
+                    "first_half_gap_sum": 0,
+                    "second_half_gaps": [],
+                    "service_counts": {},
+                    "technician_counts": {},
+                }
+            )
+        db_session.session.execute(
+            insert(Customer),
+            [
+                {"id": row["customer_id"], "first_name": "C", "phone": str(row["customer_id"])}
+                for row in rows
+            ],
+        )
+        db_session.session.execute(insert(CustomerStats), rows)
+        db_session.session.commit()
+        return rows
+
+    def _expected(self, row, thresholds):
+        days_as_customer = (self.NOW - row["first_visit"]).days
+        visits = row["visit_count"]
+        return classify_customer(
+            visits,
+            (self.NOW - row["last_visit"]).days,
+            row["total_revenue"] + row["total_tips"],
+            row["gap_sum"] / (visits - 1) if visits > 1 else days_as_customer,
+            thresholds,
+        )
+
+    @pytest.mark.parametrize(
+        "thresholds, segments",
+        [
+            (SegmentThresholds(), 7),
+            (SegmentThresholds(high_spend=250, frequent_visits=3, regular_frequency=42.5), 5),
+        ],
+    )
+    def test_matches_classify_customer(self, db_session, stats_grid, thresholds, segments):
+        """Test every grid customer against the Python rules."""
+        rows = db_session.session.execute(
+            select(CustomerStats.customer_id, segment_case(self.NOW, thresholds)).order_by(
+                CustomerStats.customer_id
+            )
+        ).all()
+
+        assert [segment for _, segment in rows] == [
+            self._expected(row, thresholds) for row in stats_grid
+        ]
+        assert len({segment for _, segment in rows}) == segments
+
+    def test_counts_and_filter(self, db_session, ledger_for_segments):
+        """Test SQL counts and filters against the Python segments of the LTV list."""
+        customers = calculate_customer_ltv()
+        summary = get_segment_summary(customers)
+
+        assert count_customers_by_segment() == {s: v["count"] for s, v in summary.items()}
+        for segment in summary:
+            assert calculate_customer_ltv(segment=segment) == [
+                c for c in customers if c["segment"] == segment
+            ]
+
+    @pytest.fixture
+    def ledger_for_segments(self, db_session, sample_technician, sample_service):
+        """Customers with recent, lapsed and lost visit histories."""
+        now = datetime.now()
+        for i, (visits, interval, since) in enumerate(
+            [(1, 0, 2), (6, 14, 3), (6, 20, 50), (2, 30, 70), (4, 40, 20)]
+        ):
+            customer = Customer(first_name=f"S{i}", phone=f"555-20{i:02d}")
+            db_session.session.add(customer)
+            db_session.session.flush()
+            for visit in range(visits):
+                db_session.session.add(
+                    Appointment(
+                        date_time=now - timedelta(days=since + visit * interval),
+                        customer_id=customer.id,
+                        technician_id=sample_technician.id,
+                        service_id=sample_service.id,
+                        price_charged=60.00,
+                        tip_amount=10.00,
+                    )
+                )
+        db_session.session.commit()
+
+
 class TestLTVCalculation:
     """Tests for LTV calculation."""
 
@@ -215,6 +338,68 @@ class TestLTVCalculation:
         assert "visit_trend" in customers[0]
 
 
+class TestLTVQueryCount:
+    """Tests that the LTV engine reads the ledger set-wise."""
+
+    @pytest.fixture
+    def ledger(self, db_session):
+        """Three customers with visits spread over two technicians and two services."""
+        techs = [Technician(name="Lisa"), Technician(name="Tom")]
+        services = [
+            Service(name="Gel Manicure", base_price=35.00),
+            Service(name="Spa Pedicure", base_price=45.00),
+        ]
+        customers = [Customer(first_name=f"Client{i}", phone=f"555-01{i:02d}") for i in range(3)]
+        db_session.session.add_all(techs + services + customers)
+        db_session.session.commit()
+
+        now = datetime.now()
+        for i, customer in enumerate(customers):
+            for visit in range(i + 2):
+                db_session.session.add(
+                    Appointment(
+                        customer_id=customer.id,
+                        technician_id=techs[visit % 2].id,
+                        service_id=services[(visit + i) % 2].id,
+                        date_time=now - timedelta(days=80 - visit * (10 + i * 5)),
+                        price_charged=40.00 + i,
+                        tip_amount=6.00,
+                        payment_method="Card",
+                    )
+                )
+        db_session.session.commit()
+        return customers
+
+    def test_query_count_is_constant(self, ledger):
+        """The whole calculation runs in a single query regardless of customer count."""
+        with track_queries() as queries:
+            customers = calculate_customer_ltv()
+
+        assert len(customers) == 3
+        assert len(queries) <= 1
+
+    def test_metrics_per_customer(self, ledger):
+        """Metrics are grouped per customer and ties keep first-seen order."""
+        customers = {c["name"]: c for c in calculate_customer_ltv()}
+
+        client0 = customers["Client0"]
+        assert client0["total_visits"] == 2
+        assert client0["total_spend"] == 92.00
+        assert client0["avg_days_between_visits"] == 10.0
+        assert client0["favorite_services"] == ["Gel Manicure", "Spa Pedicure"]
+        assert client0["favorite_technician"] == "Lisa"
+
+        client2 = customers["Client2"]
+        assert client2["total_visits"] == 4
+        assert client2["favorite_services"] == ["Gel Manicure", "Spa Pedicure"]
+        assert client2["visit_trend"] == "Stable"
+
+    def test_sorted_by_total_spend(self, ledger):
+        """Customers come back highest spend first."""
+        spends = [c["total_spend"] for c in calculate_customer_ltv()]
+        assert spends == sorted(spends, reverse=True)
+
+
 class TestServicePreferences:
     """Tests for service preference functions."""
 
@@ -244,6 +429,85 @@ class TestServicePreferences:
         assert favorite == "None"
 
 
+class TestCustomerFavorites:
+    """Tests for the favourites of many customers."""
+
+    @pytest.fixture
+    def visits(self, db_session, sample_customer):
+        """Two customers with tied and untied services and technicians."""
+        session = db_session.session
+        lisa, tom = Technician(name="Lisa"), Technician(name="Tom")
+        gel, spa, file_ = (
+            Service(name="Gel", base_price=30),
+            Service(name="Spa", base_price=40),
+            Service(name="File", base_price=10),
+        )
+        other = Customer(first_name="Other", phone="555-0101")
+        session.add_all([lisa, tom, gel, spa, file_, other])
+        session.flush()
+
+        base = datetime(2024, 4, 1, 10, 0)
+        history = [
+            # Spa and Gel tie on two visits; Spa came first. Tom beats Lisa.
+            (sample_customer, 0, spa, lisa),
+            (sample_customer, 1, gel, tom),
+            (sample_customer, 2, gel, tom),
+            (sample_customer, 3, spa, tom),
+            (sample_customer, 4, file_, lisa),
+            # Gel and File first seen at the same time: Gel was recorded first
+            (other, 0, gel, lisa),
+            (other, 0, file_, lisa),
+        ]
+        for customer, day, service, technician in history:
+            session.add(
+                Appointment(
+                    date_time=base + timedelta(days=day),
+                    customer_id=customer.id,
+                    service_id=service.id,
+                    technician_id=technician.id,
+                    price_charged=service.base_price,
+                )
+            )
+            session.flush()
+        session.commit()
+        return sample_customer, other
+
+    def test_ranking_and_ties(self, visits):
+        """Test most visits first, then the name visited first."""
+        customer, other = visits
+
+        assert get_customer_favorites() == {
+            customer.id: {"favorite_services": ["Spa", "Gel"], "favorite_technician": "Tom"},
+            other.id: {"favorite_services": ["Gel", "File"], "favorite_technician": "Lisa"},
+        }
+
+    def test_matches_counter(self, visits, db_session):
+        """Test that the mapping agrees with the per-customer Counter helpers."""
+        for customer in visits:
+            appointments = (
+                db_session.session.query(Appointment)
+                .filter_by(customer_id=customer.id)
+                .order_by(Appointment.date_time, Appointment.id)
+                .all()
+            )
+
+            assert get_customer_favorites([customer.id]) == {
+                customer.id: {
+                    "favorite_services": get_favorite_services(appointments),
+                    "favorite_technician": get_favorite_technician(appointments),
+                }
+            }
+
+    def test_single_query(self, visits):
+        """Test that every customer's favourites cost one read of customer_stats."""
+        with track_queries() as queries:
+            get_customer_favorites()
+
+        assert len(queries) == 1
+        assert "customer_stats" in queries[0].statement
+        assert "appointment" not in queries[0].statement
+
+
 class TestSegmentSummary:
     """Tests for segment summary function."""
 
@@ -258,3 +522,81 @@ class TestSegmentSummary:
             assert "count" in segment_data
             assert "total_revenue" in segment_data
             assert "avg_spend" in segment_data
+
+    def test_segment_summary_from_precomputed(self, db_session, sample_appointment):
+        """Test summarizing an existing LTV result."""
+        customers = calculate_customer_ltv()
+        summary = get_segment_summary(customers)
+
+        assert sum(s["count"] for s in summary.values()) == len(customers)
+
+
+class TestLTVSnapshot:
+    """Tests for the shared LTV snapshot."""
+
+    def test_snapshot_derives_from_one_result(self, db_session, sample_appointment):
+        """Test that every summary field agrees with the customer list."""
+        snapshot = get_ltv_snapshot()
+        customers = snapshot["customers"]
+
+        assert snapshot["total_customers"] == len(customers) == 1
+        assert snapshot["total_ltv"] == 40.00
+        assert snapshot["avg_ltv"] == 40.00
+        assert snapshot["segment_labels"] == list(snapshot["segment_summary"].keys())
+        assert sum(snapshot["segment_counts"]) == 1
+        assert snapshot["vip_count"] == 0
+
+    def test_snapshot_empty(self, db_session):
+        """Test snapshot with no appointments."""
+        snapshot = get_ltv_snapshot()
+
+        assert snapshot["customers"] == []
+        assert snapshot["avg_ltv"] == 0
+        assert snapshot["at_risk_count"] == 0
+
+
+class TestAtRiskCustomers:
+    """Tests for the retention alert query."""
+
+    @pytest.fixture
+    def visits(self, db_session, sample_technician, sample_service):
+        """Customers last seen 5, 45 and 90 days ago."""
+        for i, days_ago in enumerate([5, 45, 90]):
+            customer = Customer(first_name=f"Client{days_ago}", phone=f"555-02{i:02d}")
+            db_session.session.add(customer)
+            db_session.session.commit()
+            for extra in (days_ago + 20, days_ago):
+                db_session.session.add(
+                    Appointment(
+                        customer_id=customer.id,
+                        technician_id=sample_technician.id,
+                        service_id=sample_service.id,
+                        date_time=datetime.now() - timedelta(days=extra, hours=1),
+                        price_charged=35.00,
+                        tip_amount=5.00,
+                    )
+                )
+        db_session.session.commit()
+
+    def test_threshold_and_order(self, visits):
+        """Test that only lapsed customers are returned, longest absence first."""
+        at_risk = get_at_risk_customers()
+
+        assert [c["name"] for c in at_risk] == ["Client90", "Client45"]
+        assert [c["days_missed"] for c in at_risk] == [90, 45]
+
+    def test_custom_threshold(self, visits):
+        """Test a longer alert window."""
+        at_risk = get_at_risk_customers(days=60)
+
+        assert [c["name"] for c in at_risk] == ["Client90"]
+
+    def test_single_query(self, visits):
+        """Test that the alert list costs one query."""
+        with track_queries() as queries:
+            get_at_risk_customers()
+
+        assert len(queries) == 1
+        # Read from the per-customer stats, not by scanning the ledger
+        assert "customer_stats" in queries[0].statement
+        assert "appointment" not in queries[0].statement
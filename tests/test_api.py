@@ -0,0 +1,115 @@
+"""
+Integration tests for the JSON analytics API.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from backend.models import Appointment
+from backend.query_tracking import track_queries
+
+ENDPOINTS = [
+    "/api/performance",
+    "/api/trends",
+    "/api/segments",
+    "/api/retention",
+    "/api/staff-stats",
+]
+
+
+class TestAPIEndpoints:
+    """Tests for the JSON payloads."""
+
+    @pytest.mark.parametrize("url", ENDPOINTS)
+    def test_endpoint_returns_json(self, client, sample_appointment, url):
+        """Test that every endpoint answers JSON with an ETag."""
+        response = client.get(url)
+
+        assert response.status_code == 200
+        assert response.is_json
+        assert response.headers["ETag"]
+        assert "no-cache" in response.headers["Cache-Control"]
+
+    def test_performance_payload(self, client, sample_appointment):
+        """Test the performance payload."""
+        data = client.get("/api/performance").get_json()
+
+        assert data[0]["name"] == "Test Tech"
+        assert data[0]["total_revenue"] == 35.00
+
+    def test_trends_payload(self, client, sample_appointment, sample_technician):
+        """Test the trends payload honours the technician filter."""
+        data = client.get(f"/api/trends?period=month&tech_id={sample_technician.id}").get_json()
+
+        assert data["tech_labels"] == ["Test Tech"]
+        assert data["trend_values"] == [40.00]
+
+    def test_segments_payload(self, client, sample_appointment):
+        """Test the segments payload is a summary without the customer list."""
+        data = client.get("/api/segments").get_json()
+
+        assert data["total_customers"] == 1
+        assert "customers" not in data
+        assert sum(data["segment_counts"]) == 1
+
+    def test_segment_customers_payload(self, client, sample_appointment):
+        """Test listing the customers of one segment, and unknown segments."""
+        data = client.get("/api/segments/Promising").get_json()
+
+        assert data["segment"] == "Promising"
+        assert [c["phone"] for c in data["customers"]] == ["555-0000"]
+        assert client.get("/api/segments/VIP").get_json()["customers"] == []
+        assert client.get("/api/segments/Nobody").status_code == 404
+
+
+class TestConditionalGet:
+    """Tests for ETag revalidation."""
+
+    def test_not_modified(self, client, sample_appointment):
+        """Test that a matching If-None-Match answers 304 with no body."""
+        etag = client.get("/api/staff-stats").headers["ETag"]
+
+        response = client.get("/api/staff-stats", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.data == b""
+        assert response.headers["ETag"] == etag
+
+    def test_not_modified_skips_computation(self, client, sample_appointment):
+        """Test that revalidation only costs the ledger version query."""
+        etag = client.get("/api/segments").headers["ETag"]
+
+        with track_queries() as queries:
+            response = client.get("/api/segments", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert len(queries) == 1
+
+    def test_write_changes_etag(self, client, db_session, sample_appointment):
+        """Test that a new appointment invalidates the ETag."""
+        etag = client.get("/api/performance").headers["ETag"]
+
+        db_session.session.add(
+            Appointment(
+                date_time=datetime.now(),
+                customer_id=sample_appointment.customer_id,
+                technician_id=sample_appointment.technician_id,
+                service_id=sample_appointment.service_id,
+                price_charged=50.00,
+                tip_amount=10.00,
+            )
+        )
+        db_session.session.commit()
+
+        response = client.get("/api/performance", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert response.get_json()[0]["total_revenue"] == 85.00
+
+    def test_params_change_etag(self, client, sample_appointment):
+        """Test that different query parameters get different ETags."""
+        week = client.get("/api/performance?days=7").headers["ETag"]
+        month = client.get("/api/performance?days=30").headers["ETag"]
+
+        assert week != month
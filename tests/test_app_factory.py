@@ -0,0 +1,102 @@
+"""
+Tests for the application factory and fork safety.
+"""
+
+import os
+
+import pytest
+
+from backend import create_app
+from backend.models import Service, Technician
+from backend.models import app as default_app
+from backend.models import db, dispose_engines
+
+
+@pytest.fixture
+def factory_app(tmp_path):
+    """Application built by the factory on its own database file."""
+    app = create_app(
+        {"TESTING": True, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'factory.db'}"}
+    )
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+class TestCreateApp:
+    """Tests for create_app."""
+
+    def test_serves_all_views(self, factory_app):
+        """Test that pages, the JSON API and /metrics are registered."""
+        client = factory_app.test_client()
+
+        assert client.get("/").status_code == 200
+        assert client.get("/customers").status_code == 200
+        assert client.get("/api/segments").status_code == 200
+        assert 'endpoint="main.dashboard"' in client.get("/metrics").text
+
+    def test_own_engine(self, factory_app):
+        """Test that each application gets its own engine and config."""
+        with factory_app.app_context():
+            factory_engine = db.engine
+        with default_app.app_context():
+            default_engine = db.engine
+
+        assert factory_engine is not default_engine
+        assert "factory.db" in str(factory_engine.url)
+
+    def test_writes_land_in_own_database(self, factory_app):
+        """Test that views use the factory app's database, not the default one."""
+        client = factory_app.test_client()
+        with factory_app.app_context():
+            tech = Technician(name="Factory Tech")
+            service = Service(name="Factory Service", base_price=20.0)
+            db.session.add_all([tech, service])
+            db.session.commit()
+            form = {
+                "technician_id": tech.id,
+                "service_id": service.id,
+                "customer_name": "Ivy",
+                "customer_phone": "555-9001",
+                "price": "20",
+                "tip": "0",
+            }
+
+        client.post("/add", data=form)
+
+        data = client.get("/api/segments").get_json()
+        assert data["total_customers"] == 1
+
+
+class TestForkSafety:
+    """Tests for dropping inherited connections after fork."""
+
+    def test_dispose_engines_empties_pool(self, factory_app):
+        """Test that pooled connections are dropped."""
+        with factory_app.app_context():
+            engine = db.engine
+            with engine.connect():
+                pass
+            assert engine.pool.checkedin() == 1
+
+            dispose_engines()
+
+            assert engine.pool.checkedin() == 0
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+    def test_child_starts_with_empty_pool(self, factory_app):
+        """Test that a forked child does not inherit pooled connections."""
+        with factory_app.app_context():
+            engine = db.engine
+            with engine.connect():
+                pass
+
+            pid = os.fork()
+            if pid == 0:  # pragma: no cover - runs in the child
+                os._exit(0 if engine.pool.checkedin() == 0 else 1)
+
+            _, status = os.waitpid(pid, 0)
+            assert os.waitstatus_to_exitcode(status) == 0
+            assert engine.pool.checkedin() == 1  # Parent keeps its connection
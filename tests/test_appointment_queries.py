@@ -0,0 +1,182 @@
+"""
+Unit tests for the appointment history read paths.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.appointment_queries import (
+    decode_cursor,
+    encode_cursor,
+    get_appointment_page,
+    get_chart_data,
+)
+from backend.models import Appointment, Technician
+from backend.query_tracking import track_queries
+
+
+@pytest.fixture
+def ledger(db_session, sample_technician, sample_service, sample_customer):
+    """Seven appointments a day apart, two of them sharing a timestamp."""
+    base = datetime(2024, 3, 1, 10, 0)
+    times = [base + timedelta(days=i) for i in range(6)] + [base + timedelta(days=5)]
+    appointments = [
+        Appointment(
+            date_time=when,
+            customer_id=sample_customer.id,
+            technician_id=sample_technician.id,
+            service_id=sample_service.id,
+            price_charged=30.00 + i,
+            tip_amount=5.00,
+        )
+        for i, when in enumerate(times)
+    ]
+    db_session.session.add_all(appointments)
+    db_session.session.commit()
+    return appointments
+
+
+class TestCursor:
+    """Tests for cursor encoding."""
+
+    def test_round_trip(self, sample_appointment):
+        """Test that a cursor decodes back to its key."""
+        cursor = encode_cursor(sample_appointment)
+
+        assert decode_cursor(cursor) == (sample_appointment.date_time, sample_appointment.id)
+
+    def test_malformed_cursor(self):
+        """Test that garbage cursors are rejected."""
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+
+
+class TestAppointmentPage:
+    """Tests for keyset pagination."""
+
+    def test_first_page(self, ledger):
+        """Test that the first page holds the newest rows."""
+        page = get_appointment_page(page_size=3)
+
+        assert [a.id for a in page["rows"]] == [ledger[6].id, ledger[5].id, ledger[4].id]
+        assert page["prev_cursor"] is None
+        assert page["next_cursor"] == encode_cursor(ledger[4])
+
+    def test_walk_forward_and_back(self, ledger):
+        """Test following next links to the end and prev links back."""
+        seen = []
+        page = get_appointment_page(page_size=3)
+        pages = [page]
+        while page["next_cursor"]:
+            seen.extend(a.id for a in page["rows"])
+            page = get_appointment_page(after=page["next_cursor"], page_size=3)
+            pages.append(page)
+        seen.extend(a.id for a in page["rows"])
+
+        # Every row exactly once, ties on date_time broken by id
+        assert seen == [a.id for a in sorted(ledger, key=lambda a: (a.date_time, a.id))][::-1]
+
+        previous = get_appointment_page(before=page["prev_cursor"], page_size=3)
+        assert [a.id for a in previous["rows"]] == [a.id for a in pages[-2]["rows"]]
+
+    def test_back_to_first_page(self, ledger):
+        """Test that walking back to the start drops the prev link."""
+        second = get_appointment_page(
+            after=get_appointment_page(page_size=3)["next_cursor"], page_size=3
+        )
+        first = get_appointment_page(before=second["prev_cursor"], page_size=3)
+
+        assert first["prev_cursor"] is None
+        assert first["next_cursor"] is not None
+        assert len(first["rows"]) == 3
+
+    def test_technician_filter(self, ledger, db_session):
+        """Test that pages only include the selected technician."""
+        other = Technician(name="Other Tech")
+        db_session.session.add(other)
+        db_session.session.commit()
+
+        page = get_appointment_page(technician_id=other.id)
+        assert page["rows"] == []
+        assert page["next_cursor"] is None
+
+    def test_page_size_capped(self, ledger):
+        """Test that the page size is clamped to at least one row."""
+        page = get_appointment_page(page_size=0)
+        assert len(page["rows"]) == 1
+
+
+class TestChartData:
+    """Tests for the chart series."""
+
+    def test_daily_trend(self, ledger):
+        """Test revenue bucketed per day."""
+        charts = get_chart_data(period="day")
+
+        assert charts["trend_labels"][0] == "2024-03-01"
+        assert len(charts["trend_labels"]) == 6
+        assert charts["trend_values"][-1] == (35.00 + 5.00) + (36.00 + 5.00)
+
+    def test_monthly_trend(self, ledger):
+        """Test revenue bucketed per month."""
+        charts = get_chart_data(period="month")
+
+        assert charts["trend_labels"] == ["2024-03"]
+        assert charts["tech_labels"] == ["Test Tech"]
+        assert charts["service_values"] == charts["trend_values"]
+
+    def test_technician_filter(self, ledger, db_session, sample_customer, sample_service):
+        """Test that the tech filter applies to every series."""
+        other = Technician(name="Other Tech")
+        db_session.session.add(other)
+        db_session.session.commit()
+        db_session.session.add(
+            Appointment(
+                date_time=datetime(2024, 4, 2, 9, 0),
+                customer_id=sample_customer.id,
+                technician_id=other.id,
+                service_id=sample_service.id,
+                price_charged=500.00,
+                tip_amount=0.0,
+            )
+        )
+        db_session.session.commit()
+
+        everyone = get_chart_data(period="month")
+        assert everyone["trend_labels"] == ["2024-03", "2024-04"]
+        assert everyone["tech_labels"] == ["Other Tech", "Test Tech"]
+
+        filtered = get_chart_data(period="month", technician_id=other.id)
+        assert filtered["trend_labels"] == ["2024-04"]
+        assert filtered["tech_labels"] == ["Other Tech"]
+        assert filtered["service_values"] == [500.00]
+
+    def test_grouped_by_name(self, ledger, db_session, sample_customer, sample_service):
+        """Test that technicians sharing a name share one bar."""
+        namesake = Technician(name="Test Tech")
+        db_session.session.add(namesake)
+        db_session.session.commit()
+        db_session.session.add(
+            Appointment(
+                date_time=datetime(2024, 3, 2, 9, 0),
+                customer_id=sample_customer.id,
+                technician_id=namesake.id,
+                service_id=sample_service.id,
+                price_charged=100.00,
+                tip_amount=0.0,
+            )
+        )
+        db_session.session.commit()
+
+        charts = get_chart_data(period="month")
+        assert charts["tech_labels"] == ["Test Tech"]
+        assert charts["tech_values"] == charts["trend_values"]
+
+    def test_aggregated_in_sql(self, ledger):
+        """Test that the charts cost one grouped query per series."""
+        with track_queries() as queries:
+            get_chart_data(period="day")
+
+        assert len(queries) == 3
+        assert all("GROUP BY" in query.statement for query in queries)
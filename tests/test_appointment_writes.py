@@ -0,0 +1,77 @@
+"""
+Tests for the single-transaction appointment write path.
+"""
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from backend.appointment_writes import record_appointment, upsert_customers
+from backend.models import Appointment, Customer, DailyRevenue
+
+
+class TestUpsertCustomers:
+    """Tests for customer upserts by phone."""
+
+    def test_creates_and_returns_ids(self, db_session, sample_customer):
+        """Test that new and existing phones both come back with ids."""
+        ids = upsert_customers({"555-0000": "Renamed", "555-8001": "Eve"})
+        db_session.session.commit()
+
+        assert ids["555-0000"] == sample_customer.id
+        assert ids["555-8001"] == Customer.query.filter_by(phone="555-8001").one().id
+        assert Customer.query.count() == 2
+
+    def test_existing_name_kept(self, db_session, sample_customer):
+        """Test that an upsert never renames an existing customer."""
+        upsert_customers({"555-0000": "Renamed"})
+        db_session.session.commit()
+
+        db_session.session.refresh(sample_customer)
+        assert sample_customer.first_name == "Test Customer"
+
+
+class TestRecordAppointment:
+    """Tests for recording an appointment."""
+
+    def test_new_customer(self, db_session, sample_technician, sample_service):
+        """Test recording an appointment for a new phone number."""
+        appointment = record_appointment(
+            "Fay", "555-8002", sample_technician.id, sample_service.id, 42.00, 6.00, "Card"
+        )
+
+        customer = Customer.query.filter_by(phone="555-8002").one()
+        assert appointment.customer_id == customer.id
+        assert db_session.session.query(DailyRevenue).one().revenue == 42.00
+
+    def test_existing_customer(
+        self, db_session, sample_technician, sample_service, sample_customer
+    ):
+        """Test that a known phone number reuses its customer."""
+        appointment = record_appointment(
+            "Someone", "555-0000", sample_technician.id, sample_service.id, 42.00
+        )
+
+        assert appointment.customer_id == sample_customer.id
+        assert Customer.query.count() == 1
+
+    def test_single_commit(self, db_session, sample_technician, sample_service):
+        """Test that customer and appointment are written in one transaction."""
+        commits = []
+        engine = db_session.engine
+        listener = lambda conn: commits.append(conn)  # noqa: E731
+        event.listen(engine, "commit", listener)
+        try:
+            record_appointment("Gus", "555-8003", sample_technician.id, sample_service.id, 30.00)
+        finally:
+            event.remove(engine, "commit", listener)
+
+        assert len(commits) == 1
+
+    def test_failure_rolls_back_customer(self, db_session, sample_technician, sample_service):
+        """Test that a failed appointment insert leaves no new customer behind."""
+        with pytest.raises(IntegrityError):
+            record_appointment("Hal", "555-8004", sample_technician.id, sample_service.id, None)
+
+        assert Customer.query.filter_by(phone="555-8004").count() == 0
+        assert Appointment.query.count() == 0
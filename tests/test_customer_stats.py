@@ -0,0 +1,217 @@
+"""
+Tests for the per-customer stats table.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from backend.customer_analytics import calculate_customer_ltv
+from backend.customer_stats import (
+    add_visit,
+    apply_appointments,
+    empty_stats,
+    favorites,
+    rebuild_customer_stats,
+)
+from backend.migrations import upgrade_schema
+from backend.models import Appointment, Customer, CustomerStats, Service, Technician
+
+
+def _stats(db_session):
+    """Stats rows as comparable dicts."""
+    rows = db_session.session.query(CustomerStats).order_by(CustomerStats.customer_id)
+    return [
+        {column.name: getattr(row, column.name) for column in CustomerStats.__table__.columns}
+        for row in rows
+    ]
+
+
+@pytest.fixture
+def ledger(db_session):
+    """Five customers with visits to three services and two technicians, added out of order."""
+    rng = random.Random(7)
+    session = db_session.session
+    technicians = [Technician(name="Lisa"), Technician(name="Tom")]
+    services = [
+        Service(name="Gel Manicure", base_price=35.00),
+        Service(name="Spa Pedicure", base_price=45.00),
+        # Same name as the first: counted together
+        Service(name="Gel Manicure", base_price=40.00),
+    ]
+    customers = [Customer(first_name=f"C{i}", phone=f"555-01{i:02d}") for i in range(5)]
+    session.add_all(technicians + services + customers)
+    session.commit()
+
+    base = datetime(2024, 1, 1, 10, 0)
+    for customer in customers:
+        for _ in range(rng.randint(1, 9)):
+            session.add(
+                Appointment(
+                    date_time=base + timedelta(days=rng.randint(0, 200), hours=rng.randint(0, 8)),
+                    customer_id=customer.id,
+                    technician_id=rng.choice(technicians).id,
+                    service_id=rng.choice(services).id,
+                    price_charged=round(rng.uniform(20, 80), 2),
+                    tip_amount=round(rng.uniform(0, 15), 2),
+                )
+            )
+            session.commit()
+    return customers
+
+
+class TestFold:
+    """Tests for folding visits into stats."""
+
+    def test_add_visit(self):
+        """Test the totals, gaps and favourites after a few visits."""
+        stats = empty_stats(1)
+        base = datetime(2024, 3, 1, 9, 0)
+        for days, service in ((0, "Gel"), (10, "Pedi"), (30, "Pedi"), (31, "Gel")):
+            add_visit(stats, base + timedelta(days=days), 30.0, None, service, "Lisa")
+
+        assert stats["visit_count"] == 4
+        assert stats["total_revenue"] == 120.0
+        assert stats["total_tips"] == 0
+        assert stats["first_visit"] == base
+        assert stats["last_visit"] == base + timedelta(days=31)
+        # Gaps 10, 20, 1: the first half is [10], the second [20, 1]
+        assert stats["gap_sum"] == 31
+        assert stats["first_half_gap_sum"] == 10
+        assert stats["second_half_gaps"] == [20, 1]
+        assert stats["favorite_service"] == "Gel"  # Tied with Pedi, visited first
+        assert stats["second_favorite_service"] == "Pedi"
+        assert stats["favorite_technician"] == "Lisa"
+
+    def test_favorites_order(self):
+        """Test that favourites rank by visits, then by first visit."""
+        counts = {"B": [2, 3], "A": [3, 1], "C": [2, 0]}
+        assert favorites(counts, limit=2) == ["A", "C"]
+        assert favorites({}, limit=1) == []
+
+
+class TestMaintenance:
+    """Tests for keeping the stats in step with ledger writes."""
+
+    def test_insert_creates_stats(self, sample_appointment, db_session):
+        """Test that a first appointment creates the customer's stats in the same commit."""
+        (row,) = _stats(db_session)
+
+        assert row["customer_id"] == sample_appointment.customer_id
+        assert row["visit_count"] == 1
+        assert row["total_revenue"] == 35.00
+        assert row["total_tips"] == 5.00
+        assert row["first_visit"] == row["last_visit"] == sample_appointment.date_time
+        assert row["favorite_service"] == "Test Manicure"
+        assert row["favorite_technician"] == "Test Tech"
+
+    def test_later_insert_appends(self, sample_appointment, db_session):
+        """Test that a later appointment is folded into the existing row."""
+        db_session.session.add(
+            Appointment(
+                date_time=sample_appointment.date_time + timedelta(days=14, hours=3),
+                customer_id=sample_appointment.customer_id,
+                technician_id=sample_appointment.technician_id,
+                service_id=sample_appointment.service_id,
+                price_charged=40.00,
+                tip_amount=None,
+            )
+        )
+        db_session.session.commit()
+
+        (row,) = _stats(db_session)
+        assert row["visit_count"] == 2
+        assert row["total_revenue"] == 75.00
+        assert row["total_tips"] == 5.00
+        assert row["gap_sum"] == 14
+        assert row["second_half_gaps"] == [14]
+
+    def test_incremental_matches_rebuild(self, ledger, db_session):
+        """Test that stats kept through back-dated inserts equal a full rebuild."""
+        incremental = _stats(db_session)
+        rebuild_customer_stats()
+
+        assert _stats(db_session) == incremental
+        assert len(incremental) == len(ledger)
+
+    def test_update_and_delete(self, ledger, db_session):
+        """Test that moving and deleting appointments recompute the customers involved."""
+        session = db_session.session
+        moved = session.query(Appointment).filter_by(customer_id=ledger[0].id).first()
+        moved.customer_id = ledger[1].id
+        moved.price_charged += 10
+        for appointment in session.query(Appointment).filter_by(customer_id=ledger[2].id):
+            session.delete(appointment)
+        session.commit()
+        incremental = _stats(db_session)
+
+        rebuild_customer_stats()
+        assert _stats(db_session) == incremental
+        assert ledger[2].id not in [row["customer_id"] for row in incremental]
+
+    def test_rolled_back_insert_leaves_stats(self, sample_appointment, db_session):
+        """Test that the stats share the ledger's transaction."""
+        db_session.session.add(
+            Appointment(
+                customer_id=sample_appointment.customer_id,
+                technician_id=sample_appointment.technician_id,
+                service_id=sample_appointment.service_id,
+                price_charged=99.00,
+            )
+        )
+        db_session.session.flush()
+        db_session.session.rollback()
+
+        assert _stats(db_session)[0]["visit_count"] == 1
+
+    def test_apply_bulk_rows(self, ledger, db_session):
+        """Test applying rows written outside the ORM, in and out of order."""
+        session = db_session.session
+        template = session.query(Appointment).first()
+        last = session.get(CustomerStats, ledger[3].id).last_visit
+        rows = [
+            {
+                "customer_id": customer_id,
+                "date_time": when,
+                "technician_id": template.technician_id,
+                "service_id": template.service_id,
+                "price_charged": 42.50,
+                "tip_amount": 7.25,
+            }
+            for customer_id, when in (
+                (ledger[3].id, last + timedelta(days=9)),
+                (ledger[3].id, last + timedelta(days=3)),
+                (ledger[4].id, datetime(2023, 6, 1, 12, 0)),  # Before every visit
+            )
+        ]
+        session.execute(Appointment.__table__.insert(), rows)
+        apply_appointments(rows)
+        session.commit()
+        incremental = _stats(db_session)
+
+        rebuild_customer_stats()
+        assert _stats(db_session) == incremental
+
+
+class TestBackfill:
+    """Tests for creating the stats on an existing database."""
+
+    def test_upgrade_backfills_stats(self, ledger, db_session):
+        """Test that a database without the table gets it filled from the ledger."""
+        expected = _stats(db_session)
+        db_session.session.execute(text("DROP TABLE customer_stats"))
+        db_session.session.commit()
+
+        assert "customer_stats" in upgrade_schema()
+        assert _stats(db_session) == expected
+
+    def test_ltv_read_from_stats(self, ledger, db_session):
+        """Test that the LTV report covers exactly the customers with stats."""
+        customers = calculate_customer_ltv()
+
+        assert sorted(c["customer_id"] for c in customers) == [c.id for c in ledger]
+        for customer in customers:
+            assert customer["favorite_technician"] in ("Lisa", "Tom")
+            assert set(customer["favorite_services"]) <= {"Gel Manicure", "Spa Pedicure"}
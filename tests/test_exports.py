@@ -0,0 +1,230 @@
+"""
+Tests for the streaming CSV exports.
+"""
+
+import csv
+import io
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.customer_analytics import calculate_customer_ltv
+from backend.exports import (
+    APPOINTMENT_FIELDS,
+    CUSTOMER_FIELDS,
+    export_appointments,
+    export_customers,
+    parse_filters,
+)
+from backend.importer import import_appointments, read_csv
+from backend.models import Appointment, Customer, Technician
+
+
+def _rows(chunks):
+    """Parse exported CSV chunks into dicts."""
+    return list(csv.DictReader(io.StringIO("".join(chunks))))
+
+
+@pytest.fixture
+def ledger(sample_technician, sample_service, db_session):
+    """Ten customers visiting two technicians through January 2024."""
+    session = db_session.session
+    other = Technician(name="Other Tech")
+    customers = [Customer(first_name=f"C{i}", phone=f"555-02{i:02d}") for i in range(10)]
+    session.add_all([other, *customers])
+    session.commit()
+
+    for i, customer in enumerate(customers):
+        for visit in range(3):
+            session.add(
+                Appointment(
+                    date_time=datetime(2024, 1, 1 + i + visit * 10, 9 + visit),
+                    customer_id=customer.id,
+                    technician_id=(other if i % 2 else sample_technician).id,
+                    service_id=sample_service.id,
+                    price_charged=30.0 + i,
+                    tip_amount=None if visit == 2 else 4.5,
+                    payment_method="Card",
+                )
+            )
+    session.commit()
+    return {"customers": customers, "other": other}
+
+
+def _bulk_ledger(session, customer, technician, service, first, count):
+    """Insert appointments without the ORM, for the memory test."""
+    session.execute(
+        Appointment.__table__.insert(),
+        [
+            {
+                "date_time": datetime(2023, 1, 1) + timedelta(minutes=i),
+                "customer_id": customer.id,
+                "technician_id": technician.id,
+                "service_id": service.id,
+                "price_charged": 40.0,
+                "tip_amount": 5.0,
+                "payment_method": "Card",
+            }
+            for i in range(first, first + count)
+        ],
+    )
+    session.commit()
+
+
+class TestParseFilters:
+    """Tests for reading export filters."""
+
+    def test_whole_days(self):
+        """Test that the end date includes the whole day."""
+        filters = parse_filters("2024-01-05", "2024-01-06", "3")
+
+        assert filters["start_date"] == datetime(2024, 1, 5)
+        assert filters["end_date"] > datetime(2024, 1, 6, 23, 59, 59)
+        assert filters["technician_id"] == 3
+
+    def test_defaults(self):
+        """Test that missing filters are unbounded."""
+        assert parse_filters(None, "", "all") == {
+            "start_date": None,
+            "end_date": None,
+            "technician_id": None,
+        }
+
+    @pytest.mark.parametrize("args", [("2024-13-01", None, None), (None, None, "abc")])
+    def test_malformed(self, args):
+        """Test that malformed filters raise ValueError."""
+        with pytest.raises(ValueError):
+            parse_filters(*args)
+
+
+class TestAppointmentExport:
+    """Tests for the appointment export."""
+
+    def test_all_rows(self, ledger, db_session):
+        """Test the header, row count and order."""
+        chunks = list(export_appointments())
+        rows = _rows(chunks)
+
+        assert chunks[0].strip() == ",".join(APPOINTMENT_FIELDS)
+        assert len(rows) == 30
+        assert [row["date_time"] for row in rows] == sorted(row["date_time"] for row in rows)
+        assert rows[0]["customer_name"] == "C0"
+        assert rows[0]["technician"] == "Test Tech"
+        assert rows[0]["service"] == "Test Manicure"
+        assert {row["tip"] for row in rows} == {"4.5", "0.0"}
+
+    def test_filters(self, ledger, db_session):
+        """Test the date range and technician filters."""
+        other = ledger["other"].id
+        in_range = _rows(
+            export_appointments(datetime(2024, 1, 5), datetime(2024, 1, 10, 23, 59, 59))
+        )
+        by_technician = _rows(export_appointments(technician_id=other))
+
+        assert len(in_range) == 6
+        assert all("2024-01-05" <= row["date_time"] < "2024-01-11" for row in in_range)
+        assert len(by_technician) == 15
+        assert {row["technician"] for row in by_technician} == {"Other Tech"}
+
+    def test_batches(self, ledger, db_session):
+        """Test that every batch is written as its own chunk."""
+        chunks = list(export_appointments(batch_size=7))
+
+        # Header, then 30 rows in batches of 7
+        assert len(chunks) == 1 + 5
+        assert len(_rows(chunks)) == 30
+
+    def test_reimport(self, ledger, db_session):
+        """Test that an export imports back into the same ledger."""
+
+        def without_ids(rows):
+            return [{k: v for k, v in row.items() if k != "id"} for row in rows]
+
+        exported = "".join(export_appointments())
+        db_session.session.query(Appointment).delete()
+        db_session.session.commit()
+        stats = import_appointments(read_csv(io.StringIO(exported)))
+
+        assert stats["rows"] == 30
+        assert stats["customers_created"] == 0
+        assert without_ids(_rows(export_appointments())) == without_ids(_rows([exported]))
+
+    def test_memory_is_flat(self, sample_appointment, sample_service, db_session):
+        """Test that peak memory does not grow with the number of rows exported."""
+
+        def peak():
+            tracemalloc.start()
+            try:
+                for _ in export_appointments(batch_size=200):
+                    pass
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        session = db_session.session
+        ledger = (sample_appointment.customer, sample_appointment.technician, sample_service)
+        _bulk_ledger(session, *ledger, 0, 1000)
+        small = peak()
+        _bulk_ledger(session, *ledger, 1000, 7000)
+        large = peak()
+
+        assert large < small * 1.5
+
+
+class TestCustomerExport:
+    """Tests for the customer LTV export."""
+
+    def test_matches_ltv(self, ledger, db_session):
+        """Test that the export carries the LTV report of every customer."""
+        rows = _rows(export_customers(batch_size=4))
+        expected = {c["customer_id"]: c for c in calculate_customer_ltv()}
+
+        assert list(rows[0]) == list(CUSTOMER_FIELDS)
+        assert [int(row["customer_id"]) for row in rows] == sorted(expected)
+        for row in rows:
+            customer = expected[int(row["customer_id"])]
+            assert row["segment"] == customer["segment"]
+            assert int(row["total_visits"]) == customer["total_visits"]
+            assert float(row["total_spend"]) == pytest.approx(customer["total_spend"])
+            assert row["favorite_services"] == "; ".join(customer["favorite_services"])
+            assert row["favorite_technician"] == customer["favorite_technician"]
+
+    def test_filters(self, ledger, db_session):
+        """Test that filters select customers but metrics stay lifetime."""
+        in_range = _rows(export_customers(datetime(2024, 1, 1), datetime(2024, 1, 3, 23, 59)))
+        by_technician = _rows(export_customers(technician_id=ledger["other"].id))
+
+        assert [row["name"] for row in in_range] == ["C0", "C1", "C2"]
+        assert all(row["total_visits"] == "3" for row in in_range)
+        assert len(by_technician) == 5
+        assert {row["favorite_technician"] for row in by_technician} == {"Other Tech"}
+
+
+class TestExportRoutes:
+    """Tests for the CSV download views."""
+
+    def test_streamed_download(self, ledger, client):
+        """Test that the download is streamed with CSV headers."""
+        response = client.get("/export/appointments.csv?start=2024-01-05&end=2024-01-10")
+
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.mimetype == "text/csv"
+        assert "attachment" in response.headers["Content-Disposition"]
+        assert len(_rows([response.get_data(as_text=True)])) == 6
+
+    def test_customer_download(self, ledger, client):
+        """Test the customer export with a technician filter."""
+        response = client.get(f"/export/customers.csv?tech_id={ledger['other'].id}")
+
+        assert response.status_code == 200
+        assert len(_rows([response.get_data(as_text=True)])) == 5
+
+    def test_bad_filter(self, client):
+        """Test that malformed filters are rejected."""
+        assert client.get("/export/appointments.csv?start=yesterday").status_code == 400
+
+    def test_unknown_export(self, client):
+        """Test that unknown exports are not found."""
+        assert client.get("/export/passwords.csv").status_code == 404
@@ -0,0 +1,158 @@
+"""
+Tests for the streaming appointment importer.
+"""
+
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from backend.importer import import_appointments, read_csv, read_ndjson
+from backend.models import Appointment, Customer, DailyRevenue
+
+CSV_EXPORT = """date_time,customer_name,customer_phone,technician,service,price,tip,payment_method
+2024-02-01T10:00:00,Ana,555-7001,Test Tech,Test Manicure,35.00,5.00,Card
+2024-02-01T11:30:00,Bea,555-7002,test tech,Test Manicure,40.00,,Cash
+2024-02-03T09:15:00,Ana,555-7001,Test Tech,Test Manicure,35.00,7.00,Card
+2024-02-04T14:00:00,Test Customer,555-0000,Test Tech,Test Manicure,50.00,10.00,Card
+2024-02-05T16:45:00,Cleo,555-7003,Test Tech,Test Manicure,45.00,6.00,
+"""
+
+
+@pytest.fixture
+def reference_data(sample_technician, sample_service, sample_customer):
+    """Technician, service and one existing customer."""
+    return sample_technician, sample_service, sample_customer
+
+
+class TestImportAppointments:
+    """Tests for batch imports."""
+
+    def test_csv_import(self, reference_data, db_session):
+        """Test importing a CSV export."""
+        stats = import_appointments(read_csv(io.StringIO(CSV_EXPORT)))
+
+        assert stats["rows"] == 5
+        assert stats["customers_created"] == 3
+        assert stats["rows_per_second"] > 0
+        assert Appointment.query.count() == 5
+        assert Customer.query.count() == 4
+
+        bea = Customer.query.filter_by(phone="555-7002").one()
+        appointment = Appointment.query.filter_by(customer_id=bea.id).one()
+        assert appointment.tip_amount == 0.0
+        assert appointment.payment_method == "Cash"
+
+    def test_existing_customer_reused(self, reference_data, db_session):
+        """Test that customers are matched by phone."""
+        import_appointments(read_csv(io.StringIO(CSV_EXPORT)))
+
+        existing = Customer.query.filter_by(phone="555-0000").one()
+        assert existing.first_name == "Test Customer"
+        assert Appointment.query.filter_by(customer_id=existing.id).count() == 1
+
+    def test_batches_and_progress(self, reference_data, db_session):
+        """Test that records are committed in fixed-size batches."""
+        seen = []
+        import_appointments(
+            read_csv(io.StringIO(CSV_EXPORT)), batch_size=2, progress=lambda s: seen.append(s)
+        )
+
+        assert [s["rows"] for s in seen] == [2, 4, 5]
+        assert [s["customers_created"] for s in seen] == [2, 2, 3]
+
+    def test_rollup_updated(self, reference_data, db_session):
+        """Test that imported rows reach the daily revenue rollup."""
+        import_appointments(read_csv(io.StringIO(CSV_EXPORT)))
+
+        totals = db_session.session.query(
+            db_session.func.sum(DailyRevenue.appointment_count),
+            db_session.func.sum(DailyRevenue.revenue),
+        ).one()
+        assert totals == (5, 205.00)
+
+    def test_ndjson_import(self, reference_data, db_session):
+        """Test importing NDJSON with ids instead of names."""
+        technician, service, _ = reference_data
+        record = {
+            "date_time": "2024-03-01T10:00:00",
+            "customer_phone": "555-7100",
+            "customer_name": "Dee",
+            "technician_id": technician.id,
+            "service_id": service.id,
+            "price": 30,
+        }
+        stream = io.StringIO(json.dumps(record) + "\n\n")
+
+        stats = import_appointments(read_ndjson(stream))
+
+        assert stats["rows"] == 1
+        assert Customer.query.filter_by(phone="555-7100").one().first_name == "Dee"
+
+    def test_offset_timestamps(self, reference_data, db_session):
+        """Test that timestamps with a UTC offset are stored as naive local time."""
+        export = (
+            "date_time,customer_phone,technician,service,price\n"
+            "2024-01-05T10:00:00+02:00,555-7101,Test Tech,Test Manicure,35.00\n"
+        )
+        later = export.replace("2024-01-05T10", "2024-01-19T10")
+
+        # The second import compares with the stats of the first one
+        import_appointments(read_csv(io.StringIO(export)))
+        import_appointments(read_csv(io.StringIO(later)))
+
+        expected = datetime.fromisoformat("2024-01-05T10:00:00+02:00").astimezone()
+        times = [a.date_time for a in Appointment.query.order_by(Appointment.date_time)]
+        assert times[0] == expected.replace(tzinfo=None)
+        assert all(t.tzinfo is None for t in times)
+        assert (times[1] - times[0]).days == 14
+
+    def test_failed_batch_rolled_back(self, reference_data, db_session):
+        """Test that a bad record discards its batch and keeps the earlier ones."""
+        export = CSV_EXPORT.replace("50.00", "fifty")
+
+        with pytest.raises(ValueError, match="Record 4"):
+            import_appointments(read_csv(io.StringIO(export)), batch_size=2)
+
+        assert not db_session.session().in_transaction()
+        assert Appointment.query.count() == 2
+        assert Customer.query.count() == 3  # Ana and Bea from the first batch
+
+    def test_unknown_technician(self, reference_data, db_session):
+        """Test that unknown references are reported with their record number."""
+        export = CSV_EXPORT.replace("test tech", "Nobody")
+
+        with pytest.raises(ValueError, match="Record 2: unknown technician 'Nobody'"):
+            import_appointments(read_csv(io.StringIO(export)))
+
+    def test_invalid_price(self, reference_data, db_session):
+        """Test that malformed values are rejected."""
+        export = CSV_EXPORT.replace("50.00", "fifty")
+
+        with pytest.raises(ValueError, match="Record 4"):
+            import_appointments(read_csv(io.StringIO(export)))
+
+
+class TestImportEndpoint:
+    """Tests for the upload endpoint."""
+
+    def test_upload_csv(self, client, reference_data, db_session):
+        """Test uploading a CSV file."""
+        response = client.post(
+            "/api/import",
+            data={"file": (io.BytesIO(CSV_EXPORT.encode()), "export.csv")},
+            content_type="multipart/form-data",
+        )
+
+        assert response.status_code == 200
+        assert response.get_json()["rows"] == 5
+
+    def test_upload_invalid(self, client, reference_data, db_session):
+        """Test that bad records answer 400."""
+        response = client.post(
+            "/api/import?format=csv", data=CSV_EXPORT.replace("Test Manicure", "Waxing")
+        )
+
+        assert response.status_code == 400
+        assert "unknown service" in response.get_json()["error"]
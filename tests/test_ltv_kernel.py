@@ -0,0 +1,120 @@
+"""
+Tests for the columnar LTV kernel.
+"""
+
+import itertools
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from backend.customer_analytics import classify_customer, classify_customers, get_visit_trend
+from backend.ltv_kernel import TRENDS, customer_aggregates, derived_metrics, sequential_sums
+
+NOW = datetime(2024, 6, 1, 18, 30)
+
+
+@pytest.fixture
+def ledger():
+    """Random ledger of 200 customers, sorted by customer then time."""
+    rng = random.Random(3)
+    rows = []
+    for customer_id in range(1, 201):
+        when = NOW - timedelta(days=rng.randint(0, 400), minutes=rng.randint(0, 600))
+        for _ in range(rng.choice([1, 1, 2, 3, 5, 8, 13])):
+            rows.append(
+                (customer_id, when, round(rng.uniform(15, 80), 2), round(rng.uniform(0, 15), 2))
+            )
+            when -= timedelta(days=rng.randint(0, 60), hours=rng.randint(0, 12))
+    rows.sort(key=lambda row: (row[0], row[1]))
+    return rows
+
+
+def _columns(rows):
+    customer_id, when, price, tip = zip(*rows)
+    return (
+        np.array(customer_id),
+        np.array(when, dtype="datetime64[us]"),
+        np.array(price),
+        np.array(tip),
+    )
+
+
+def _metrics(customer_id, timestamp, price, tip):
+    """Aggregates and derived metrics, as customer_stats and the LTV read compute them."""
+    aggregates = customer_aggregates(customer_id, timestamp, price, tip)
+    return {**aggregates, **derived_metrics(aggregates, NOW)}
+
+
+class TestLtvMetrics:
+    """Tests that the kernel matches the per-customer Python calculation."""
+
+    def test_matches_python(self, ledger):
+        """Test every metric against a straightforward loop over each customer."""
+        metrics = _metrics(*_columns(ledger))
+
+        for i, (customer_id, visits) in enumerate(itertools.groupby(ledger, key=lambda r: r[0])):
+            visits = list(visits)
+            revenue = sum(v[2] for v in visits)
+            tips = sum(v[3] for v in visits)
+            gaps = [(b[1] - a[1]).days for a, b in zip(visits, visits[1:])]
+            days_as_customer = (NOW - visits[0][1]).days
+            avg_days = sum(gaps) / len(gaps) if gaps else days_as_customer
+
+            assert metrics["customer_id"][i] == customer_id
+            assert metrics["total_visits"][i] == len(visits)
+            assert metrics["total_revenue"][i] == revenue
+            assert metrics["total_tips"][i] == tips
+            assert metrics["days_as_customer"][i] == days_as_customer
+            assert metrics["days_since_last_visit"][i] == (NOW - visits[-1][1]).days
+            assert metrics["avg_days_between_visits"][i] == avg_days
+            assert TRENDS[metrics["visit_trend"][i]] == get_visit_trend(gaps)
+            assert metrics["avg_tip_percentage"][i] == (tips / revenue * 100 if revenue else 0)
+
+    def test_empty_ledger(self):
+        """Test that an empty ledger gives empty metrics."""
+        metrics = _metrics(
+            np.zeros(0, dtype=np.int64),
+            np.zeros(0, dtype="datetime64[us]"),
+            np.zeros(0),
+            np.zeros(0),
+        )
+        assert len(metrics["customer_id"]) == 0
+
+
+class TestReductions:
+    """Tests for the run reductions."""
+
+    def test_sequential_sums_bit_exact(self):
+        """Test that run sums equal Python's left-to-right sum() exactly."""
+        rng = np.random.default_rng(0)
+        values = np.round(rng.uniform(10, 80, 5000), 2)
+        counts = rng.integers(1, 60, 150)
+        counts[-1] = 5000 - counts[:-1].sum()
+        starts = np.r_[0, np.cumsum(counts)[:-1]]
+
+        sums = sequential_sums(values, starts, counts)
+
+        listed = values.tolist()
+        assert sums.tolist() == [sum(listed[s : s + c]) for s, c in zip(starts, counts)]
+
+
+class TestClassifyCustomers:
+    """Tests for the vectorized segmentation."""
+
+    def test_matches_classify_customer(self):
+        """Test every combination of thresholds against the scalar rules."""
+        grid = list(
+            itertools.product(
+                [1, 3, 4, 5, 8],
+                [0, 28, 29, 45, 46, 60, 61],
+                [50.0, 299.99, 300.0, 800.0],
+                [0.0, 28.0, 42.0, 42.5, 90.0],
+            )
+        )
+        visits, days_since, spend, avg_days = (np.array(column) for column in zip(*grid))
+
+        segments = classify_customers(visits, days_since, spend, avg_days)
+
+        assert segments.tolist() == [classify_customer(*args) for args in grid]
@@ -0,0 +1,114 @@
+"""
+Tests for the request metrics exported at /metrics.
+"""
+
+import re
+
+import pytest
+
+from backend.metrics import Histogram, Registry
+
+
+def _sample(text, name, **labels):
+    """Value of one sample in a Prometheus text exposition, or None."""
+    wanted = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    for line in text.splitlines():
+        match = re.fullmatch(rf"{name}\{{(.*)\}} (\S+)", line)
+        if match and match.group(1) == wanted:
+            return float(match.group(2))
+    return None
+
+
+@pytest.fixture
+def fresh_metrics(test_app):
+    """Reset the default application's registry around a test."""
+    test_app.extensions["salon_metrics"] = Registry()
+    yield test_app.extensions["salon_metrics"]
+
+
+class TestMetricsEndpoint:
+    """Tests for the /metrics endpoint."""
+
+    def test_prometheus_format(self, client, fresh_metrics):
+        """Test that /metrics answers the Prometheus text format."""
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.content_type.startswith("text/plain; version=0.0.4")
+        assert "# TYPE salon_http_request_duration_seconds histogram" in response.text
+        assert "# TYPE salon_http_requests_total counter" in response.text
+
+    def test_page_request_recorded(self, client, fresh_metrics, sample_appointment):
+        """Test that a page records its latency, SQL and template time."""
+        client.get("/")
+        text = client.get("/metrics").text
+
+        assert (
+            _sample(
+                text,
+                "salon_http_requests_total",
+                endpoint="main.dashboard",
+                method="GET",
+                status="200",
+            )
+            == 1
+        )
+        assert (
+            _sample(text, "salon_http_request_duration_seconds_count", endpoint="main.dashboard")
+            == 1
+        )
+        assert _sample(text, "salon_sql_queries_per_request_sum", endpoint="main.dashboard") >= 1
+        assert _sample(text, "salon_sql_duration_seconds_sum", endpoint="main.dashboard") > 0
+        assert _sample(text, "salon_template_render_seconds_sum", endpoint="main.dashboard") > 0
+
+    def test_json_endpoint_has_no_template_time(self, client, fresh_metrics, sample_appointment):
+        """Test that API requests record SQL but no template rendering."""
+        client.get("/api/performance")
+        text = client.get("/metrics").text
+
+        assert (
+            _sample(text, "salon_sql_queries_per_request_sum", endpoint="api.api_performance") >= 1
+        )
+        assert (
+            _sample(text, "salon_template_render_seconds_sum", endpoint="api.api_performance") == 0
+        )
+
+    def test_status_and_unmatched_routes(self, client, fresh_metrics):
+        """Test that error statuses and unknown URLs are counted."""
+        client.get("/no-such-page")
+        text = client.get("/metrics").text
+
+        assert (
+            _sample(
+                text, "salon_http_requests_total", endpoint="unmatched", method="GET", status="404"
+            )
+            == 1
+        )
+
+    def test_queries_outside_requests_ignored(self, fresh_metrics, sample_appointment):
+        """Test that SQL run outside a request does not touch the registry."""
+        assert "salon_sql_queries_per_request_count" not in fresh_metrics.render()
+
+
+class TestHistogram:
+    """Tests for the histogram buckets."""
+
+    def test_cumulative_buckets(self):
+        """Test that buckets are cumulative and +Inf counts every observation."""
+        histogram = Histogram("h", "Test.", ("endpoint",), (1, 5))
+        for value in (0.5, 3, 10):
+            histogram.observe(("x",), value)
+        text = "\n".join(histogram.render())
+
+        assert _sample(text, "h_bucket", endpoint="x", le="1") == 1
+        assert _sample(text, "h_bucket", endpoint="x", le="5") == 2
+        assert _sample(text, "h_bucket", endpoint="x", le="+Inf") == 3
+        assert _sample(text, "h_sum", endpoint="x") == 13.5
+        assert _sample(text, "h_count", endpoint="x") == 3
+
+    def test_label_escaping(self):
+        """Test that quotes and backslashes in label values are escaped."""
+        histogram = Histogram("h", "Test.", ("endpoint",), (1,))
+        histogram.observe(('a"b\\c',), 0.1)
+
+        assert 'endpoint="a\\"b\\\\c"' in "\n".join(histogram.render())
@@ -5,8 +5,21 @@ Unit tests for database models.
 from datetime import datetime
 
 import pytest
+from sqlalchemy import create_engine, inspect, text
 
-from backend.models import Appointment, Customer, Service, Technician
+from backend.importer import import_appointments
+from backend.migrations import upgrade_schema
+from backend.models import (
+    Appointment,
+    Customer,
+    Service,
+    Technician,
+    app,
+    bump_ledger_version,
+    get_ledger_version,
+)
+from backend.query_tracking import track_queries
+from backend.sqlite_profile import apply_profile, resolve_pragmas
 
 
 class TestTechnicianModel:
@@ -95,3 +108,173 @@ class TestAppointmentModel:
         """Test calculating total value."""
         total = sample_appointment.price_charged + sample_appointment.tip_amount
         assert total == 40.00
+
+
+class TestLedgerVersion:
+    """Tests for the version that keys ETags and the page cache."""
+
+    def test_changes_on_every_kind_of_write(self, sample_appointment, db_session):
+        """Test that inserts, in-place edits, deletes and bulk imports change the version."""
+        session = db_session.session
+        versions = [get_ledger_version()]
+
+        sample_appointment.price_charged = 99.00
+        session.commit()
+        versions.append(get_ledger_version())
+
+        import_appointments(
+            [
+                {
+                    "date_time": "2024-02-01T10:00:00",
+                    "customer_phone": "555-0000",
+                    "technician": "Test Tech",
+                    "service": "Test Manicure",
+                    "price": "35.00",
+                }
+            ]
+        )
+        versions.append(get_ledger_version())
+
+        session.delete(session.get(Appointment, sample_appointment.id))
+        session.commit()
+        versions.append(get_ledger_version())
+
+        assert "0" not in versions
+        assert len(set(versions)) == len(versions)
+
+    def test_unchanged_by_reads_and_rollbacks(self, sample_appointment, db_session):
+        """Test that reads and rolled back writes keep the version."""
+        session = db_session.session
+        before = get_ledger_version()
+
+        Appointment.query.all()
+        session.add(Customer(first_name="Nobody", phone="555-0404"))
+        session.flush()
+        session.rollback()
+
+        assert get_ledger_version() == before
+
+    def test_changes_after_close(self, db_session):
+        """Test that a transaction ended by close() does not stop the next one bumping."""
+        session = db_session.session
+        session.add(Technician(name="Abandoned"))
+        session.flush()
+        session.close()
+        before = get_ledger_version()
+
+        session.add(Technician(name="Kept"))
+        session.commit()
+
+        assert Technician.query.filter_by(name="Kept").count() == 1
+        assert get_ledger_version() != before
+
+    def test_changes_after_rolled_back_savepoint(self, db_session):
+        """Test that a write after a rolled back savepoint still bumps the version."""
+        session = db_session.session
+        before = get_ledger_version()
+
+        savepoint = session.begin_nested()
+        session.add(Technician(name="Undone"))
+        session.flush()
+        savepoint.rollback()
+        session.add(Technician(name="Kept"))
+        session.commit()
+
+        assert get_ledger_version() != before
+
+    def test_once_per_transaction(self, db_session):
+        """Test that the version row is written once however many statements write."""
+        with track_queries() as queries:
+            db_session.session.add(Technician(name="One"))
+            db_session.session.flush()
+            db_session.session.add(Technician(name="Two"))
+            db_session.session.flush()
+            bump_ledger_version()
+            db_session.session.commit()
+
+        assert sum("ledger_version" in query.statement for query in queries) == 1
+
+    def test_lookup_is_constant(self, sample_appointment):
+        """Test that reading the version does not touch the ledger."""
+        with track_queries() as queries:
+            get_ledger_version()
+
+        assert len(queries) == 1
+        assert "appointment" not in queries[0].statement
+
+
+class TestSchemaUpgrade:
+    """Tests for the in-place schema migration."""
+
+    def _index_names(self, db_session, table):
+        return {index["name"] for index in inspect(db_session.engine).get_indexes(table)}
+
+    def test_appointment_indexes_defined(self, db_session):
+        """Test that the ledger indexes are created with the tables."""
+        indexes = self._index_names(db_session, "appointment")
+
+        assert "ix_appointment_customer_date" in indexes
+        assert "ix_appointment_technician_date" in indexes
+        assert "ix_appointment_date_time" in indexes
+
+    def test_upgrade_adds_missing_indexes(self, sample_appointment, db_session):
+        """Test that missing indexes are added without touching data."""
+        db_session.session.execute(text("DROP INDEX ix_appointment_customer_date"))
+        db_session.session.commit()
+
+        created = upgrade_schema()
+
+        assert created == ["ix_appointment_customer_date"]
+        assert "ix_appointment_customer_date" in self._index_names(db_session, "appointment")
+        assert Appointment.query.count() == 1
+
+    def test_upgrade_is_repeatable(self, db_session):
+        """Test that an up-to-date schema is left alone."""
+        assert upgrade_schema() == []
+
+
+class TestSqliteProfile:
+    """Tests for the SQLite connection profiles."""
+
+    def _pragma(self, engine, name):
+        with engine.connect() as connection:
+            return connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+    def test_wal_profile_applied(self, tmp_path):
+        """Test that every new connection gets the profile's PRAGMAs."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+        apply_profile(engine, "wal")
+
+        assert self._pragma(engine, "journal_mode") == "wal"
+        assert self._pragma(engine, "synchronous") == 1  # NORMAL
+        assert self._pragma(engine, "busy_timeout") == 5000
+        assert self._pragma(engine, "temp_store") == 2  # MEMORY
+        engine.dispose()
+
+    def test_overrides(self, tmp_path):
+        """Test that single PRAGMAs can be overridden."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+        apply_profile(engine, "wal", {"busy_timeout": 250})
+
+        assert self._pragma(engine, "busy_timeout") == 250
+        engine.dispose()
+
+    def test_stock_profile_untouched(self, tmp_path):
+        """Test that the stock profile keeps SQLite's defaults."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+        apply_profile(engine, "stock")
+
+        assert self._pragma(engine, "journal_mode") == "delete"
+        engine.dispose()
+
+    def test_app_engine_uses_configured_profile(self, db_session):
+        """Test that the application engine runs the configured profile."""
+        expected = resolve_pragmas(app.config["SQLITE_PROFILE"], app.config["SQLITE_PRAGMAS"])
+
+        assert self._pragma(db_session.engine, "busy_timeout") == expected.get("busy_timeout", 5000)
+
+    @pytest.mark.parametrize("profile, overrides", [("turbo", None), ("wal", {"locking_mode": 1})])
+    def test_invalid_settings(self, profile, overrides):
+        """Test that unknown profiles and PRAGMAs are rejected."""
+        with pytest.raises(ValueError):
+            resolve_pragmas(profile, overrides)
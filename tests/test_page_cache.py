@@ -0,0 +1,190 @@
+"""
+Tests for the rendered-page cache.
+"""
+
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend import page_cache
+from backend.metrics import Registry
+from backend.models import Appointment
+from backend.page_cache import PageCache
+from backend.query_tracking import track_queries
+
+
+@pytest.fixture
+def cache(test_app):
+    """The default application's page cache, emptied, with fresh metrics."""
+    test_app.extensions["salon_metrics"] = Registry()
+    cache = test_app.extensions["salon_page_cache"]
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+def _lookups(test_app, endpoint, result):
+    return test_app.extensions["salon_metrics"].page_cache.series[(endpoint, result)]
+
+
+class TestPageCache:
+    """Tests for the LRU itself."""
+
+    def test_lru_bound(self):
+        """Test that the least recently used page is evicted first."""
+        cache = PageCache(max_entries=2, ttl_seconds=60, max_bytes=10_000)
+        for key in "abc":
+            cache.put(key, key.upper())
+            cache.get("a")
+
+        assert len(cache) == 2
+        assert cache.get("a") == "A"
+        assert cache.get("b") is None
+        assert cache.get("c") == "C"
+
+    def test_ttl(self, monkeypatch):
+        """Test that pages expire after the TTL."""
+        clock = [1000.0]
+        monkeypatch.setattr(page_cache.time, "monotonic", lambda: clock[0])
+        cache = PageCache(max_entries=4, ttl_seconds=60, max_bytes=10_000)
+        cache.put("page", "body")
+
+        clock[0] += 59
+        assert cache.get("page") == "body"
+        clock[0] += 2
+        assert cache.get("page") is None
+        assert len(cache) == 0
+        assert cache.size == 0
+
+    def test_byte_bound(self):
+        """Test that pages are evicted once their total size exceeds max_bytes."""
+        page = "x" * 1000
+        cache = PageCache(max_entries=10, ttl_seconds=60, max_bytes=2 * sys.getsizeof(page))
+        for key in "abc":
+            cache.put(key, page)
+
+        assert len(cache) == 2
+        assert cache.get("a") is None
+        assert cache.size == 2 * sys.getsizeof(page)
+
+    def test_oversized_page_not_stored(self):
+        """Test that a page bigger than the whole budget is not stored."""
+        cache = PageCache(max_entries=10, ttl_seconds=60, max_bytes=1000)
+        cache.put("small", "body")
+        cache.put("small", "x" * 2000)  # Replacing a page with an oversized one drops it
+
+        assert cache.get("small") is None
+        assert len(cache) == 0
+        assert cache.size == 0
+
+
+class TestCachedPages:
+    """Tests for serving /customers and /staff-performance from the cache."""
+
+    @pytest.mark.parametrize("url", ["/customers", "/staff-performance"])
+    def test_hit_skips_analytics(self, client, sample_appointment, cache, url):
+        """Test that a repeat request costs only the ledger version lookup."""
+        first = client.get(url)
+        with track_queries() as queries:
+            second = client.get(url)
+
+        assert second.status_code == 200
+        assert second.data == first.data
+        assert len(queries) == 1
+
+    def test_counters(self, client, sample_appointment, cache, test_app):
+        """Test that hits and misses are counted at /metrics."""
+        client.get("/customers")
+        client.get("/customers")
+        client.get("/customers")
+
+        assert _lookups(test_app, "main.customer_analytics", "miss") == 1
+        assert _lookups(test_app, "main.customer_analytics", "hit") == 2
+        assert (
+            'salon_page_cache_lookups_total{endpoint="main.customer_analytics",result="hit"} 2'
+            in client.get("/metrics").text
+        )
+
+    def test_params_are_part_of_the_key(self, client, sample_appointment, cache):
+        """Test that different query parameters are cached separately."""
+        week = client.get("/staff-performance?days=7")
+        month = client.get("/staff-performance?days=30")
+
+        assert len(cache) == 2
+        assert week.data != month.data
+
+    def test_unread_params_share_a_page(self, client, sample_appointment, cache, test_app):
+        """Test that parameters the view does not read neither split nor grow the cache."""
+        for url in ("/customers", "/customers?x=1", "/customers?x=2", "/customers?days=7"):
+            assert client.get(url).status_code == 200
+
+        assert len(cache) == 1
+        assert _lookups(test_app, "main.customer_analytics", "hit") == 3
+
+    def test_insert_invalidates(self, client, sample_appointment, cache, db_session):
+        """Test that a new appointment shows up on the next request."""
+        client.get("/customers")
+        client.post(
+            "/add",
+            data={
+                "technician_id": sample_appointment.technician_id,
+                "service_id": sample_appointment.service_id,
+                "customer_name": "Newcomer",
+                "customer_phone": "555-0999",
+                "price": "45.00",
+                "tip": "5.00",
+            },
+        )
+
+        assert b"Newcomer" in client.get("/customers").data
+
+    def test_edit_invalidates(self, client, sample_appointment, cache, db_session, test_app):
+        """Test that an in-place edit, which adds no rows, changes the page."""
+        client.get("/customers")
+
+        appointment = db_session.session.get(Appointment, sample_appointment.id)
+        appointment.price_charged = 123.45
+        db_session.session.commit()
+
+        assert b"128.45" in client.get("/customers").data  # Price plus the 5.00 tip
+        assert _lookups(test_app, "main.customer_analytics", "miss") == 2
+
+    def test_rollback_keeps_cache(self, client, sample_appointment, cache, db_session, test_app):
+        """Test that a rolled back write leaves cached pages alone."""
+        client.get("/customers")
+        db_session.session.add(
+            Appointment(
+                date_time=datetime.now() - timedelta(days=1),
+                customer_id=sample_appointment.customer_id,
+                technician_id=sample_appointment.technician_id,
+                service_id=sample_appointment.service_id,
+                price_charged=10.00,
+            )
+        )
+        db_session.session.flush()
+        db_session.session.rollback()
+        client.get("/customers")
+
+        assert _lookups(test_app, "main.customer_analytics", "hit") == 1
+
+    def test_flashes_bypass_cache(self, client, sample_appointment, cache):
+        """Test that a page carrying a flash message is neither served nor stored."""
+        with client.session_transaction() as session:
+            session["_flashes"] = [("message", "Saved!")]
+
+        assert b"Saved!" in client.get("/customers").data
+        assert len(cache) == 0
+
+    def test_disabled(self, client, sample_appointment, cache):
+        """Test that PAGE_CACHE_SIZE = 0 turns the cache off."""
+        size, cache.max_entries = cache.max_entries, 0
+        try:
+            client.get("/customers")
+            with track_queries() as queries:
+                client.get("/customers")
+        finally:
+            cache.max_entries = size
+
+        assert len(cache) == 0
+        assert len(queries) == 1  # The LTV read, without a version lookup
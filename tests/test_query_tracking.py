@@ -0,0 +1,110 @@
+"""
+Tests for N+1 detection, the slow-query log and assert_max_queries.
+"""
+
+import logging
+
+import pytest
+
+from backend.models import Customer, db
+from backend.query_tracking import assert_max_queries, fingerprint, track_queries
+
+LOGGER = "backend.query_tracking"
+
+
+@pytest.fixture
+def customers(db_session):
+    """A dozen customers."""
+    db.session.add_all(
+        Customer(first_name=f"Client {i}", phone=f"555-09{i:02d}") for i in range(12)
+    )
+    db.session.commit()
+    return [customer.id for customer in Customer.query.all()]
+
+
+class TestFingerprint:
+    """Tests for statement fingerprints."""
+
+    def test_literals_replaced(self):
+        """Test that statements differing only in literals share a fingerprint."""
+        assert fingerprint("SELECT * FROM customer WHERE id = 12") == fingerprint(
+            "SELECT *\n  FROM customer WHERE id = 7"
+        )
+        assert fingerprint("SELECT 1 WHERE name = 'Ann'") == "SELECT ? WHERE name = ?"
+
+    def test_in_lists_collapsed(self):
+        """Test that IN-lists of any length share a fingerprint."""
+        assert fingerprint("SELECT id FROM customer WHERE id IN (?, ?, ?)") == (
+            "SELECT id FROM customer WHERE id IN (?)"
+        )
+
+    def test_identifiers_kept(self):
+        """Test that digits inside identifiers are not replaced."""
+        assert "anon_1" in fingerprint("SELECT anon_1.id FROM (SELECT id FROM t) AS anon_1")
+
+
+class TestAssertMaxQueries:
+    """Tests for the query budget assertion."""
+
+    def test_within_budget(self, customers):
+        """Test that a block within its budget passes and exposes the queries."""
+        with assert_max_queries(1) as queries:
+            Customer.query.all()
+
+        assert len(queries) == 1
+        assert queries[0].seconds >= 0
+
+    def test_over_budget_reports_repeats(self, customers):
+        """Test that a loop of queries fails with the repeated fingerprint."""
+        with pytest.raises(AssertionError) as excinfo:
+            with assert_max_queries(3):
+                for customer_id in customers:
+                    Customer.query.filter_by(id=customer_id).first()
+
+        message = str(excinfo.value)
+        assert "12 queries executed, expected at most 3" in message
+        assert "repeated 12×" in message
+
+    def test_listeners_removed(self, customers):
+        """Test that tracking stops when the block exits."""
+        with track_queries() as queries:
+            pass
+        Customer.query.all()
+
+        assert queries == []
+
+
+class TestRequestTracking:
+    """Tests for the per-request N+1 warning and the slow-query log."""
+
+    def test_repeated_statement_logged(self, test_app, customers, caplog, monkeypatch):
+        """Test that a fingerprint repeated past the threshold is logged."""
+        monkeypatch.setitem(test_app.config, "QUERY_REPEAT_THRESHOLD", 5)
+
+        with caplog.at_level(logging.WARNING, logger=LOGGER):
+            with test_app.test_request_context("/customers"):
+                test_app.preprocess_request()
+                for customer_id in customers:
+                    Customer.query.filter_by(id=customer_id).first()
+
+        warnings = [r.getMessage() for r in caplog.records if "N+1" in r.getMessage()]
+        assert len(warnings) == 1
+        assert "GET /customers: 12 executions" in warnings[0]
+
+    def test_below_threshold_quiet(self, test_app, customers, caplog):
+        """Test that a normal page logs nothing."""
+        with caplog.at_level(logging.WARNING, logger=LOGGER):
+            test_app.test_client().get("/customers")
+
+        assert caplog.records == []
+
+    def test_slow_query_logged(self, test_app, customers, caplog, monkeypatch):
+        """Test that statements above the latency threshold are logged with parameters."""
+        monkeypatch.setitem(test_app.config, "SLOW_QUERY_SECONDS", 0)
+
+        with caplog.at_level(logging.WARNING, logger=LOGGER):
+            Customer.query.filter_by(phone="555-0903").first()
+
+        slow = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Slow query")]
+        assert slow
+        assert "555-0903" in slow[-1]
@@ -0,0 +1,187 @@
+"""
+Tests for the daily revenue rollup.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, text
+
+from backend.migrations import upgrade_schema
+from backend.models import Appointment, DailyRevenue
+from backend.query_tracking import track_queries
+from backend.rollups import apply_appointments, rebuild_daily_revenue, sum_revenue
+
+
+def _rollup(db_session):
+    """Rollup rows as comparable tuples."""
+    rows = db_session.session.query(DailyRevenue).order_by(
+        DailyRevenue.day, DailyRevenue.technician_id, DailyRevenue.service_id
+    )
+    return [
+        (
+            r.day,
+            r.technician_id,
+            r.service_id,
+            r.payment_method,
+            r.appointment_count,
+            round(r.revenue, 2),
+            round(r.tips, 2),
+        )
+        for r in rows
+    ]
+
+
+@pytest.fixture
+def ledger(db_session, sample_technician, sample_service, sample_customer):
+    """Appointments spread over four days, several per day."""
+    base = datetime(2024, 5, 10, 9, 0)
+    appointments = [
+        Appointment(
+            date_time=base + timedelta(days=day, hours=hour),
+            customer_id=sample_customer.id,
+            technician_id=sample_technician.id,
+            service_id=sample_service.id,
+            price_charged=30.00 + day,
+            tip_amount=5.00,
+            payment_method="Card" if hour else None,
+        )
+        for day in range(4)
+        for hour in (0, 4, 8)
+    ]
+    db_session.session.add_all(appointments)
+    db_session.session.commit()
+    return appointments
+
+
+class TestRollupMaintenance:
+    """Tests for keeping the rollup in step with ORM writes."""
+
+    def test_insert_updates_rollup(self, sample_appointment, db_session):
+        """Test that an insert lands in the rollup in the same commit."""
+        row = db_session.session.query(DailyRevenue).one()
+
+        assert row.day == sample_appointment.date_time.date()
+        assert row.payment_method == "Card"
+        assert row.appointment_count == 1
+        assert row.revenue == 35.00
+        assert row.tips == 5.00
+
+    def test_update_moves_totals(self, sample_appointment, db_session):
+        """Test that editing an appointment moves its totals."""
+        sample_appointment.price_charged = 50.00
+        sample_appointment.date_time -= timedelta(days=3)
+        db_session.session.commit()
+
+        row = db_session.session.query(DailyRevenue).one()
+        assert row.day == sample_appointment.date_time.date()
+        assert row.revenue == 50.00
+
+    def test_delete_removes_totals(self, sample_appointment, db_session):
+        """Test that deleting the last appointment of a group removes the row."""
+        db_session.session.delete(sample_appointment)
+        db_session.session.commit()
+
+        assert db_session.session.query(DailyRevenue).count() == 0
+
+    def test_rolled_back_insert_leaves_rollup(self, sample_appointment, db_session):
+        """Test that the rollup shares the ledger's transaction."""
+        db_session.session.add(
+            Appointment(
+                customer_id=sample_appointment.customer_id,
+                technician_id=sample_appointment.technician_id,
+                service_id=sample_appointment.service_id,
+                price_charged=99.00,
+                tip_amount=0.0,
+                payment_method="Card",
+            )
+        )
+        db_session.session.flush()
+        db_session.session.rollback()
+
+        assert db_session.session.query(func.sum(DailyRevenue.revenue)).scalar() == 35.00
+
+    def test_incremental_matches_rebuild(self, ledger, db_session):
+        """Test that the incrementally kept rollup equals a full rebuild."""
+        incremental = _rollup(db_session)
+        rebuild_daily_revenue()
+
+        assert _rollup(db_session) == incremental
+        assert len(incremental) == 8  # 4 days x (Card, not recorded)
+
+    def test_apply_bulk_rows(self, db_session, sample_technician, sample_service):
+        """Test applying rows written outside the ORM."""
+        apply_appointments(
+            [
+                {
+                    "date_time": datetime(2024, 1, 2, 10, 0),
+                    "technician_id": sample_technician.id,
+                    "service_id": sample_service.id,
+                    "payment_method": "Cash",
+                    "price_charged": 40.00,
+                    "tip_amount": None,
+                }
+            ]
+            * 2
+        )
+        db_session.session.commit()
+
+        row = db_session.session.query(DailyRevenue).one()
+        assert row.appointment_count == 2
+        assert row.revenue == 80.00
+        assert row.tips == 0.0
+
+
+class TestSumRevenue:
+    """Tests for range queries over the rollup."""
+
+    def _raw(self, ledger, start, end):
+        rows = [a for a in ledger if start <= a.date_time <= end]
+        return len(rows), sum(a.price_charged for a in rows), sum(a.tip_amount for a in rows)
+
+    @pytest.mark.parametrize(
+        "start, end",
+        [
+            (datetime(2024, 5, 10), datetime(2024, 5, 14)),  # Whole days
+            (datetime(2024, 5, 10, 12, 0), datetime(2024, 5, 13, 10, 0)),  # Partial edges
+            (datetime(2024, 5, 11, 9, 0), datetime(2024, 5, 11, 13, 0)),  # Within one day
+            (datetime(2024, 5, 11, 13, 0), datetime(2024, 5, 12, 9, 0)),  # Adjacent days
+        ],
+    )
+    def test_matches_ledger(self, ledger, start, end):
+        """Test that rollup + edge reads equal a raw ledger scan."""
+        totals = sum_revenue(start_date=start, end_date=end)
+        count, revenue, tips = self._raw(ledger, start, end)
+
+        assert totals[0]["appointment_count"] == count
+        assert round(totals[0]["revenue"], 2) == round(revenue, 2)
+        assert round(totals[0]["tips"], 2) == round(tips, 2)
+
+    def test_grouped_by_day(self, ledger):
+        """Test grouping by day."""
+        totals = sum_revenue(by=("day",), start_date=datetime(2024, 5, 11, 12, 0))
+        by_day = {row["day"]: row["appointment_count"] for row in totals}
+
+        assert by_day == {"2024-05-11": 2, "2024-05-12": 3, "2024-05-13": 3}
+
+    def test_whole_days_read_from_rollup(self, ledger):
+        """Test that an unbounded range never touches the ledger."""
+        with track_queries() as queries:
+            sum_revenue(by=("technician_id",))
+
+        assert len(queries) == 1
+        assert "daily_revenue" in queries[0].statement
+        assert "FROM appointment" not in queries[0].statement
+
+
+class TestRollupMigration:
+    """Tests for backfilling the rollup on upgrade."""
+
+    def test_upgrade_backfills_rollup(self, ledger, db_session):
+        """Test that a newly created rollup table is filled from the ledger."""
+        expected = _rollup(db_session)
+        db_session.session.execute(text("DROP TABLE daily_revenue"))
+        db_session.session.commit()
+
+        assert "daily_revenue" in upgrade_schema()
+        assert _rollup(db_session) == expected
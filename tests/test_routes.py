@@ -7,6 +7,7 @@ from datetime import datetime, timedelta
 import pytest
 
 from backend.models import Appointment, Customer, Service, Technician
+from backend.query_tracking import assert_max_queries, track_queries
 
 
 class TestDashboardRoute:
@@ -73,6 +74,68 @@ class TestAppointmentsRoute:
         response = client.get(f"/appointments?tech_id={sample_technician.id}")
         assert response.status_code == 200
 
+    def test_appointments_pagination_links(
+        self, client, db_session, sample_customer, sample_technician, sample_service
+    ):
+        """Test that the log is paged with older/newer links."""
+        from backend.models import db
+
+        for i in range(3):
+            db.session.add(
+                Appointment(
+                    customer_id=sample_customer.id,
+                    technician_id=sample_technician.id,
+                    service_id=sample_service.id,
+                    date_time=datetime.now() - timedelta(days=i),
+                    price_charged=30.00,
+                    tip_amount=5.00,
+                )
+            )
+        db.session.commit()
+
+        response = client.get("/appointments?per_page=2")
+        assert response.status_code == 200
+        assert b"Older" in response.data
+        assert b"Newer" not in response.data
+
+    def test_appointments_query_count_constant(self, client, db_session):
+        """Test that rendering more rows does not issue more queries."""
+        from backend.models import db
+
+        for i in range(10):
+            tech = Technician(name=f"Tech {i}")
+            service = Service(name=f"Service {i}", base_price=30.00)
+            customer = Customer(first_name=f"Client {i}", phone=f"555-03{i:02d}")
+            db.session.add_all([tech, service, customer])
+            db.session.flush()
+            db.session.add(
+                Appointment(
+                    customer_id=customer.id,
+                    technician_id=tech.id,
+                    service_id=service.id,
+                    date_time=datetime.now() - timedelta(days=i),
+                    price_charged=30.00,
+                    tip_amount=5.00,
+                )
+            )
+        db.session.commit()
+        db.session.expunge_all()
+
+        counts = []
+        for per_page in (2, 10):
+            with track_queries() as queries:
+                response = client.get(f"/appointments?per_page={per_page}")
+            assert response.status_code == 200
+            assert b"Client 1" in response.data
+            counts.append(len(queries))
+
+        assert counts[0] == counts[1]
+
+    def test_appointments_invalid_cursor(self, client, db_session):
+        """Test that a malformed cursor is rejected."""
+        response = client.get("/appointments?after=garbage")
+        assert response.status_code == 400
+
 
 class TestCustomersRoute:
     """Tests for customer analytics route."""
@@ -88,6 +151,15 @@ class TestCustomersRoute:
         assert response.status_code == 200
         assert b"Test Customer" in response.data
 
+    def test_customers_computes_ltv_once(self, client, sample_appointment):
+        """Test that the page reads the ledger a single time."""
+        with track_queries() as queries:
+            response = client.get("/customers")
+
+        assert response.status_code == 200
+        # The ledger version keying the page cache, then the LTV read
+        assert len(queries) == 2
+
 
 class TestAddAppointmentRoute:
     """Tests for add appointment route."""
@@ -136,3 +208,47 @@ class TestAddAppointmentRoute:
         # Verify no duplicate customer was created
         customers = Customer.query.filter_by(phone=sample_customer.phone).all()
         assert len(customers) == 1
+
+
+@pytest.fixture
+def busy_salon(db_session):
+    """Eight technicians, services and customers with three visits each."""
+    for i in range(8):
+        tech = Technician(name=f"Tech {i}")
+        service = Service(name=f"Service {i}", base_price=30.00)
+        customer = Customer(first_name=f"Client {i}", phone=f"555-04{i:02d}")
+        db_session.session.add_all([tech, service, customer])
+        db_session.session.flush()
+        for visit in range(3):
+            db_session.session.add(
+                Appointment(
+                    customer_id=customer.id,
+                    technician_id=tech.id,
+                    service_id=service.id,
+                    date_time=datetime.now() - timedelta(days=20 * visit + i),
+                    price_charged=30.00,
+                    tip_amount=5.00,
+                )
+            )
+    db_session.session.commit()
+    db_session.session.expunge_all()
+
+
+class TestQueryBudgets:
+    """Tests that pages issue a fixed number of queries, whatever the data size."""
+
+    @pytest.mark.parametrize(
+        "url,limit",
+        [
+            ("/", 2),
+            ("/appointments", 5),
+            ("/customers", 2),  # Including the page cache's ledger version
+            ("/staff-performance", 8),
+            ("/add", 2),
+        ],
+    )
+    def test_page_query_budget(self, client, busy_salon, url, limit):
+        """Test that a page stays within its query budget."""
+        with assert_max_queries(limit):
+            response = client.get(url)
+        assert response.status_code == 200
@@ -0,0 +1,162 @@
+"""
+Tests for the generated practice datasets.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import func
+
+from backend.customer_stats import rebuild_customer_stats
+from backend.models import (
+    Appointment,
+    Customer,
+    CustomerStats,
+    DailyRevenue,
+    Service,
+    Technician,
+    db,
+)
+from backend.rollups import rebuild_daily_revenue
+from backend.seeding import SEGMENTS, generate_visits, seed_database, segment_sizes
+
+NOW = datetime(2024, 6, 1, 20, 0)
+
+
+def _ledger(db_session):
+    """Appointment rows as comparable tuples."""
+    return [
+        (a.date_time, a.customer_id, a.technician_id, a.service_id, a.price_charged, a.tip_amount)
+        for a in db_session.session.query(Appointment).order_by(Appointment.id)
+    ]
+
+
+class TestSeedDatabase:
+    """Tests for loading a profile."""
+
+    def test_small_profile(self, db_session):
+        """Test that the small profile matches the original hand-written seed."""
+        stats = seed_database("small", now=NOW)
+
+        assert Technician.query.count() == 5
+        assert Service.query.count() == 12
+        assert Customer.query.count() == 34
+        assert Appointment.query.count() == stats["appointments"] > 0
+        assert stats["start"] == datetime(2024, 3, 3)
+
+        first, last = db_session.session.query(
+            func.min(Appointment.date_time), func.max(Appointment.date_time)
+        ).one()
+        assert first >= stats["start"]
+        assert last < NOW + timedelta(days=1)
+
+    def test_same_seed_same_data(self, db_session):
+        """Test that a seed always produces the same dataset."""
+        seed_database("small", seed=7, now=NOW)
+        first = _ledger(db_session)
+        seed_database("small", seed=7, now=NOW)
+        assert _ledger(db_session) == first
+
+        seed_database("small", seed=8, now=NOW)
+        assert _ledger(db_session) != first
+
+    def test_ids_follow_time(self, db_session):
+        """Test that appointment ids increase with date_time, like the live ledger."""
+        seed_database("small", now=NOW)
+        times = [row[0] for row in _ledger(db_session)]
+        assert times == sorted(times)
+
+    def test_at_risk_customers_lapsed(self, db_session):
+        """Test that every at-risk customer last visited 31-60 days ago."""
+        seed_database("small", now=NOW)
+        sizes = segment_sizes(34)
+        first_at_risk = sizes["regular"] + sizes["occasional"] + 1
+
+        last_visits = dict(
+            db_session.session.query(Appointment.customer_id, func.max(Appointment.date_time))
+            .group_by(Appointment.customer_id)
+            .all()
+        )
+        for customer_id in range(first_at_risk, 35):
+            days_ago = (NOW.date() - last_visits[customer_id].date()).days
+            assert 31 <= days_ago <= 60
+
+    def test_rollup_built(self, db_session):
+        """Test that the daily revenue rollup matches the generated ledger."""
+        stats = seed_database("small", now=NOW)
+        revenue, tips = db_session.session.query(
+            func.sum(DailyRevenue.revenue), func.sum(DailyRevenue.tips)
+        ).one()
+        assert revenue + tips == pytest.approx(stats["revenue"])
+
+    def test_summaries_match_ledger_rebuild(self, db_session):
+        """Test that the rollup and stats built from the generated columns match a rebuild."""
+        seed_database("small", now=NOW)
+
+        def summaries():
+            rollup = {
+                (r.day, r.technician_id, r.service_id, r.payment_method): (
+                    r.appointment_count,
+                    pytest.approx(r.revenue),
+                    pytest.approx(r.tips),
+                )
+                for r in DailyRevenue.query
+            }
+            stats = {
+                s.customer_id: (
+                    s.visit_count,
+                    pytest.approx(s.total_revenue),
+                    s.first_visit,
+                    s.last_visit,
+                    s.gap_sum,
+                    s.second_half_gaps,
+                    s.service_counts,
+                    s.technician_counts,
+                    s.favorite_service,
+                )
+                for s in CustomerStats.query
+            }
+            return rollup, stats
+
+        seeded = summaries()
+        rebuild_daily_revenue()
+        rebuild_customer_stats()
+        db_session.session.expire_all()
+        assert summaries() == seeded
+
+    def test_indexes_restored(self, db_session):
+        """Test that the appointment indexes dropped for the load exist afterwards."""
+        seed_database("small", now=NOW, batch_size=10)
+        names = {
+            row[0]
+            for row in db.session.execute(
+                db.text("SELECT name FROM sqlite_master WHERE type = 'index'")
+            )
+        }
+        assert {index.name for index in Appointment.__table__.indexes} <= names
+
+    def test_unknown_profile(self, db_session):
+        """Test that an unknown profile is rejected."""
+        with pytest.raises(ValueError):
+            seed_database("huge")
+
+
+class TestGenerateVisits:
+    """Tests for the vectorized visit generator."""
+
+    def test_segment_sizes(self):
+        """Test that segment sizes add up and keep the original mix."""
+        assert segment_sizes(34) == {"regular": 15, "occasional": 10, "at_risk": 9}
+        assert sum(segment_sizes(100_000).values()) == 100_000
+
+    def test_visits_spaced_by_interval(self):
+        """Test that a regular customer's visits are at least the interval apart."""
+        rng = np.random.default_rng(1)
+        visits = generate_visits(rng, 1, 50, SEGMENTS["regular"], 365)
+
+        assert set(visits["customer_id"]) <= set(range(1, 51))
+        assert visits["day"].min() >= 0 and visits["day"].max() <= 365
+        for customer_id in range(1, 51):
+            days = visits["day"][visits["customer_id"] == customer_id]
+            assert (np.diff(days) >= 14).all()
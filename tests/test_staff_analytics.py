@@ -5,11 +5,13 @@ from datetime import datetime, timedelta
 import pytest
 
 from backend.models import Appointment, Customer, Service, Technician, app, db
+from backend.query_tracking import track_queries
 from backend.staff_analytics import (
     get_customer_retention_by_technician,
     get_staff_summary_stats,
     get_technician_performance,
     get_top_services_by_technician,
+    get_top_services_for_all_technicians,
 )
 
 
@@ -292,6 +294,20 @@ class TestCustomerRetention:
             assert tech_retention["total_customers"] == 0
             assert tech_retention["retention_rate"] == 0.0
 
+    def test_retention_single_query(self, test_app, sample_data):
+        """Test that retention for every technician costs one query."""
+        with test_app.app_context():
+            for i in range(5):
+                db.session.add(Technician(name=f"Extra{i}", commission_rate=0.60))
+            db.session.commit()
+
+            with track_queries() as queries:
+                retention = get_customer_retention_by_technician()
+
+            assert len(retention) == 8
+            assert [r["technician_name"] for r in retention[:3]] == ["Alice", "Bob", "Carol"]
+            assert len(queries) == 1
+
 
 class TestTopServices:
     """Test top services by technician."""
@@ -327,6 +343,44 @@ class TestTopServices:
 
             assert len(top_services) <= 2
 
+    def test_top_services_all_technicians(self, test_app, sample_data):
+        """Test the batch lookup ranks every technician's services."""
+        with test_app.app_context():
+            techs = {t.name: t.id for t in Technician.query.all()}
+            top_services = get_top_services_for_all_technicians(limit=2)
+
+            assert set(top_services) == set(techs.values())
+            alice = top_services[techs["Alice"]]
+            assert [s["service_name"] for s in alice] == ["Gel Nails", "Manicure"]
+            assert alice[0]["count"] == 3
+            # Pedicure and Manicure tie at one visit; the lower service id wins
+            assert alice[1]["service_name"] == "Manicure"
+            assert top_services[techs["Carol"]] == [
+                {"service_name": "Manicure", "count": 2, "revenue": 60.0}
+            ]
+
+    def test_top_services_single_query(self, test_app, sample_data):
+        """Test that the batch lookup costs one query for all technicians."""
+        with test_app.app_context():
+            with track_queries() as queries:
+                get_top_services_for_all_technicians()
+
+            assert len(queries) == 1
+            # Ranked from the daily rollup, never by scanning the ledger
+            assert "daily_revenue" in queries[0].statement
+            assert "FROM appointment" not in queries[0].statement
+
+    def test_top_services_missing_service(self, test_app, sample_data):
+        """Test that visits of a deleted service are reported as Unknown, not dropped."""
+        with test_app.app_context():
+            carol = Technician.query.filter_by(name="Carol").first()
+            db.session.execute(db.delete(Service).where(Service.name == "Manicure"))
+            db.session.commit()
+
+            assert get_top_services_by_technician(carol.id) == [
+                {"service_name": "Unknown", "count": 2, "revenue": 60.0}
+            ]
+
 
 class TestStaffSummaryStats:
     """Test overall staff summary statistics."""
@@ -391,3 +445,11 @@ class TestStaffPerformanceRoute:
             response = client.get("/staff-performance")
             assert b"Staff Performance Dashboard" in response.data
             assert b"Alice" in response.data  # Should show technician name
+
+    def test_staff_performance_top_services_per_tech(self, test_app, sample_data):
+        """Test that every technician row lists its top services."""
+        with test_app.test_client() as client:
+            response = client.get("/staff-performance")
+            assert b"Top Services" in response.data
+            assert b"Gel Nails, Manicure, Pedicure" in response.data  # Alice
+            assert b"Manicure, Pedicure" in response.data  # Bob
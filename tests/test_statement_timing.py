@@ -0,0 +1,76 @@
+"""
+Tests for the shared per-statement timer.
+"""
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from backend import statement_timing
+
+
+@pytest.fixture
+def engine():
+    """A private in-memory engine, so the app's subscribers stay out of the way."""
+    engine = create_engine("sqlite://")
+    yield engine
+    engine.dispose()
+
+
+def _recorder(calls):
+    def record(statement, parameters, executemany, seconds):
+        calls.append((statement, executemany, seconds))
+
+    return record
+
+
+class TestStatementTiming:
+    """Tests for subscribe() and unsubscribe()."""
+
+    def test_every_subscriber_sees_each_statement(self, engine):
+        """Test that several subscribers share one timing of every statement."""
+        first, second = [], []
+        statement_timing.subscribe(engine, _recorder(first))
+        statement_timing.subscribe(engine, _recorder(second))
+
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+        assert first == second
+        assert [(statement, many) for statement, many, _ in first] == [("SELECT 1", False)]
+        assert first[0][2] >= 0
+
+    def test_unsubscribe(self, engine):
+        """Test that an unsubscribed callback is no longer called."""
+        calls = []
+        record = _recorder(calls)
+        statement_timing.subscribe(engine, record)
+        statement_timing.unsubscribe(engine, record)
+        statement_timing.unsubscribe(engine, record)  # Unknown callbacks are ignored
+
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+        assert calls == []
+
+    def test_failed_statement_drops_timer(self, engine):
+        """Test that a failed statement neither reaches subscribers nor leaves a timer behind."""
+        calls = []
+        statement_timing.subscribe(engine, _recorder(calls))
+
+        with engine.connect() as conn:
+            with pytest.raises(exc.OperationalError):
+                conn.execute(text("SELECT * FROM missing"))
+            assert conn.info["statement_started"] == []
+            conn.execute(text("SELECT 1"))
+
+        assert [statement for statement, _, _ in calls] == ["SELECT 1"]
+
+    def test_execution_options_connections_timed(self, engine):
+        """Test that connections of an execution_options() engine are timed too."""
+        calls = []
+        statement_timing.subscribe(engine, _recorder(calls))
+
+        with engine.execution_options(isolation_level="AUTOCOMMIT").connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+        assert len(calls) == 1
@@ -0,0 +1,11 @@
+"""
+Salon Pulse - WSGI Entry Point
+
+Production servers load the application from here, e.g.:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from backend import create_app
+
+app = create_app()